@@ -0,0 +1,138 @@
+"""
+Semantic cache of finished answers for near-duplicate questions
+
+"what is PMF" and "how do I know I have product market fit" should not each
+pay for retrieval plus a 70B generation. Questions are compared by cosine
+similarity of the embedding the retriever computes anyway; a close enough
+match returns the stored answer and sources.
+"""
+
+import os
+import re
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Entries are partitioned by request settings (temperature, source
+    filter, index version, top_k, max_tokens) so a 0.7 answer is never
+    served for a 0.1 request, nor one cut off at 100 tokens for a 1000
+    token request. Bounded by entry count (LRU across partitions) and TTL.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 1000, ttl_seconds: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # entry id -> (partition, vector, payload, created); insertion order = LRU order
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def partition(
+        temperature: float,
+        source_filter: Optional[str] = None,
+        index_version: str = "",
+        top_k: Optional[int] = None,
+        max_tokens: Optional[int] = None
+    ) -> tuple:
+        return (round(temperature, 2), source_filter, index_version, top_k, max_tokens)
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def get(self, vector, partition: tuple) -> Optional[Dict]:
+        """Best cached payload in `partition` above the threshold, or None"""
+        query = self._unit(vector)
+        now = time.time()
+
+        with self._lock:
+            ids, vectors = [], []
+            for entry_id, (entry_partition, entry_vector, _, created) in list(self._entries.items()):
+                if self.ttl_seconds and now - created > self.ttl_seconds:
+                    del self._entries[entry_id]
+                    self.evictions += 1
+                    continue
+                if entry_partition == partition:
+                    ids.append(entry_id)
+                    vectors.append(entry_vector)
+
+            if not ids:
+                self.misses += 1
+                return None
+
+            similarities = np.stack(vectors) @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(ids[best])
+            self.hits += 1
+            payload = dict(self._entries[ids[best]][2])
+            payload['similarity'] = float(similarities[best])
+            return payload
+
+    def put(self, vector, partition: tuple, payload: Dict):
+        with self._lock:
+            self._entries[self._next_id] = (partition, self._unit(vector), payload, time.time())
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def replay_stream(text: str, delay_s: float = 0.0) -> Iterator[str]:
+    """Re-stream a stored answer word by word (whitespace kept), optionally paced"""
+    for i, piece in enumerate(re.findall(r"\S+\s*|\s+", text)):
+        if delay_s and i:
+            time.sleep(delay_s)
+        yield piece
+
+
+async def areplay_stream(text: str, delay_s: float = 0.0) -> AsyncIterator[str]:
+    """replay_stream for the event loop (pacing never blocks it)"""
+    for i, piece in enumerate(re.findall(r"\S+\s*|\s+", text)):
+        if delay_s and i:
+            await asyncio.sleep(delay_s)
+        yield piece
+
+
+def answer_cache_from_env() -> Optional[SemanticAnswerCache]:
+    """ANSWER_CACHE_ENABLED=1 turns the cache on"""
+    if os.getenv('ANSWER_CACHE_ENABLED', '0') != '1':
+        return None
+    return SemanticAnswerCache(
+        threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', 0.92)),
+        max_entries=int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 1000)),
+        ttl_seconds=float(os.getenv('ANSWER_CACHE_TTL', 3600)),
+    )
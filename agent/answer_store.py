@@ -0,0 +1,131 @@
+"""
+Precomputed answers for canonical questions
+
+A handful of questions (the eval sets, the persona's core frameworks) make
+up a large share of traffic. ingestion/build_answer_store.py pregenerates
+their answers, sources and chunks into a gzipped JSON artifact; LennyRAG
+loads it at startup and serves exact or normalized matches without
+retrieval or generation, to requests that use the generation settings
+(temperature, top_k, max_tokens) the artifact was built with.
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import threading
+from typing import Dict, List, Optional
+
+from agent.embedding_cache import normalize_query
+
+DEFAULT_ANSWER_STORE_PATH = os.path.join(os.path.dirname(__file__), "..", "precomputed_answers.json.gz")
+
+ARTIFACT_VERSION = 2
+
+# Request settings an artifact answers for (recorded in its meta)
+SETTINGS = ("temperature", "top_k", "max_tokens")
+
+
+def normalize_question(question: str) -> str:
+    """normalize_query plus punctuation folded away: "What is product-market fit?" == "what is product market fit" """
+    return normalize_query(re.sub(r"[^\w\s]", " ", question))
+
+
+class AnswerStore:
+    def __init__(self, entries: List[Dict], meta: Optional[Dict] = None):
+        self.meta = meta or {}
+        self._answers: Dict[str, Dict] = {}
+        for entry in entries:
+            self._answers[normalize_question(entry["question"])] = entry
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.setting_mismatches = 0
+
+    @classmethod
+    def load(cls, path: str) -> "AnswerStore":
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            artifact = json.load(f)
+        if artifact.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported answer store version {artifact.get('version')} in {path}")
+        entries = artifact.pop("entries")
+        return cls(entries, meta=artifact)
+
+    def save(self, path: str):
+        artifact = dict(self.meta, version=ARTIFACT_VERSION, built_at=time.time())
+        artifact["entries"] = list(self._answers.values())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(artifact, f, ensure_ascii=False, separators=(",", ":"))
+
+    def add(self, question: str, answer: str, sources: List[Dict], chunks: List[Dict]):
+        self._answers[normalize_question(question)] = {
+            "question": question,
+            "answer": answer,
+            "sources": sources,
+            "chunks": chunks,
+        }
+
+    def matches(self, temperature: float, top_k: int, max_tokens: int) -> bool:
+        """Whether a request with these settings would get the answers this artifact holds"""
+        requested = {"temperature": round(temperature, 2), "top_k": top_k, "max_tokens": max_tokens}
+        return all(
+            self.meta.get(name) is not None and round(self.meta[name], 2) == requested[name]
+            for name in SETTINGS
+        )
+
+    def get(self, question: str, temperature: float, top_k: int, max_tokens: int) -> Optional[Dict]:
+        """Stored entry for `question` (exact or normalized match) under matching settings, or None"""
+        entry = self._answers.get(normalize_question(question))
+        mismatch = entry is not None and not self.matches(temperature, top_k, max_tokens)
+        with self._lock:
+            if entry is None or mismatch:
+                self.misses += 1
+                self.setting_mismatches += mismatch
+            else:
+                self.hits += 1
+        return None if mismatch else entry
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._answers),
+            "index_version": self.meta.get("index_version"),
+            "settings": {name: self.meta.get(name) for name in SETTINGS},
+            "hits": self.hits,
+            "setting_mismatches": self.setting_mismatches,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def answer_store_from_env(index_version: Optional[str] = None) -> Optional[AnswerStore]:
+    """
+    Store at ANSWER_STORE_PATH when the artifact exists (ANSWER_STORE_ENABLED=0
+    turns it off). Dropped if it was built against a different index.
+    """
+    if os.getenv('ANSWER_STORE_ENABLED', '1') != '1':
+        return None
+    path = os.getenv('ANSWER_STORE_PATH', DEFAULT_ANSWER_STORE_PATH)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        store = AnswerStore.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"   ⚠️ Precomputed answers unavailable: {e}")
+        return None
+
+    built_for = store.meta.get("index_version")
+    if index_version and built_for and built_for != index_version:
+        print(f"   ⚠️ Precomputed answers were built for index {built_for}, current is {index_version} "
+              f"- ignoring them (rebuild with ingestion/build_answer_store.py)")
+        return None
+
+    print(f"   ✅ Loaded {len(store)} precomputed answers")
+    return store
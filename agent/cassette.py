@@ -0,0 +1,159 @@
+"""
+Record/replay cassettes for LLM calls
+
+LLM_CASSETTE_MODE:
+    record        - call NIM as usual and append each request with its chunk
+                    sequence and timing to the cassette
+    replay        - serve recorded responses instantly, no network or API key
+    replay-timed  - serve them with the recorded TTFT and inter-chunk gaps
+
+Makes the LLM leg identical across runs, so retrieval, prompt construction
+and rendering can be profiled (and test_llm.py / test_persona.py / the
+evaluators run) fully offline.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+CASSETTE_MODES = ("off", "record", "replay", "replay-timed")
+
+DEFAULT_CASSETTE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "evaluation", "cassettes", "llm.jsonl"
+)
+
+
+class CassetteMissError(KeyError):
+    """Replay asked for a request that was never recorded"""
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown LLM_CASSETTE_MODE '{mode}', expected one of {CASSETTE_MODES}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        # Repeated identical requests replay their recordings in order, then cycle
+        self._recordings: Dict[str, List[Dict]] = {}
+        self._cursor: Dict[str, int] = {}
+
+        self.recorded = 0
+        self.replayed = 0
+
+        if self.replaying:
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode in ("replay", "replay-timed")
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        """Stream flag excluded: a streamed recording also serves non-streamed calls"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(
+                f"No cassette at {self.path}; record one first with LLM_CASSETTE_MODE=record"
+            )
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._recordings.setdefault(entry["key"], []).append(entry)
+        print(f"   📼 Cassette loaded: {sum(len(v) for v in self._recordings.values())} recordings ({self.mode})")
+
+    def record(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        chunks: List[str],
+        offsets: List[float]
+    ):
+        """Append one request; `offsets` are seconds from request start per chunk"""
+        entry = {
+            "key": self.make_key(model, messages, temperature, max_tokens),
+            "request": {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            "chunks": [[round(offset, 4), text] for offset, text in zip(offsets, chunks)],
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.recorded += 1
+
+    def record_stream(self, model, messages, temperature, max_tokens, chunks: List[str], stats):
+        """Rebuild per-chunk offsets from an InstrumentedStream's TTFT and gaps"""
+        offsets = []
+        if chunks and stats.ttft_s is not None:
+            offset = stats.ttft_s
+            offsets.append(offset)
+            for gap in stats.gaps:
+                offset += gap
+                offsets.append(offset)
+        self.record(model, messages, temperature, max_tokens, chunks, offsets or [0.0] * len(chunks))
+
+    def lookup(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Dict:
+        key = self.make_key(model, messages, temperature, max_tokens)
+        with self._lock:
+            recordings = self._recordings.get(key)
+            if not recordings:
+                raise CassetteMissError(
+                    f"No recording for this {model} request in {self.path}; "
+                    f"re-record with LLM_CASSETTE_MODE=record"
+                )
+            cursor = self._cursor.get(key, 0)
+            self._cursor[key] = cursor + 1
+            self.replayed += 1
+            return recordings[cursor % len(recordings)]
+
+    def replay_chunks(self, entry: Dict) -> Iterator[str]:
+        start = time.perf_counter()
+        for offset, text in entry["chunks"]:
+            if self.mode == "replay-timed":
+                delay = offset - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            yield text
+
+    def replay_text(self, entry: Dict) -> str:
+        if self.mode == "replay-timed" and entry["chunks"]:
+            time.sleep(entry["chunks"][-1][0])
+        return "".join(text for _, text in entry["chunks"])
+
+    async def areplay_chunks(self, entry: Dict) -> AsyncIterator[str]:
+        """replay_chunks for the async client (waits without blocking the loop)"""
+        start = time.perf_counter()
+        for offset, text in entry["chunks"]:
+            if self.mode == "replay-timed":
+                delay = offset - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield text
+
+    async def areplay_text(self, entry: Dict) -> str:
+        if self.mode == "replay-timed" and entry["chunks"]:
+            await asyncio.sleep(entry["chunks"][-1][0])
+        return "".join(text for _, text in entry["chunks"])
+
+
+def cassette_from_env() -> Optional[Cassette]:
+    """Cassette for LLM_CASSETTE_MODE / LLM_CASSETTE_PATH, or None when off"""
+    mode = os.getenv('LLM_CASSETTE_MODE', 'off').lower()
+    if mode == "off":
+        return None
+    return Cassette(os.getenv('LLM_CASSETTE_PATH', DEFAULT_CASSETTE_PATH), mode)
@@ -4,11 +4,17 @@ ChromaDB retriever for local semantic search (FAST!)
 
 import os
 import sys
-from typing import List, Dict
+import time
+import shutil
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
+import numpy as np
 import hashlib
 
+from agent.lexical_index import BM25Index, reciprocal_rank_fusion
+from agent.query_embedder import QueryEmbedder
+from agent.result_cache import result_cache_from_env
+
 # Try to import chromadb
 try:
     import chromadb
@@ -20,26 +26,25 @@ except ImportError:
 
 load_dotenv()
 
+# Written next to the collection by ingestion/load_chroma.py after each upload
+INDEX_MANIFEST = "index_manifest.json"
+LEXICAL_INDEX = "bm25_index.json"
+
 class ChromaRetriever:
     def __init__(self):
+        startup = time.perf_counter()
+        self.startup_timings = {}
+        serverless = bool(os.getenv('VERCEL') or os.getenv('STREAMLIT_RUNTIME_ENV'))
+        
         # Streamlit Cloud / Vercel handling
-        if os.getenv('VERCEL') or os.getenv('STREAMLIT_RUNTIME_ENV'):
-            self.persist_directory = "/tmp/chroma_db"
-            
-            # Copy from build artifacts if exists
-            if not os.path.exists(self.persist_directory):
-                source_db = os.path.join(os.path.dirname(__file__), "..", "chroma_db")
-                if os.path.exists(source_db):
-                    import shutil
-                    print(f"📦 Copying chroma_db to /tmp for serverless deployment...")
-                    shutil.copytree(source_db, self.persist_directory)
-                else:
-                    print(f"⚠️ ChromaDB directory not found at {source_db}")
+        phase = time.perf_counter()
+        source_db = os.path.join(os.path.dirname(__file__), "..", "chroma_db")
+        if serverless:
+            self.persist_directory = self._prepare_serverless_directory(source_db)
         else:
             # Local development
-            self.persist_directory = os.path.join(
-                os.path.dirname(__file__), "..", "chroma_db"
-            )
+            self.persist_directory = source_db
+        self.startup_timings['persist_dir'] = time.perf_counter() - phase
         
         self.collection_name = os.getenv('CHROMA_COLLECTION_NAME', 'lenny_clone')
         self.embedding_model_name = os.getenv(
@@ -51,14 +56,17 @@ class ChromaRetriever:
         print(f"   DB Path: {self.persist_directory}")
         
         # Initialize ChromaDB client
+        phase = time.perf_counter()
         try:
             self.client = chromadb.PersistentClient(path=self.persist_directory)
             print(f"   ✅ ChromaDB client initialized")
         except Exception as e:
             print(f"   ❌ Failed to initialize ChromaDB: {e}")
             raise
+        self.startup_timings['chroma_client'] = time.perf_counter() - phase
         
         # Get or create collection
+        phase = time.perf_counter()
         try:
             self.collection = self.client.get_collection(name=self.collection_name)
             print(f"   ✅ Loaded collection: {self.collection_name}")
@@ -75,42 +83,189 @@ class ChromaRetriever:
             self.collection = None
             print(f"   ❌ Collection '{self.collection_name}' not found or empty")
             print(f"   💡 Make sure 'chroma_db/' folder is in your deployment")
+        self.startup_timings['collection'] = time.perf_counter() - phase
         
-        # Initialize embedding model
-        print(f"📥 Loading embedding model: {self.embedding_model_name}")
+        # Initialize embedding model. Serverless defaults to loading it in a
+        # background thread so the app can render before the model is ready.
+        model_load = os.getenv('EMBEDDING_MODEL_LOAD', 'background' if serverless else 'eager')
+        print(f"📥 Loading embedding model: {self.embedding_model_name} ({model_load})")
+        phase = time.perf_counter()
         try:
-            self.embedding_model = SentenceTransformer(
-                self.embedding_model_name,
-                device='cpu'
-            )
-            print(f"   ✅ Model loaded")
+            # Model + embedding caches (bounded in memory, optional on disk)
+            self.embedder = QueryEmbedder(self.embedding_model_name, load=model_load)
+            if model_load == 'eager':
+                print(f"   ✅ Model loaded")
         except Exception as e:
             print(f"   ❌ Failed to load embedding model: {e}")
             raise
+        self.startup_timings['embedding_model'] = time.perf_counter() - phase
+        
+        # Candidate multiplier for single-pass dual-stream retrieval
+        self.dual_stream_overfetch = int(os.getenv('DUAL_STREAM_OVERFETCH', 4))
+        
+        # Result cache, keyed on the index version (see index_version)
+        self.result_cache = result_cache_from_env()
+        self._manifest_stamp = None
+        self._index_version = None
+        
+        # Hybrid retrieval: BM25 + vectors fused with reciprocal-rank fusion
+        phase = time.perf_counter()
+        self.retrieval_mode = os.getenv('RETRIEVAL_MODE', 'vector').lower()
+        self.hybrid_candidates = int(os.getenv('HYBRID_CANDIDATES', 10))
+        self.lexical_min_coverage = float(os.getenv('LEXICAL_FASTPATH_COVERAGE', 1.0))
+        self.lexical_index = self._load_lexical_index()
+        self.startup_timings['lexical_index'] = time.perf_counter() - phase
         
-        # Embedding cache
-        self._embedding_cache = {}
+        self.startup_timings['total'] = time.perf_counter() - startup
+        print("   ⏱️  Startup: " + " | ".join(
+            f"{phase} {seconds:.3f}s" for phase, seconds in self.startup_timings.items()
+        ))
     
-    def embed_query(self, query: str) -> List[float]:
-        """Generate embedding for query with caching"""
-        # Create cache key
-        cache_key = hashlib.md5(query.encode()).hexdigest()
-        
-        # Check cache
-        if cache_key in self._embedding_cache:
-            return self._embedding_cache[cache_key]
-        
-        # Generate embedding
-        embedding = self.embedding_model.encode(
-            query,
-            convert_to_numpy=True,
-            show_progress_bar=False
-        )
+    def _load_lexical_index(self) -> Optional[BM25Index]:
+        path = os.path.join(self.persist_directory, LEXICAL_INDEX)
+        if not os.path.exists(path):
+            if self.retrieval_mode == 'hybrid':
+                print(f"   ⚠️ RETRIEVAL_MODE=hybrid but {LEXICAL_INDEX} is missing - run load_chroma.py")
+            return None
+        index = BM25Index.load(path)
+        print(f"   ✅ Loaded BM25 index ({len(index)} chunks, {len(index.postings)} terms)")
+        return index
+    
+    @property
+    def embedding_model(self):
+        """The SentenceTransformer (blocks until a deferred load finishes)"""
+        return self.embedder.model
+    
+    def _prepare_serverless_directory(self, source_db: str) -> str:
+        """
+        Pick where Chroma opens the shipped index on Vercel / Streamlit Cloud.
+        
+        CHROMA_PERSIST_MODE:
+          auto    - open in place if the shipped directory is writable
+                    (Streamlit Cloud), otherwise link-copy to /tmp (default)
+          inplace - always open the shipped directory
+          copy    - always link-copy to /tmp
+        
+        A link-copy links the HNSW segment files, which Chroma only reads at
+        query time, and really copies only the SQLite database, which Chroma
+        opens for writing. Same filesystem: hardlinks. Across filesystems
+        (Vercel: read-only /var/task, /tmp elsewhere) hardlinks are
+        impossible, so segments are symlinked instead. That keeps them out
+        of /tmp's size limit but saves little time: Chroma still reads every
+        segment file in full when the collection is first queried, and the
+        SQLite copy is unavoidable.
+        """
+        mode = os.getenv('CHROMA_PERSIST_MODE', 'auto').lower()
+        target = os.getenv('CHROMA_TMP_DIR', '/tmp/chroma_db')
+        
+        if not os.path.exists(source_db):
+            print(f"⚠️ ChromaDB directory not found at {source_db}")
+            return target
         
-        # Cache it
-        self._embedding_cache[cache_key] = embedding.tolist()
+        if mode == 'inplace' or (mode == 'auto' and self._is_writable_tree(source_db)):
+            print(f"📂 Opening chroma_db in place")
+            return source_db
         
-        return self._embedding_cache[cache_key]
+        # Warm container: a previous invocation already prepared /tmp
+        if os.path.exists(target):
+            return target
+        
+        cross_device = self._device(source_db) != self._device(os.path.dirname(os.path.abspath(target)))
+        link = self._symlink_or_copy if cross_device else self._link_or_copy
+        print(f"📦 Link-copying chroma_db to {target} for serverless deployment"
+              f"{' (cross-device: symlinks)' if cross_device else ''}...")
+        shutil.copytree(source_db, target, copy_function=link)
+        return target
+    
+    @staticmethod
+    def _device(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _is_writable_tree(path: str) -> bool:
+        """Chroma needs to write the directory and its SQLite file"""
+        if not os.access(path, os.W_OK):
+            return False
+        sqlite_path = os.path.join(path, "chroma.sqlite3")
+        return not os.path.exists(sqlite_path) or os.access(sqlite_path, os.W_OK)
+    
+    @staticmethod
+    def _link_or_copy(src: str, dst: str):
+        # SQLite (and its journals) must be a private, writable copy
+        if not os.path.basename(src).startswith("chroma.sqlite3"):
+            try:
+                os.link(src, dst)
+                return dst
+            except OSError:
+                pass
+        return shutil.copy2(src, dst)
+    
+    @staticmethod
+    def _symlink_or_copy(src: str, dst: str):
+        # A write through a symlink would fail on the read-only source,
+        # never modify it
+        if not os.path.basename(src).startswith("chroma.sqlite3"):
+            os.symlink(os.path.abspath(src), dst)
+            return dst
+        return shutil.copy2(src, dst)
+    
+    def index_version(self) -> str:
+        """
+        Version stamp of the loaded index: collection count plus a hash of
+        the manifest ChromaLoader writes after every upload. Only a stat()
+        per call; the count and hash are recomputed when the manifest changes.
+        """
+        manifest_path = os.path.join(self.persist_directory, INDEX_MANIFEST)
+        try:
+            stat = os.stat(manifest_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        
+        if self._index_version is None or stamp != self._manifest_stamp:
+            manifest_hash = "none"
+            if stamp is not None:
+                with open(manifest_path, 'rb') as f:
+                    manifest_hash = hashlib.sha1(f.read()).hexdigest()[:12]
+            
+            # A rebuild replaces the collection, so re-open it by name
+            if self._index_version is not None:
+                try:
+                    self.collection = self.client.get_collection(name=self.collection_name)
+                except Exception as e:
+                    print(f"   ⚠️ Could not reload collection after rebuild: {e}")
+                self.lexical_index = self._load_lexical_index()
+            
+            count = self.collection.count() if self.collection else 0
+            self._manifest_stamp = stamp
+            self._index_version = f"{count}:{manifest_hash}"
+        
+        return self._index_version
+    
+    def _cached(self, key_args: tuple, params: Dict, compute):
+        """Serve from the result cache or compute and store"""
+        if self.result_cache is None:
+            return compute()
+        
+        key = self.result_cache.make_key(*key_args, self.index_version(), **params)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        results = compute()
+        self.result_cache.put(key, results)
+        return results
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Generate embedding for query with caching"""
+        return self.embedder.embed(query)
+    
+    def embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed many queries, encoding all cache misses in one model call"""
+        return self.embedder.embed_many(queries)
     
     def search(
         self,
@@ -125,58 +280,242 @@ class ChromaRetriever:
             print("❌ Collection not initialized")
             return []
         
-        # Embed query
-        query_vector = self.embed_query(query)
+        def compute():
+            # Embed query
+            query_vector = self.embed_query(query)
+            
+            # Search ChromaDB
+            results = self.collection.query(
+                query_embeddings=[query_vector],
+                n_results=top_k,
+                include=['documents', 'metadatas', 'distances']
+            )
+            
+            return self._format_results(results, score_threshold=score_threshold)
+        
+        return self._cached((query, None, top_k), {"score_threshold": score_threshold}, compute)
+    
+    def search_with_filters(
+        self,
+        query: str,
+        source_filter: str = None,
+        top_k: int = 5
+    ) -> List[Dict]:
+        """
+        Search with source filtering
+        """
+        if not self.collection:
+            return []
+        
+        def compute():
+            query_vector = self.embed_query(query)
+            return self._query_source(query_vector, source_filter, top_k)
+        
+        return self._cached((query, source_filter, top_k), {}, compute)
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        source_filter: str = None
+    ) -> List[List[Dict]]:
+        """
+        Search many queries with one encode call and one collection query.
+        Returns one result list per query, in input order.
+        """
+        if not self.collection:
+            return [[] for _ in queries]
+        if not queries:
+            return []
+        
+        query_vectors = self.embed_queries(queries)
+        
+        where_filter = None
+        if source_filter:
+            where_filter = {"source": source_filter}
         
-        # Search ChromaDB
         results = self.collection.query(
-            query_embeddings=[query_vector],
+            query_embeddings=query_vectors,
             n_results=top_k,
+            where=where_filter,
             include=['documents', 'metadatas', 'distances']
         )
         
-        # Format results
-        formatted_results = []
+        return [self._format_results(results, row=i) for i in range(len(queries))]
+    
+    def search_dual_stream(
+        self,
+        query: str,
+        sources: Tuple[str, ...] = ("linkedin", "youtube"),
+        top_k: int = 3
+    ) -> Dict[str, List[Dict]]:
+        """
+        Top-k per source from a single embedding and (usually) a single query.
         
-        if not results['ids'] or not results['ids'][0]:
-            return formatted_results
+        Over-fetches across all sources with one `$in` filter and splits the
+        hits by source. Only a stream that comes back short (its chunks were
+        crowded out by the other source) gets a filtered top-up query, which
+        reuses the same query vector.
+        """
+        if not self.collection:
+            return {source: [] for source in sources}
         
-        for i in range(len(results['ids'][0])):
-            # ChromaDB returns distance (lower is better)
-            # Convert to similarity score (higher is better)
-            distance = results['distances'][0][i]
-            similarity = 1 / (1 + distance)  # Convert distance to similarity
-            
-            # Apply threshold
-            if similarity < score_threshold:
-                continue
-            
-            metadata = results['metadatas'][0][i]
-            
-            formatted_results.append({
-                'text': results['documents'][0][i],
-                'source': metadata.get('source', 'unknown'),
-                'source_url': metadata.get('source_url', ''),
-                'score': similarity,
-                'metadata': metadata,
-            })
+        if self.retrieval_mode == 'hybrid' and self.lexical_index is not None:
+            mode, compute = "hybrid", self._hybrid_dual_stream
+        else:
+            mode, compute = "dual", self._search_dual_stream
         
-        return formatted_results
+        # Cached flat; every chunk's 'source' names its stream
+        flat = self._cached(
+            (query, (mode,) + tuple(sources), top_k),
+            {},
+            lambda: [
+                chunk
+                for stream in compute(query, sources, top_k).values()
+                for chunk in stream
+            ]
+        )
+        
+        streams = {source: [] for source in sources}
+        for chunk in flat:
+            streams[chunk['source']].append(chunk)
+        return streams
     
-    def search_with_filters(
+    def search_hybrid(
         self,
         query: str,
         source_filter: str = None,
         top_k: int = 5
     ) -> List[Dict]:
         """
-        Search with source filtering
+        BM25 + vector search fused with reciprocal-rank fusion. Falls back to
+        plain vector search when no BM25 index was built.
         """
         if not self.collection:
             return []
+        if self.lexical_index is None:
+            return self.search_with_filters(query, source_filter, top_k)
+        
+        def compute():
+            lexical_hits = self.lexical_index.search(query, self.hybrid_candidates, source_filter)
+            if self._lexical_is_strong(lexical_hits, top_k):
+                return self._lexical_results(lexical_hits[:top_k])
+            
+            query_vector = self.embed_query(query)
+            vector_hits = self._query_source(query_vector, source_filter, self.hybrid_candidates)
+            return self._fuse(lexical_hits, vector_hits, top_k)
+        
+        return self._cached((query, ("hybrid", source_filter), top_k), {}, compute)
+    
+    def _hybrid_dual_stream(self, query: str, sources: Tuple[str, ...], top_k: int) -> Dict[str, List[Dict]]:
+        lexical = {
+            source: self.lexical_index.search(query, self.hybrid_candidates, source)
+            for source in sources
+        }
+        
+        # Lexical fast path: no embedding, no vector query
+        if all(self._lexical_is_strong(hits, top_k) for hits in lexical.values()):
+            return {source: self._lexical_results(hits[:top_k]) for source, hits in lexical.items()}
+        
+        vector = self._search_dual_stream(query, sources, self.hybrid_candidates)
+        return {
+            source: self._fuse(lexical[source], vector[source], top_k)
+            for source in sources
+        }
+    
+    def _lexical_is_strong(self, hits: List[Dict], top_k: int) -> bool:
+        """Every one of the top_k BM25 hits matches (nearly) all query terms"""
+        return len(hits) >= top_k and all(
+            hit['coverage'] >= self.lexical_min_coverage for hit in hits[:top_k]
+        )
+    
+    def _lexical_results(self, hits: List[Dict]) -> List[Dict]:
+        """Fetch documents for BM25 hits and format them like vector results"""
+        if not hits:
+            return []
+        
+        fetched = self.collection.get(
+            ids=[hit['id'] for hit in hits],
+            include=['documents', 'metadatas']
+        )
+        by_id = {
+            chunk_id: (document, metadata)
+            for chunk_id, document, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas'])
+        }
+        
+        formatted_results = []
+        for hit in hits:
+            if hit['id'] not in by_id:
+                continue
+            document, metadata = by_id[hit['id']]
+            formatted_results.append({
+                'id': hit['id'],
+                'text': document,
+                'source': metadata.get('source', 'unknown'),
+                'source_url': metadata.get('source_url', ''),
+                # Share of query terms matched stands in for similarity
+                'score': hit['coverage'],
+                'lexical_score': hit['bm25'],
+                # Lets consumers of 'score' tell coverage from vector similarity
+                'retrieval': 'lexical',
+                'metadata': metadata,
+            })
+        return formatted_results
+    
+    def _fuse(self, lexical_hits: List[Dict], vector_hits: List[Dict], top_k: int) -> List[Dict]:
+        fused = reciprocal_rank_fusion([
+            [hit['id'] for hit in lexical_hits],
+            [hit['id'] for hit in vector_hits],
+        ])
+        ranked_ids = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        
+        by_id = {hit['id']: hit for hit in vector_hits}
+        lexical_by_id = {hit['id']: hit for hit in lexical_hits}
+        missing = [lexical_by_id[i] for i in ranked_ids if i not in by_id]
+        for chunk in self._lexical_results(missing):
+            by_id[chunk['id']] = chunk
+        
+        results = []
+        for chunk_id in ranked_ids:
+            if chunk_id not in by_id:
+                continue
+            chunk = dict(by_id[chunk_id])
+            chunk['rrf_score'] = fused[chunk_id]
+            if chunk_id in lexical_by_id:
+                chunk['lexical_score'] = lexical_by_id[chunk_id]['bm25']
+            results.append(chunk)
+        return results
+    
+    def _search_dual_stream(self, query: str, sources: Tuple[str, ...], top_k: int) -> Dict[str, List[Dict]]:
+        streams = {source: [] for source in sources}
         
         query_vector = self.embed_query(query)
         
+        n_results = top_k * len(sources) * self.dual_stream_overfetch
+        results = self.collection.query(
+            query_embeddings=[query_vector],
+            n_results=n_results,
+            where={"source": {"$in": list(sources)}},
+            include=['documents', 'metadatas', 'distances']
+        )
+        
+        for chunk in self._format_results(results):
+            stream = streams.get(chunk['source'])
+            if stream is not None and len(stream) < top_k:
+                stream.append(chunk)
+        
+        # The over-fetch only proves a stream is complete if it filled up or
+        # the whole candidate set was returned
+        returned = len(results['ids'][0]) if results['ids'] else 0
+        if returned >= n_results:
+            for source, stream in streams.items():
+                if len(stream) < top_k:
+                    streams[source] = self._query_source(query_vector, source, top_k)
+        
+        return streams
+    
+    def _query_source(self, query_vector, source_filter: Optional[str], top_k: int) -> List[Dict]:
+        """Run one (optionally source-filtered) query for an existing vector"""
         # Build filter
         where_filter = None
         if source_filter:
@@ -188,29 +527,36 @@ class ChromaRetriever:
             where=where_filter,
             include=['documents', 'metadatas', 'distances']
         )
-
-        # results_copy = results.copy()
-        # results = []
-        # filtered_results = []
-        # for rec in results_copy:
-        #     # ChromaDB uses distance (lower is better). 
-        #     # Threshold depends on metric (L2 vs Cosine). Assuming Cosine distance < 0.4 is good.
-        #     doc, score = results_copy['documents'][0], results_copy['distances'][0]
-        #     if score < 0.4: 
-        #         results.append(rec)
-        
-        # Format results (same as above)
+        
+        return self._format_results(results)
+    
+    def _format_results(
+        self,
+        results: Dict,
+        row: int = 0,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict]:
+        """Convert one row of a ChromaDB query response into result dicts"""
         formatted_results = []
-        if not results['ids'] or not results['ids'][0]:
+        
+        if not results['ids'] or not results['ids'][row]:
             return formatted_results
         
-        for i in range(len(results['ids'][0])):
-            distance = results['distances'][0][i]
+        for i in range(len(results['ids'][row])):
+            # ChromaDB returns distance (lower is better)
+            # Convert to similarity score (higher is better)
+            distance = results['distances'][row][i]
             similarity = 1 / (1 + distance)
-            metadata = results['metadatas'][0][i]
+            
+            # Apply threshold
+            if score_threshold is not None and similarity < score_threshold:
+                continue
+            
+            metadata = results['metadatas'][row][i]
             
             formatted_results.append({
-                'text': results['documents'][0][i],
+                'id': results['ids'][row][i],
+                'text': results['documents'][row][i],
                 'source': metadata.get('source', 'unknown'),
                 'source_url': metadata.get('source_url', ''),
                 'score': similarity,
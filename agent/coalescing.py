@@ -0,0 +1,310 @@
+"""
+Single-flight coalescing of identical in-flight requests
+
+When a link goes around, the same question arrives many times within
+seconds. The first request (leader) runs retrieval and one upstream
+generation on a background thread; identical requests that arrive while it
+is in flight attach to it and are fanned out the same tokens, starting
+from the first one. When every consumer has disconnected, the upstream
+generation is closed. Once the flight finishes, the next identical request
+starts a new one - this is not a cache.
+
+`join` is for threaded callers (the leader runs on a thread); `ajoin` is
+its event-loop twin (the leader is a task, cancelled when abandoned).
+"""
+
+import asyncio
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterator, Tuple
+
+
+class _Flight:
+    def __init__(self):
+        self.meta: Dict = {}
+        self.chunks = []
+        self.stats = None
+        self.done = False
+        self.error = None
+        self.consumers = 1
+        self.abandoned = False
+        self.meta_ready = threading.Event()
+        self.cond = threading.Condition()
+
+
+class _AsyncFlight:
+    def __init__(self):
+        self.meta: Dict = {}
+        self.chunks = []
+        self.stats = None
+        self.done = False
+        self.error = None
+        self.consumers = 1
+        self.task = None
+        self.meta_ready = asyncio.Event()
+        self.cond = asyncio.Condition()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        # Async flights are keyed by (event loop, key): their tasks belong to one loop
+        self._async_flights: Dict[Hashable, _AsyncFlight] = {}
+        # Re-entrant: a dropped consumer may detach from __del__ on any thread
+        self._lock = threading.RLock()
+
+        self.requests = 0
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+        self.max_fanout = 1
+
+    def join(
+        self,
+        key: Hashable,
+        produce: Callable[[], Tuple[Dict, Iterator[str]]]
+    ) -> Tuple[Dict, Iterator[str]]:
+        """
+        (metadata, token iterator) for `key`. `produce` runs at most once per
+        flight and returns the metadata plus the upstream token stream.
+        Blocks until the flight's metadata (retrieval results) is ready.
+        The iterator's close() detaches; once every consumer has, the
+        upstream stream is closed at its next token.
+        """
+        with self._lock:
+            self.requests += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.leaders += 1
+                threading.Thread(
+                    target=self._run, args=(key, flight, produce), daemon=True, name="coalesce"
+                ).start()
+            else:
+                flight.consumers += 1
+                self.coalesced += 1
+                self.max_fanout = max(self.max_fanout, flight.consumers)
+                print(f"   🔗 Coalesced with in-flight request ({flight.consumers} waiting)")
+
+        flight.meta_ready.wait()
+        if flight.error is not None and not flight.meta:
+            self._leave(key, flight)
+            raise flight.error
+        return dict(flight.meta), _FanOut(self, key, flight)
+
+    def _run(self, key: Hashable, flight: _Flight, produce):
+        try:
+            meta, stream = produce()
+            flight.meta = meta or {}
+            flight.stats = getattr(stream, 'stats', None)
+            flight.meta_ready.set()
+            for chunk in stream:
+                if flight.abandoned:
+                    # Every consumer went away: stop the upstream generation
+                    if hasattr(stream, 'close'):
+                        stream.close()
+                    break
+                with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            # New arrivals from here on start their own flight
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+            flight.meta_ready.set()
+
+    def _leave(self, key: Hashable, flight: _Flight):
+        """A consumer detached; the last one out abandons an unfinished flight"""
+        with self._lock:
+            flight.consumers -= 1
+            if flight.consumers > 0 or flight.done:
+                return
+            flight.abandoned = True
+            self.abandoned += 1
+            # Nobody may attach to a flight that is shutting down
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    async def ajoin(
+        self,
+        key: Hashable,
+        aproduce: Callable[[], Awaitable[Tuple[Dict, AsyncIterator[str]]]]
+    ) -> Tuple[Dict, AsyncIterator[str]]:
+        """
+        join() for coroutines: `aproduce` is awaited at most once per flight
+        and returns the metadata plus an async token stream. The iterator's
+        aclose() detaches; the last consumer out cancels the leader task,
+        which closes the upstream stream.
+        """
+        flight_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            self.requests += 1
+            flight = self._async_flights.get(flight_key)
+            if flight is None:
+                flight = _AsyncFlight()
+                self._async_flights[flight_key] = flight
+                self.leaders += 1
+                flight.task = asyncio.ensure_future(self._arun(flight_key, flight, aproduce))
+            else:
+                flight.consumers += 1
+                self.coalesced += 1
+                self.max_fanout = max(self.max_fanout, flight.consumers)
+                print(f"   🔗 Coalesced with in-flight request ({flight.consumers} waiting)")
+
+        try:
+            await flight.meta_ready.wait()
+        except asyncio.CancelledError:
+            self._aleave(flight_key, flight)
+            raise
+        if flight.error is not None and not flight.meta:
+            self._aleave(flight_key, flight)
+            raise flight.error
+        return dict(flight.meta), _AsyncFanOut(self, flight_key, flight)
+
+    async def _arun(self, flight_key: Hashable, flight: _AsyncFlight, aproduce):
+        stream = None
+        try:
+            meta, stream = await aproduce()
+            flight.meta = meta or {}
+            flight.stats = getattr(stream, 'stats', None)
+            flight.meta_ready.set()
+            async for chunk in stream:
+                async with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        except asyncio.CancelledError:
+            # Every consumer went away: stop the upstream generation
+            if stream is not None and hasattr(stream, 'aclose'):
+                await stream.aclose()
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._async_flights.get(flight_key) is flight:
+                    del self._async_flights[flight_key]
+            flight.done = True
+            flight.meta_ready.set()
+            async with flight.cond:
+                flight.cond.notify_all()
+
+    def _aleave(self, flight_key: Hashable, flight: _AsyncFlight):
+        with self._lock:
+            flight.consumers -= 1
+            if flight.consumers > 0 or flight.done:
+                return
+            self.abandoned += 1
+            if self._async_flights.get(flight_key) is flight:
+                del self._async_flights[flight_key]
+        try:
+            # May run from __del__ on another thread, or after the loop closed
+            flight_key[0].call_soon_threadsafe(flight.task.cancel)
+        except RuntimeError:
+            pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "upstream_calls": self.leaders,
+                "coalesced": self.coalesced,
+                "coalesce_rate": self.coalesced / self.requests if self.requests else 0.0,
+                "abandoned": self.abandoned,
+                "max_fanout": self.max_fanout,
+                "in_flight": len(self._flights) + len(self._async_flights),
+            }
+
+
+class _FanOut:
+    """
+    One consumer's view of a flight: every chunk from the first one. Keeps
+    the upstream stream's `.stats` visible (InstrumentedStream).
+    """
+
+    def __init__(self, group: SingleFlight, key: Hashable, flight: _Flight):
+        self._group = group
+        self._key = key
+        self._flight = flight
+        self._position = 0
+        self._closed = False
+
+    @property
+    def stats(self):
+        return self._flight.stats
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        flight = self._flight
+        if not self._closed:
+            with flight.cond:
+                while self._position >= len(flight.chunks) and not flight.done:
+                    flight.cond.wait()
+                if self._position < len(flight.chunks):
+                    self._position += 1
+                    return flight.chunks[self._position - 1]
+            self.close()
+            if flight.error is not None:
+                raise flight.error
+        raise StopIteration
+
+    def close(self):
+        """Detach (e.g. client disconnected); safe to call more than once"""
+        if not self._closed:
+            self._closed = True
+            self._group._leave(self._key, self._flight)
+
+    def __del__(self):
+        # Dropped without being read to the end or closed
+        self.close()
+
+
+class _AsyncFanOut:
+    """Async twin of _FanOut"""
+
+    def __init__(self, group: SingleFlight, flight_key: Hashable, flight: _AsyncFlight):
+        self._group = group
+        self._flight_key = flight_key
+        self._flight = flight
+        self._position = 0
+        self._closed = False
+
+    @property
+    def stats(self):
+        return self._flight.stats
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self
+
+    async def __anext__(self) -> str:
+        flight = self._flight
+        if not self._closed:
+            async with flight.cond:
+                await flight.cond.wait_for(
+                    lambda: self._position < len(flight.chunks) or flight.done
+                )
+                if self._position < len(flight.chunks):
+                    self._position += 1
+                    return flight.chunks[self._position - 1]
+            self.close()
+            if flight.error is not None:
+                raise flight.error
+        raise StopAsyncIteration
+
+    def close(self):
+        """Detach; safe to call more than once"""
+        if not self._closed:
+            self._closed = True
+            self._group._aleave(self._flight_key, self._flight)
+
+    async def aclose(self):
+        self.close()
+
+    def __del__(self):
+        self.close()
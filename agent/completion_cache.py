@@ -0,0 +1,150 @@
+"""
+On-disk cache of deterministic-enough LLM completions
+
+Judge calls (temperature 0.1) and style refinement (0.3) repeat with
+identical inputs across evaluation runs. Entries are keyed on model,
+messages, temperature and max_tokens, stored as the list of streamed
+chunks so a cached answer replays to streaming callers the way it first
+arrived, and evicted least-recently-used once the file passes its size cap.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+
+class CompletionCache:
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self._local = threading.local()
+        self._writable = True
+
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS completions ("
+                    " key TEXT PRIMARY KEY, chunks TEXT NOT NULL,"
+                    " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+                )
+        except sqlite3.OperationalError as e:
+            print(f"   ⚠️ Completion cache is read-only: {e}")
+            self._writable = False
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Cached chunks for `key`, or None"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT chunks FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._writable:
+                with conn:
+                    conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error:
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, chunks: List[str]):
+        if not self._writable:
+            return
+
+        blob = json.dumps(chunks, ensure_ascii=False)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, chunks, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob.encode()), time.time())
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"   ⚠️ Completion cache write failed, disabling writes: {e}")
+            self._writable = False
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least-recently-used rows until the stored text fits in max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM completions ORDER BY last_used"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM completions WHERE key = ?", doomed)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        try:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+        return {
+            "path": self.path,
+            "writable": self._writable,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def completion_cache_from_env() -> Optional[CompletionCache]:
+    """Cache at LLM_COMPLETION_CACHE_PATH, or None when not configured"""
+    path = os.getenv('LLM_COMPLETION_CACHE_PATH')
+    if not path:
+        return None
+    try:
+        return CompletionCache(
+            path,
+            max_bytes=int(float(os.getenv('LLM_COMPLETION_CACHE_MAX_MB', 64)) * 1024 * 1024)
+        )
+    except (sqlite3.Error, OSError) as e:
+        print(f"   ⚠️ Completion cache unavailable: {e}")
+        return None
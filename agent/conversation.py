@@ -0,0 +1,186 @@
+"""
+Bounded multi-turn conversation memory
+
+Each session keeps its last few exchanges verbatim and folds older ones
+into a running summary, one small LLM call per evicted batch. The prompt
+is then system + summary + recent turns + the new question, so its size
+(and latency) stays flat however long the conversation gets. Sessions live
+in an LRU store with a TTL, so memory is capped per session and overall.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a founder and Lenny "
+    "Rachitsky. Keep the founder's situation (stage, metrics, goals), the questions "
+    "asked and the advice already given. Be terse. Return only the updated summary."
+)
+
+
+class ConversationMemory:
+    def __init__(
+        self,
+        max_turns: int = 4,
+        max_turn_chars: int = 2000,
+        summary_max_tokens: int = 200,
+        compact_every: int = 2
+    ):
+        self.max_turns = max_turns
+        self.max_turn_chars = max_turn_chars
+        self.summary_max_tokens = summary_max_tokens
+        self.compact_every = compact_every
+
+        self.turns: deque = deque()
+        self.summary = ""
+        # Turns evicted from `turns` but not yet folded into `summary`;
+        # still sent verbatim so nothing is lost while compaction runs
+        self._pending: List[Tuple[str, str]] = []
+        self._compacting = False
+        self._lock = threading.Lock()
+
+        self.compactions = 0
+        self.dropped_turns = 0
+        self.last_used = time.time()
+
+    def add_turn(self, question: str, answer: str):
+        with self._lock:
+            self.turns.append((question[:self.max_turn_chars], answer[:self.max_turn_chars]))
+            while len(self.turns) > self.max_turns:
+                self._pending.append(self.turns.popleft())
+            # Compaction keeps failing: drop the oldest rather than grow
+            overflow = len(self._pending) - (self.max_turns + self.compact_every)
+            if overflow > 0 and not self._compacting:
+                del self._pending[:overflow]
+                self.dropped_turns += overflow
+            self.last_used = time.time()
+
+    @property
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not (self.turns or self._pending or self.summary)
+
+    def needs_compaction(self) -> bool:
+        with self._lock:
+            return not self._compacting and len(self._pending) >= self.compact_every
+
+    def compact(self, llm, model: Optional[str] = None):
+        """Fold pending turns into the summary with one LLM call (previous summary + new turns only)"""
+        with self._lock:
+            if self._compacting or not self._pending:
+                return
+            self._compacting = True
+            batch = list(self._pending)
+            summary = self.summary
+
+        try:
+            exchanges = "\n\n".join(f"Founder: {q}\nLenny: {a}" for q, a in batch)
+            prompt = (
+                f"Current summary:\n{summary or '(empty)'}\n\n"
+                f"New exchanges:\n{exchanges}\n\n"
+                f"Updated summary (max {self.summary_max_tokens} tokens):"
+            )
+            updated = llm.chat(
+                [
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+                max_tokens=self.summary_max_tokens,
+                stream=False,
+                model=model
+            )
+            with self._lock:
+                self.summary = updated.strip()
+                del self._pending[:len(batch)]
+                self.compactions += 1
+        except Exception as e:
+            print(f"   ⚠️ Conversation compaction failed, keeping recent turns verbatim: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def messages(self, system_prompt: str, user_content: str) -> List[Dict[str, str]]:
+        """Chat messages: system (+ summary), pending and recent turns, then the new user message"""
+        with self._lock:
+            self.last_used = time.time()
+            if self.summary:
+                system_prompt = f"{system_prompt}\n\nEarlier in this conversation:\n{self.summary}"
+            messages = [{"role": "system", "content": system_prompt}]
+            for question, answer in self._pending + list(self.turns):
+                messages.append({"role": "user", "content": question})
+                messages.append({"role": "assistant", "content": answer})
+        messages.append({"role": "user", "content": user_content})
+        return messages
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "turns": len(self.turns),
+                "pending": len(self._pending),
+                "summary_chars": len(self.summary),
+                "compactions": self.compactions,
+                "dropped_turns": self.dropped_turns,
+            }
+
+
+class ConversationStore:
+    """Session id -> ConversationMemory, LRU-bounded with an idle TTL"""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600, **memory_options):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.memory_options = memory_options
+
+        self._sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str) -> ConversationMemory:
+        """The session's memory, created on first use"""
+        now = time.time()
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is not None and self.ttl_seconds and now - memory.last_used > self.ttl_seconds:
+                del self._sessions[session_id]
+                self.expirations += 1
+                memory = None
+
+            if memory is None:
+                memory = ConversationMemory(**self.memory_options)
+                self._sessions[session_id] = memory
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            return memory
+
+    def reset(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def conversation_store_from_env() -> ConversationStore:
+    return ConversationStore(
+        max_sessions=int(os.getenv('CONVERSATION_MAX_SESSIONS', 1000)),
+        ttl_seconds=float(os.getenv('CONVERSATION_TTL', 3600)),
+        max_turns=int(os.getenv('CONVERSATION_MAX_TURNS', 4)),
+        max_turn_chars=int(os.getenv('CONVERSATION_MAX_TURN_CHARS', 2000)),
+        summary_max_tokens=int(os.getenv('CONVERSATION_SUMMARY_TOKENS', 200)),
+        compact_every=int(os.getenv('CONVERSATION_COMPACT_EVERY', 2)),
+    )
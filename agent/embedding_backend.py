@@ -0,0 +1,121 @@
+"""
+Selectable CPU inference backends for the embedding model
+
+EMBEDDING_BACKEND:
+    torch      - plain PyTorch SentenceTransformer (default)
+    onnx       - ONNX Runtime export (sentence-transformers>=3.2, optimum[onnxruntime])
+    onnx-int8  - a pre-quantized ONNX file from the model repo (EMBEDDING_ONNX_FILE)
+    int8       - PyTorch with dynamic int8 quantization of every nn.Linear
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8", "int8")
+
+# Short, varied queries in the style of real traffic, used for parity checks
+PARITY_SENTENCES = [
+    "What is product-market fit?",
+    "How do I know if I have PMF?",
+    "What are good retention benchmarks for B2B SMB?",
+    "How should I hire my first PM?",
+    "What is a North Star Metric?",
+    "How do I increase conversion rates?",
+    "Sean Ellis test 40% very disappointed",
+    "How do I reduce churn in a consumer subscription app?",
+]
+
+
+def get_embedding_backend() -> str:
+    backend = os.getenv('EMBEDDING_BACKEND', 'torch').lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}', expected one of {EMBEDDING_BACKENDS}")
+    return backend
+
+
+def embedding_cache_namespace(model_name: str, backend: str) -> str:
+    """Cache identity: vectors from different backends are not interchangeable"""
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def load_embedding_model(
+    model_name: str,
+    backend: Optional[str] = None,
+    device: str = 'cpu'
+) -> SentenceTransformer:
+    """Load `model_name` with the requested (or configured) backend"""
+    backend = backend or get_embedding_backend()
+
+    if backend == "torch":
+        return SentenceTransformer(model_name, device=device)
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device=device, backend="onnx")
+
+    if backend == "onnx-int8":
+        file_name = os.getenv('EMBEDDING_ONNX_FILE', 'onnx/model_qint8_avx512_vnni.onnx')
+        return SentenceTransformer(
+            model_name,
+            device=device,
+            backend="onnx",
+            model_kwargs={"file_name": file_name},
+        )
+
+    if backend == "int8":
+        import torch
+
+        model = SentenceTransformer(model_name, device='cpu')
+        torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        return model
+
+    raise ValueError(f"Unknown embedding backend '{backend}'")
+
+
+def check_parity(
+    model: SentenceTransformer,
+    reference: SentenceTransformer,
+    sentences: List[str] = PARITY_SENTENCES,
+    threshold: float = 0.99
+) -> Dict:
+    """Cosine similarity between a backend's vectors and the PyTorch reference"""
+    candidate = model.encode(sentences, convert_to_numpy=True, show_progress_bar=False)
+    expected = reference.encode(sentences, convert_to_numpy=True, show_progress_bar=False)
+
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    expected = expected / np.linalg.norm(expected, axis=1, keepdims=True)
+    cosines = (candidate * expected).sum(axis=1)
+
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "threshold": threshold,
+        "passed": bool(cosines.min() >= threshold),
+    }
+
+
+def load_checked_embedding_model(model_name: str, backend: Optional[str] = None, device: str = 'cpu'):
+    """
+    Load with the configured backend. With EMBEDDING_PARITY_CHECK=1 a
+    non-torch backend is compared against PyTorch first and replaced by it
+    if any parity sentence falls below EMBEDDING_PARITY_THRESHOLD.
+
+    Returns (model, backend actually in use).
+    """
+    backend = backend or get_embedding_backend()
+    model = load_embedding_model(model_name, backend, device)
+
+    if backend != "torch" and os.getenv('EMBEDDING_PARITY_CHECK', '0') == '1':
+        threshold = float(os.getenv('EMBEDDING_PARITY_THRESHOLD', 0.99))
+        reference = load_embedding_model(model_name, "torch", device)
+        parity = check_parity(model, reference, threshold=threshold)
+        print(f"   🔬 {backend} parity vs torch: min cosine {parity['min_cosine']:.4f}")
+        if not parity["passed"]:
+            print(f"   ⚠️ {backend} below parity threshold {threshold}, falling back to torch")
+            return reference, "torch"
+
+    return model, backend
@@ -0,0 +1,285 @@
+"""
+Query embedding caches: a bounded in-memory LRU/TTL cache and an optional
+SQLite-backed cache that survives restarts
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used for cache keys"""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class EmbeddingCache:
+    """
+    LRU cache of float32 query vectors with an entry cap, a byte budget and
+    an optional TTL. One instance is shared by every retriever in the
+    process (see `get_embedding_cache`), so all access goes through a lock.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(model_name: str, query: str) -> str:
+        """Cache key for a query under a given embedding model"""
+        return hashlib.md5(f"{model_name}\x00{normalize_query(query)}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            vector, stored_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector) -> np.ndarray:
+        """Store a vector (as read-only float32) and return the stored copy"""
+        vector = np.ascontiguousarray(vector, dtype=np.float32)
+        vector.setflags(write=False)
+
+        # A single vector over the whole budget would just evict everything
+        if vector.nbytes > self.max_bytes:
+            return vector
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (vector, time.monotonic())
+            self._bytes += vector.nbytes
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+        return vector
+
+    def _remove(self, key: str):
+        vector, _ = self._entries.pop(key)
+        self._bytes -= vector.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Counters for sizing the cache from production traffic"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_shared_cache: Optional[EmbeddingCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache, configured from the environment"""
+    global _shared_cache
+
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            ttl = float(os.getenv('EMBEDDING_CACHE_TTL', 0))
+            _shared_cache = EmbeddingCache(
+                max_entries=int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 10000)),
+                max_bytes=int(float(os.getenv('EMBEDDING_CACHE_MAX_MB', 64)) * 1024 * 1024),
+                ttl_seconds=ttl if ttl > 0 else None,
+            )
+        return _shared_cache
+
+
+class PersistentEmbeddingCache:
+    """
+    On-disk query embedding cache shared by every process pointed at the
+    same SQLite file.
+
+    Rows are keyed by model name plus normalized query text and lookups
+    filter on the model column, so processes with different models or
+    backends (torch next to ONNX int8) share one file without wiping each
+    other's rows. WAL mode lets many readers run alongside one writer, and
+    each thread (and each forked process) gets its own connection. Write
+    failures, e.g. on a read-only filesystem, only disable writes - lookups
+    keep working.
+    """
+
+    def __init__(self, path: str, model_name: str, max_entries: int = 100000):
+        self.path = path
+        self.model_name = model_name
+        self.max_entries = max_entries
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writable = True
+        self._puts = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " key TEXT PRIMARY KEY, model TEXT NOT NULL,"
+                    " vector BLOB NOT NULL, created REAL NOT NULL)"
+                )
+        except sqlite3.OperationalError as e:
+            # Read-only deployments can still serve whatever is in the file
+            print(f"   ⚠️ Embedding disk cache is read-only: {e}")
+            self._writable = False
+
+    def _key(self, query: str) -> str:
+        return hashlib.sha1(f"{self.model_name}\x00{normalize_query(query)}".encode()).hexdigest()
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        try:
+            row = self._connect().execute(
+                "SELECT vector FROM embeddings WHERE key = ? AND model = ?",
+                (self._key(query), self.model_name)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, query: str, vector):
+        if not self._writable:
+            return
+
+        blob = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector, created) VALUES (?, ?, ?, ?)",
+                    (self._key(query), self.model_name, blob, time.time())
+                )
+
+            # Trim the oldest rows now and then rather than on every write
+            with self._lock:
+                self._puts += 1
+                trim = self._puts % 100 == 0
+            if trim:
+                with conn:
+                    conn.execute(
+                        "DELETE FROM embeddings WHERE key IN ("
+                        " SELECT key FROM embeddings ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,)
+                    )
+        except sqlite3.Error as e:
+            print(f"   ⚠️ Embedding disk cache write failed, disabling writes: {e}")
+            self._writable = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "path": self.path,
+            "model": self.model_name,
+            "writable": self._writable,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+_persistent_caches: Dict[tuple, PersistentEmbeddingCache] = {}
+
+
+def get_persistent_embedding_cache(model_name: str) -> Optional[PersistentEmbeddingCache]:
+    """Disk cache at EMBEDDING_DISK_CACHE_PATH, or None when not configured"""
+    path = os.getenv('EMBEDDING_DISK_CACHE_PATH')
+    if not path:
+        return None
+
+    with _shared_cache_lock:
+        key = (os.path.abspath(path), model_name)
+        if key not in _persistent_caches:
+            try:
+                _persistent_caches[key] = PersistentEmbeddingCache(
+                    path,
+                    model_name,
+                    max_entries=int(os.getenv('EMBEDDING_DISK_CACHE_MAX_ENTRIES', 100000)),
+                )
+            except (sqlite3.Error, OSError) as e:
+                print(f"   ⚠️ Embedding disk cache unavailable: {e}")
+                return None
+        return _persistent_caches[key]
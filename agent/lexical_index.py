@@ -0,0 +1,143 @@
+"""
+Compact inverted BM25 index over chunk texts
+
+Built at ingestion time (ingestion/load_chroma.py) and stored next to the
+collection as bm25_index.json. Catches exact jargon ("PMF", "NRR", "Sean
+Ellis test") that small embedding models blur, without a model forward pass.
+"""
+
+import re
+import json
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+STOPWORDS = {
+    "a", "about", "an", "and", "are", "as", "at", "be", "by", "can", "do",
+    "does", "for", "from", "how", "i", "if", "in", "is", "it", "its", "me",
+    "my", "of", "on", "or", "should", "so", "that", "the", "their", "there",
+    "this", "to", "was", "we", "what", "when", "where", "which", "who",
+    "why", "will", "with", "you", "your",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric terms, stopwords dropped, naive plural folding"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "is", "us")):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    def __init__(
+        self,
+        doc_ids: List[str],
+        doc_sources: List[str],
+        doc_lengths: List[int],
+        postings: Dict[str, List[List[int]]],
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        self.doc_ids = doc_ids
+        self.doc_sources = doc_sources
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+
+        n_docs = len(doc_ids)
+        self.avg_length = sum(doc_lengths) / n_docs if n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in postings.items()
+        }
+        # Weight of a term no chunk contains (df = 0)
+        self.unseen_idf = math.log(1 + (n_docs + 0.5) / 0.5)
+
+    @classmethod
+    def build(cls, ids: List[str], texts: List[str], sources: List[str], k1: float = 1.5, b: float = 0.75):
+        postings = defaultdict(list)
+        lengths = []
+        for doc, text in enumerate(texts):
+            terms = tokenize(text)
+            lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings[term].append([doc, tf])
+        return cls(list(ids), list(sources), lengths, dict(postings), k1=k1, b=b)
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "doc_ids": self.doc_ids,
+                "doc_sources": self.doc_sources,
+                "doc_lengths": self.doc_lengths,
+                "postings": self.postings,
+            }, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(
+            data["doc_ids"],
+            data["doc_sources"],
+            data["doc_lengths"],
+            data["postings"],
+            k1=data.get("k1", 1.5),
+            b=data.get("b", 0.75),
+        )
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(self, query: str, top_k: int = 5, source_filter: Optional[str] = None) -> List[Dict]:
+        """
+        Top BM25 hits. Each hit carries `coverage`: the share of the query's
+        IDF mass that the chunk matched (1.0 = every query term present).
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        terms = [t for t in query_terms if t in self.idf]
+        # Unseen terms count against coverage: the index can't answer them
+        query_idf = sum(self.idf.get(t, self.unseen_idf) for t in query_terms)
+        if not terms or query_idf <= 0:
+            return []
+
+        scores = defaultdict(float)
+        matched_idf = defaultdict(float)
+        for term in terms:
+            idf = self.idf[term]
+            for doc, tf in self.postings[term]:
+                if source_filter and self.doc_sources[doc] != source_filter:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / self.avg_length)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+                matched_idf[doc] += idf
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [
+            {
+                "id": self.doc_ids[doc],
+                "source": self.doc_sources[doc],
+                "bm25": score,
+                "coverage": matched_idf[doc] / query_idf,
+            }
+            for doc, score in ranked
+        ]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> Dict[str, float]:
+    """RRF score per id across several ranked id lists"""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] += 1.0 / (k + rank + 1)
+    return dict(fused)
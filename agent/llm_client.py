@@ -4,32 +4,205 @@ Handles streaming and non-streaming completions
 """
 
 import os
-from typing import Iterator, Optional, Dict, List
+import time
+import asyncio
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import AsyncIterator, Iterator, Optional, Dict, List
+import httpx
+import openai
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from agent.cassette import cassette_from_env
+from agent.completion_cache import completion_cache_from_env
+from agent.llm_metrics import (
+    AsyncInstrumentedStream,
+    InstrumentedStream,
+    StreamStats,
+    get_stream_metrics,
+)
+from agent.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    backoff_delay,
+    is_retryable,
+    retry_after_seconds,
+)
 
 load_dotenv()
 
 
-class NvidiaLlamaClient:
-    def __init__(self):
+def llm_timeout_from_env() -> httpx.Timeout:
+    """LLM_CONNECT_TIMEOUT / LLM_READ_TIMEOUT (seconds); read applies between chunks"""
+    return httpx.Timeout(
+        float(os.getenv('LLM_READ_TIMEOUT', 60)),
+        connect=float(os.getenv('LLM_CONNECT_TIMEOUT', 5))
+    )
+
+
+def _close_response(future):
+    """Release a hedged request's connection once it loses the race"""
+    if future.exception() is None and hasattr(future.result(), 'close'):
+        future.result().close()
+
+
+class _NimClientBase:
+    """
+    Configuration, failure-handling state and caches of a NIM client.
+    With `shared_with`, the breaker, latency window, counters, completion
+    cache and cassette are another client's, so the sync and async clients
+    see one endpoint health and one set of numbers.
+    """
+
+    def __init__(self, shared_with: Optional["_NimClientBase"] = None):
         self.api_key = os.getenv('NVIDIA_API_KEY')
         self.base_url = os.getenv('NVIDIA_BASE_URL')
         
+        # Record/replay of LLM calls (LLM_CASSETTE_MODE); replay needs no endpoint
+        self.cassette = shared_with.cassette if shared_with else cassette_from_env()
+        
         if not self.api_key or self.api_key == 'PLACEHOLDER':
-            raise ValueError("NVIDIA_API_KEY not set in .env file")
+            if self.cassette is None or not self.cassette.replaying:
+                raise ValueError("NVIDIA_API_KEY not set in .env file")
+            self.api_key = "cassette-replay"
+        
+        # Failure handling (retries are ours, so the SDK's own are disabled)
+        self.max_retries = int(os.getenv('LLM_MAX_RETRIES', 2))
+        self.backoff_base = float(os.getenv('LLM_BACKOFF_BASE', 0.5))
+        self.backoff_max = float(os.getenv('LLM_BACKOFF_MAX', 8.0))
+        self.hedge_enabled = os.getenv('LLM_HEDGE_ENABLED', '0') == '1'
+        self.hedge_percentile = float(os.getenv('LLM_HEDGE_PERCENTILE', 95))
+        self.hedge_min_delay = float(os.getenv('LLM_HEDGE_MIN_DELAY_MS', 250)) / 1000
+        self.hedge_min_samples = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', 20))
+        
+        if shared_with is not None:
+            self.breaker = shared_with.breaker
+            self.latency = shared_with.latency
+            self.counters = shared_with.counters
+            self._counter_lock = shared_with._counter_lock
+            self.completion_cache = shared_with.completion_cache
+        else:
+            self.breaker = CircuitBreaker(
+                failure_threshold=int(os.getenv('LLM_BREAKER_THRESHOLD', 5)),
+                reset_timeout=float(os.getenv('LLM_BREAKER_RESET_S', 30))
+            )
+            self.latency = LatencyTracker()
+            self.counters = {
+                "requests": 0,
+                "attempts": 0,
+                "retries": 0,
+                "timeouts": 0,
+                "failures": 0,
+                "hedges_fired": 0,
+                "hedge_wins": 0,
+                "circuit_rejections": 0,
+                "cache_hits": 0,
+                "cache_misses": 0,
+            }
+            self._counter_lock = threading.Lock()
+            # Opt-in on-disk cache for low-temperature calls (judge, refinement)
+            self.completion_cache = completion_cache_from_env()
+        self.cache_max_temperature = float(os.getenv('LLM_COMPLETION_CACHE_MAX_TEMPERATURE', 0.3))
+        
+        # Ask for token usage on the final stream chunk (turned off if the endpoint rejects it)
+        self.stream_usage = os.getenv('LLM_STREAM_USAGE', '1') == '1'
+        
+        # Default model - adjust if your NIM uses different model name
+        self.model = shared_with.model if shared_with else "meta/llama-3.1-70b-instruct"
+    
+    @staticmethod
+    def _messages(prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        messages = []
+        
+        if system_prompt:
+            messages.append({
+                "role": "system",
+                "content": system_prompt
+            })
+        
+        messages.append({
+            "role": "user",
+            "content": prompt
+        })
+        return messages
+    
+    def _cache_key(self, messages, temperature: float, max_tokens: int, model: str) -> Optional[str]:
+        """Completion-cache key, or None when this call isn't cacheable"""
+        if self.completion_cache is None or temperature > self.cache_max_temperature:
+            return None
+        return self.completion_cache.make_key(model, messages, temperature, max_tokens)
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Book-keeping for a failed attempt: seconds to wait before retrying,
+        or None to give up (the caller re-raises)
+        """
+        if isinstance(error, openai.APITimeoutError):
+            self._count("timeouts")
+        retryable = is_retryable(error)
+        # Every outcome must resolve a half-open trial, or the breaker never closes
+        if retryable:
+            self.breaker.record_failure()
+        elif isinstance(error, openai.APIStatusError):
+            # The endpoint answered (e.g. a 400): it is up, the request was bad
+            self.breaker.record_success()
+        else:
+            self.breaker.release_trial()
+        if not retryable or attempt >= self.max_retries:
+            self._count("failures")
+            print(f"❌ NVIDIA NIM API error: {error}")
+            return None
+        
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+        delay = max(delay, retry_after_seconds(error) or 0.0)
+        print(f"   ⚠️ NIM call failed ({type(error).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        self._count("retries")
+        return delay
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """p95 of recent latencies; no hedging until there are enough samples"""
+        if len(self.latency) < self.hedge_min_samples:
+            return None
+        return max(self.latency.percentile(self.hedge_percentile), self.hedge_min_delay)
+    
+    def _count(self, name: str, n: int = 1):
+        with self._counter_lock:
+            self.counters[name] += n
+    
+    def stats(self) -> Dict:
+        """Counters plus breaker state and current latency percentiles"""
+        with self._counter_lock:
+            stats = dict(self.counters)
+        stats.update({
+            "circuit_state": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "latency_p50_s": self.latency.percentile(50),
+            "latency_p95_s": self.latency.percentile(95),
+            "hedge_delay_s": self._hedge_delay() if self.hedge_enabled else None,
+        })
+        stats["streams"] = get_stream_metrics().summary()
+        if self.completion_cache is not None:
+            stats["completion_cache"] = self.completion_cache.stats()
+        return stats
+
+
+class NvidiaLlamaClient(_NimClientBase):
+    def __init__(self):
+        super().__init__()
+        self._hedge_pool = None
         
         # NVIDIA NIM uses OpenAI-compatible API
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url=self.base_url
+            base_url=self.base_url,
+            timeout=llm_timeout_from_env(),
+            max_retries=0
         )
         
-        # Default model - adjust if your NIM uses different model name
-        self.model = "meta/llama-3.1-70b-instruct"
-        
         print(f"✅ NVIDIA NIM client initialized")
-        print(f"   Base URL: {self.base_url}")
+        print(f"   Base URL: {self.base_url}" + (f" (cassette: {self.cassette.mode})" if self.cassette else ""))
         print(f"   Model: {self.model}")
     
     def generate(
@@ -38,7 +211,8 @@ class NvidiaLlamaClient:
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1000,
-        stream: bool = False
+        stream: bool = False,
+        model: Optional[str] = None
     ) -> str | Iterator[str]:
         """
         Generate completion from NVIDIA NIM
@@ -49,61 +223,26 @@ class NvidiaLlamaClient:
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             stream: Whether to stream the response
+            model: Override the default model for this call
         
         Returns:
             Complete response string or iterator of chunks
         """
         
-        messages = []
-        
-        if system_prompt:
-            messages.append({
-                "role": "system",
-                "content": system_prompt
-            })
-        
-        messages.append({
-            "role": "user",
-            "content": prompt
-        })
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=stream
-            )
-            
-            if stream:
-                return self._stream_response(response)
-            else:
-                return response.choices[0].message.content
-        
-        except Exception as e:
-            print(f"❌ NVIDIA NIM API error: {e}")
-            raise
-    
-    # def _stream_response(self, response) -> Iterator[str]:
-    #     """Stream response chunks"""
-    #     for chunk in response:
-    #         if chunk.choices[0].delta.content:
-    #             yield chunk.choices[0].delta.content
-    def _stream_response(self, response) -> Iterator[str]:
-        """Stream response chunks"""
-        for chunk in response:
-            if chunk.choices and len(chunk.choices) > 0:
-                delta = chunk.choices[0].delta
-                if hasattr(delta, 'content') and delta.content:
-                    yield delta.content
+        messages = self._messages(prompt, system_prompt)
+        return self._complete(messages, temperature, max_tokens, stream, model or self.model)
+    
+    def _stream_response(self, response, start: float, model: str) -> InstrumentedStream:
+        """Stream response chunks; timings in the returned stream's `.stats`"""
+        return InstrumentedStream(response, StreamStats(model, start))
     
     def chat(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
         max_tokens: int = 1000,
-        stream: bool = False
+        stream: bool = False,
+        model: Optional[str] = None
     ) -> str | Iterator[str]:
         """
         Chat completion with message history
@@ -113,28 +252,176 @@ class NvidiaLlamaClient:
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             stream: Whether to stream the response
+            model: Override the default model for this call
         
         Returns:
             Complete response string or iterator of chunks
         """
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=stream
-            )
+        return self._complete(messages, temperature, max_tokens, stream, model or self.model)
+    
+    def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        model: str
+    ) -> str | Iterator[str]:
+        """Shared path for generate/chat: completion cache in front of the API call"""
+        self._count("requests")
+        
+        key = self._cache_key(messages, temperature, max_tokens, model)
+        if key is None:
+            return self._call(messages, temperature, max_tokens, stream, model)
+        
+        cached = self.completion_cache.get(key)
+        if cached is not None:
+            self._count("cache_hits")
+            if stream:
+                return InstrumentedStream(cached, StreamStats(model, cached=True), raw=False)
+            return "".join(cached)
+        
+        self._count("cache_misses")
+        response = self._call(messages, temperature, max_tokens, stream, model)
+        if stream:
+            # Cached only if the stream runs to completion
+            response.on_complete.append(lambda parts: self.completion_cache.put(key, parts))
+            return response
+        
+        self.completion_cache.put(key, [response])
+        return response
+    
+    def _call(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        model: str
+    ) -> str | Iterator[str]:
+        """One logical API call: breaker, retries with backoff, hedging"""
+        if self.cassette is not None and self.cassette.replaying:
+            return self._replay(messages, temperature, max_tokens, stream, model)
+        
+        request_start = time.perf_counter()
+        
+        def create():
+            kwargs = {}
+            if stream and self.stream_usage:
+                kwargs["stream_options"] = {"include_usage": True}
+            try:
+                return self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=stream,
+                    **kwargs
+                )
+            except openai.BadRequestError:
+                if not kwargs:
+                    raise
+                print("   ⚠️ Endpoint rejected stream_options, streaming without usage")
+                self.stream_usage = False
+                return create()
+        
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("circuit_rejections")
+                raise CircuitOpenError("NVIDIA NIM circuit open, failing fast")
+            
+            self._count("attempts")
+            start = time.perf_counter()
+            try:
+                # For streams this returns once the response starts, so retries
+                # and hedges never replay tokens the caller has already seen
+                response = self._create_hedged(create) if self.hedge_enabled else create()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            
+            self.breaker.record_success()
+            self.latency.record(time.perf_counter() - start)
             
             if stream:
-                return self._stream_response(response)
-            else:
-                return response.choices[0].message.content
+                response = self._stream_response(response, request_start, model)
+                if self.cassette is not None:
+                    response.on_complete.append(
+                        lambda parts: self.cassette.record_stream(
+                            model, messages, temperature, max_tokens, parts, response.stats
+                        )
+                    )
+                return response
+            
+            content = response.choices[0].message.content
+            if self.cassette is not None:
+                self.cassette.record(
+                    model, messages, temperature, max_tokens,
+                    [content], [time.perf_counter() - request_start]
+                )
+            return content
+    
+    def _replay(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        model: str
+    ) -> str | Iterator[str]:
+        """Serve a recorded response from the cassette"""
+        entry = self.cassette.lookup(model, messages, temperature, max_tokens)
+        if not stream:
+            return self.cassette.replay_text(entry)
+        return InstrumentedStream(
+            self.cassette.replay_chunks(entry),
+            StreamStats(model, cached=True),
+            raw=False
+        )
+    
+    def _create_hedged(self, create):
+        """
+        Fire `create`; if it hasn't answered within the hedge delay, fire a
+        duplicate and keep whichever responds first. The loser is closed
+        when it finishes (a thread can't be cancelled mid-request).
+        """
+        delay = self._hedge_delay()
+        if delay is None:
+            return create()
+        
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(
+                max_workers=int(os.getenv('LLM_HEDGE_WORKERS', 16)),
+                thread_name_prefix="nim-hedge"
+            )
+        
+        primary = self._hedge_pool.submit(create)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
         
-        except Exception as e:
-            print(f"❌ NVIDIA NIM API error: {e}")
-            raise
+        self._count("hedges_fired")
+        hedge = self._hedge_pool.submit(create)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    for loser in pending:
+                        loser.add_done_callback(_close_response)
+                    return future.result()
+                error = future.exception()
+        raise error
+    
     # In agent/llm_client.py, add this method:
 
     def refine_with_style(self, draft_response: str, style_prompt: str) -> str:
@@ -160,6 +447,235 @@ class NvidiaLlamaClient:
         )
 
 
+class AsyncNvidiaLlamaClient(_NimClientBase):
+    """
+    AsyncOpenAI twin of NvidiaLlamaClient: same completion cache, cassette,
+    breaker, retries and hedging. An in-flight stream holds a coroutine,
+    not a thread, so one event loop can serve hundreds of them. Pass the
+    sync client as `shared_with` to share its breaker, counters and caches.
+    """
+
+    def __init__(self, shared_with: Optional[NvidiaLlamaClient] = None):
+        super().__init__(shared_with)
+        
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=llm_timeout_from_env(),
+            max_retries=0
+        )
+        
+        print(f"✅ NVIDIA NIM async client initialized")
+    
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        stream: bool = False,
+        model: Optional[str] = None
+    ) -> str | AsyncIterator[str]:
+        """
+        Async completion. With stream=True, returns an async iterator of
+        chunks (`async for chunk in await client.generate(..., stream=True)`).
+        """
+        messages = self._messages(prompt, system_prompt)
+        return await self._complete(messages, temperature, max_tokens, stream, model or self.model)
+    
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        stream: bool = False,
+        model: Optional[str] = None
+    ) -> str | AsyncIterator[str]:
+        """Async chat completion with message history"""
+        return await self._complete(messages, temperature, max_tokens, stream, model or self.model)
+    
+    async def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        model: str
+    ) -> str | AsyncIterator[str]:
+        """Completion cache in front of the API call (SQLite runs off the event loop)"""
+        self._count("requests")
+        
+        key = self._cache_key(messages, temperature, max_tokens, model)
+        if key is None:
+            return await self._call(messages, temperature, max_tokens, stream, model)
+        
+        cached = await asyncio.to_thread(self.completion_cache.get, key)
+        if cached is not None:
+            self._count("cache_hits")
+            if stream:
+                return AsyncInstrumentedStream(cached, StreamStats(model, cached=True), raw=False)
+            return "".join(cached)
+        
+        self._count("cache_misses")
+        response = await self._call(messages, temperature, max_tokens, stream, model)
+        if stream:
+            # Cached only if the stream runs to completion
+            loop = asyncio.get_running_loop()
+            response.on_complete.append(
+                lambda parts: loop.run_in_executor(None, self.completion_cache.put, key, parts)
+            )
+            return response
+        
+        await asyncio.to_thread(self.completion_cache.put, key, [response])
+        return response
+    
+    async def _call(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        model: str
+    ) -> str | AsyncIterator[str]:
+        """One logical API call: breaker, retries with backoff, hedging"""
+        if self.cassette is not None and self.cassette.replaying:
+            return await self._replay(messages, temperature, max_tokens, stream, model)
+        
+        request_start = time.perf_counter()
+        
+        async def create():
+            kwargs = {}
+            if stream and self.stream_usage:
+                kwargs["stream_options"] = {"include_usage": True}
+            try:
+                return await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=stream,
+                    **kwargs
+                )
+            except openai.BadRequestError:
+                if not kwargs:
+                    raise
+                print("   ⚠️ Endpoint rejected stream_options, streaming without usage")
+                self.stream_usage = False
+                return await create()
+        
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("circuit_rejections")
+                raise CircuitOpenError("NVIDIA NIM circuit open, failing fast")
+            
+            self._count("attempts")
+            start = time.perf_counter()
+            try:
+                # For streams this returns once the response starts, so retries
+                # and hedges never replay tokens the caller has already seen
+                response = await (self._create_hedged(create) if self.hedge_enabled else create())
+            except asyncio.CancelledError:
+                # Caller went away mid-attempt: says nothing about the endpoint
+                self.breaker.release_trial()
+                raise
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            
+            self.breaker.record_success()
+            self.latency.record(time.perf_counter() - start)
+            
+            if stream:
+                response = AsyncInstrumentedStream(response, StreamStats(model, request_start))
+                if self.cassette is not None:
+                    response.on_complete.append(
+                        lambda parts: self.cassette.record_stream(
+                            model, messages, temperature, max_tokens, parts, response.stats
+                        )
+                    )
+                return response
+            
+            content = response.choices[0].message.content
+            if self.cassette is not None:
+                self.cassette.record(
+                    model, messages, temperature, max_tokens,
+                    [content], [time.perf_counter() - request_start]
+                )
+            return content
+    
+    async def _replay(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        model: str
+    ) -> str | AsyncIterator[str]:
+        """Serve a recorded response from the cassette"""
+        entry = self.cassette.lookup(model, messages, temperature, max_tokens)
+        if not stream:
+            return await self.cassette.areplay_text(entry)
+        return AsyncInstrumentedStream(
+            self.cassette.areplay_chunks(entry),
+            StreamStats(model, cached=True),
+            raw=False
+        )
+    
+    async def _create_hedged(self, create):
+        """
+        Fire `create`; if it hasn't answered within the hedge delay, fire a
+        duplicate and keep whichever responds first. Unlike threads, the
+        losing request is cancelled outright.
+        """
+        delay = self._hedge_delay()
+        if delay is None:
+            return await create()
+        
+        primary = asyncio.ensure_future(create())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            
+            self._count("hedges_fired")
+            hedge = asyncio.ensure_future(create())
+            tasks.append(hedge)
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in done if task.exception() is None]
+                if winners:
+                    if winners[0] is hedge:
+                        self._count("hedge_wins")
+                    # Both answered in the same tick: release the second connection
+                    for extra in winners[1:]:
+                        await _aclose_response(extra.result())
+                    return winners[0].result()
+                error = next(iter(done)).exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def close(self):
+        await self.client.close()
+
+
+async def _aclose_response(response):
+    close = getattr(response, 'close', None)
+    if close is not None:
+        result = close()
+        if asyncio.iscoroutine(result):
+            await result
+
 
 if __name__ == "__main__":
     # Test the client
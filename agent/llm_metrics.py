@@ -0,0 +1,268 @@
+"""
+Per-request streaming timings and a process-wide aggregator
+
+Every streamed completion is wrapped in an InstrumentedStream whose
+`.stats` records request start, time-to-first-token, inter-token gaps,
+token counts and tokens/sec. Finished streams are reported to
+`get_stream_metrics()`, which keeps a rolling window for percentile
+summaries. Tells NIM queueing (TTFT) apart from generation speed (tokens/s)
+and from our own retrieval (time before the request starts).
+"""
+
+import time
+import threading
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+class StreamStats:
+    def __init__(self, model: str = "", start: Optional[float] = None, cached: bool = False):
+        self.model = model
+        self.cached = cached
+        self.start = start if start is not None else time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.last_token_at: Optional[float] = None
+        self.end: Optional[float] = None
+        self.chunks = 0
+        self.gaps: List[float] = []
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.completed = False
+
+    def on_chunk(self):
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        else:
+            self.gaps.append(now - self.last_token_at)
+        self.last_token_at = now
+        self.chunks += 1
+
+    def on_usage(self, usage):
+        self.prompt_tokens = getattr(usage, 'prompt_tokens', None)
+        self.completion_tokens = getattr(usage, 'completion_tokens', None)
+
+    def finish(self, completed: bool = True):
+        self.end = time.perf_counter()
+        self.completed = completed
+
+    @property
+    def ttft_s(self) -> Optional[float]:
+        return None if self.first_token_at is None else self.first_token_at - self.start
+
+    @property
+    def duration_s(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    @property
+    def tokens(self) -> int:
+        """Server-reported completion tokens when available, else streamed chunks"""
+        return self.completion_tokens if self.completion_tokens is not None else self.chunks
+
+    @property
+    def tokens_per_s(self) -> Optional[float]:
+        """Generation speed after the first token (excludes queueing)"""
+        if self.first_token_at is None or self.last_token_at is None or self.tokens < 2:
+            return None
+        elapsed = self.last_token_at - self.first_token_at
+        return (self.tokens - 1) / elapsed if elapsed > 0 else None
+
+    def as_dict(self) -> Dict:
+        return {
+            "model": self.model,
+            "cached": self.cached,
+            "completed": self.completed,
+            "ttft_s": self.ttft_s,
+            "duration_s": self.duration_s,
+            "chunks": self.chunks,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_s": self.tokens_per_s,
+            "mean_gap_s": float(np.mean(self.gaps)) if self.gaps else None,
+            "max_gap_s": max(self.gaps) if self.gaps else None,
+        }
+
+
+class StreamMetrics:
+    """Rolling window of finished streams; summaries give p50/p95/p99"""
+
+    FIELDS = ("ttft_s", "duration_s", "tokens_per_s", "max_gap_s")
+
+    def __init__(self, window: int = 1000):
+        self._samples = {field: deque(maxlen=window) for field in self.FIELDS}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.incomplete = 0
+        self.tokens = 0
+
+    def record(self, stats: StreamStats):
+        # Cached replays would flatter the latency numbers
+        if stats.cached:
+            return
+        values = stats.as_dict()
+        with self._lock:
+            self.requests += 1
+            self.tokens += stats.tokens
+            if not stats.completed:
+                self.incomplete += 1
+            for field in self.FIELDS:
+                if values[field] is not None:
+                    self._samples[field].append(values[field])
+
+    def summary(self) -> Dict:
+        with self._lock:
+            summary = {
+                "requests": self.requests,
+                "incomplete": self.incomplete,
+                "tokens": self.tokens,
+            }
+            for field, samples in self._samples.items():
+                if samples:
+                    p50, p95, p99 = np.percentile(list(samples), [50, 95, 99])
+                    summary[field] = {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+                else:
+                    summary[field] = None
+        return summary
+
+
+_stream_metrics = StreamMetrics()
+
+
+def get_stream_metrics() -> StreamMetrics:
+    return _stream_metrics
+
+
+def _delta_text(chunk) -> Optional[str]:
+    if chunk.choices and len(chunk.choices) > 0:
+        delta = chunk.choices[0].delta
+        if hasattr(delta, 'content') and delta.content:
+            return delta.content
+    return None
+
+
+class InstrumentedStream:
+    """
+    Iterator of text chunks with timing in `.stats`. Wraps either a raw
+    OpenAI stream (`raw=True`) or an iterator of strings (cached replays).
+    `on_complete` callbacks get the full list of chunks once the stream is
+    exhausted; an abandoned or failed stream never calls them.
+    """
+
+    def __init__(self, source, stats: StreamStats, raw: bool = True, metrics: Optional[StreamMetrics] = None):
+        self.stats = stats
+        self.on_complete: List[Callable[[List[str]], None]] = []
+        self._source = iter(source)
+        self._raw = raw
+        self._metrics = metrics or _stream_metrics
+        self._parts: List[str] = []
+        self._done = False
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        while True:
+            try:
+                item = next(self._source)
+            except StopIteration:
+                self._finish(completed=True)
+                raise
+            except Exception:
+                self._finish(completed=False)
+                raise
+
+            text = item
+            if self._raw:
+                if getattr(item, 'usage', None):
+                    self.stats.on_usage(item.usage)
+                text = _delta_text(item)
+            if text:
+                self.stats.on_chunk()
+                self._parts.append(text)
+                return text
+
+    def close(self):
+        """Stop early (e.g. client disconnected); recorded as incomplete"""
+        if hasattr(self._source, 'close'):
+            self._source.close()
+        self._finish(completed=False)
+
+    def _finish(self, completed: bool):
+        if self._done:
+            return
+        self._done = True
+        self.stats.finish(completed)
+        self._metrics.record(self.stats)
+        if completed:
+            for callback in self.on_complete:
+                callback(self._parts)
+
+
+class AsyncInstrumentedStream:
+    """
+    Async twin of InstrumentedStream: wraps an AsyncOpenAI stream
+    (`raw=True`) or an iterable / async iterable of strings (replays)
+    """
+
+    def __init__(self, source, stats: StreamStats, raw: bool = True, metrics: Optional[StreamMetrics] = None):
+        self.stats = stats
+        self.on_complete: List[Callable[[List[str]], None]] = []
+        if not hasattr(source, '__aiter__'):
+            source = _aiter_strings(source)
+        self._response = source
+        self._source = source.__aiter__()
+        self._raw = raw
+        self._metrics = metrics or _stream_metrics
+        self._parts: List[str] = []
+        self._done = False
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self
+
+    async def __anext__(self) -> str:
+        while True:
+            try:
+                item = await self._source.__anext__()
+            except StopAsyncIteration:
+                self._finish(completed=True)
+                raise
+            except Exception:
+                self._finish(completed=False)
+                raise
+
+            text = item
+            if self._raw:
+                if getattr(item, 'usage', None):
+                    self.stats.on_usage(item.usage)
+                text = _delta_text(item)
+            if text:
+                self.stats.on_chunk()
+                self._parts.append(text)
+                return text
+
+    async def aclose(self):
+        """Stop early and release the connection; recorded as incomplete"""
+        for source in (self._source, self._response):
+            close = getattr(source, 'aclose', None) or getattr(source, 'close', None)
+            if close is not None:
+                result = close()
+                if hasattr(result, '__await__'):
+                    await result
+        self._finish(completed=False)
+
+    def _finish(self, completed: bool):
+        if self._done:
+            return
+        self._done = True
+        self.stats.finish(completed)
+        self._metrics.record(self.stats)
+        if completed:
+            for callback in self.on_complete:
+                callback(self._parts)
+
+
+async def _aiter_strings(chunks):
+    for chunk in chunks:
+        yield chunk
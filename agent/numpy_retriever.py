@@ -0,0 +1,230 @@
+"""
+Exact in-process retriever over a memory-mapped NumPy embedding matrix
+
+At <100k chunks a brute-force float32 matrix-vector product is cheaper than
+HNSW + SQLite metadata lookups, and recall is exact. Build the index with
+`ingestion/export_numpy_index.py`.
+"""
+
+import os
+import json
+import hashlib
+from typing import List, Dict, Optional, Tuple
+from dotenv import load_dotenv
+import numpy as np
+
+from agent.query_embedder import QueryEmbedder
+
+load_dotenv()
+
+
+def index_content_hash(vectors: np.ndarray, chunks_path: str) -> str:
+    """sha1 over the embedding matrix and chunks.json, read in blocks"""
+    digest = hashlib.sha1()
+    rows_per_block = max(1, (8 << 20) // max(vectors[:1].nbytes, 1))
+    for start in range(0, vectors.shape[0], rows_per_block):
+        digest.update(np.ascontiguousarray(vectors[start:start + rows_per_block]).tobytes())
+    with open(chunks_path, 'rb') as f:
+        for block in iter(lambda: f.read(8 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class NumpyRetriever:
+    def __init__(self, index_dir: Optional[str] = None):
+        self.index_dir = index_dir or os.getenv(
+            'NUMPY_INDEX_DIR',
+            os.path.join(os.path.dirname(__file__), "..", "numpy_index")
+        )
+        self.embedding_model_name = os.getenv(
+            'EMBEDDING_MODEL',
+            'sentence-transformers/all-MiniLM-L6-v2'
+        )
+
+        print(f"🔧 Initializing NumpyRetriever...")
+        print(f"   Index path: {self.index_dir}")
+
+        with open(os.path.join(self.index_dir, "manifest.json"), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('embedding_model') != self.embedding_model_name:
+            print(f"   ⚠️ Index was built with {self.manifest.get('embedding_model')}, "
+                  f"queries use {self.embedding_model_name}")
+
+        # Read-only mmap: pages are shared between processes via the page cache
+        self.vectors = np.load(os.path.join(self.index_dir, "vectors.npy"), mmap_mode='r')
+
+        with open(os.path.join(self.index_dir, "chunks.json"), 'r', encoding='utf-8') as f:
+            self.chunks = json.load(f)
+
+        self._index_version = None
+
+        self.source_ranges = {
+            source: tuple(rows) for source, rows in self.manifest['sources'].items()
+        }
+        print(f"   📊 Index has {self.vectors.shape[0]} chunks ({self.vectors.shape[1]} dims)")
+
+        # Initialize embedding model
+        model_load = os.getenv('EMBEDDING_MODEL_LOAD', 'eager')
+        print(f"📥 Loading embedding model: {self.embedding_model_name} ({model_load})")
+        self.embedder = QueryEmbedder(self.embedding_model_name, load=model_load)
+        if model_load == 'eager':
+            print(f"   ✅ Model loaded")
+
+    def index_version(self) -> str:
+        """
+        Version stamp of the loaded index: row count plus a hash of the
+        manifest and the data. Exports record a content hash in the
+        manifest; older ones get the matrix and chunks hashed once here.
+        """
+        if self._index_version is None:
+            digest = hashlib.sha1(json.dumps(self.manifest, sort_keys=True).encode())
+            if not self.manifest.get('content_hash'):
+                digest.update(index_content_hash(self.vectors, os.path.join(self.index_dir, "chunks.json")).encode())
+            self._index_version = f"{self.vectors.shape[0]}:{digest.hexdigest()[:12]}"
+        return self._index_version
+
+    @property
+    def embedding_model(self):
+        """The SentenceTransformer (blocks until a deferred load finishes)"""
+        return self.embedder.model
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Generate embedding for query with caching"""
+        return self.embedder.embed(query)
+
+    def embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed many queries, encoding all cache misses in one model call"""
+        return self.embedder.embed_many(queries)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        score_threshold: float = 0.3
+    ) -> List[Dict]:
+        """
+        Search for relevant chunks
+        """
+        query_vector = self.embed_query(query)
+        return self._search_rows(query_vector, 0, len(self.chunks), top_k, score_threshold)
+
+    def search_with_filters(
+        self,
+        query: str,
+        source_filter: str = None,
+        top_k: int = 5
+    ) -> List[Dict]:
+        """
+        Search with source filtering
+        """
+        query_vector = self.embed_query(query)
+        start, end = self._rows_for(source_filter)
+        return self._search_rows(query_vector, start, end, top_k)
+
+    def search_dual_stream(
+        self,
+        query: str,
+        sources: Tuple[str, ...] = ("linkedin", "youtube"),
+        top_k: int = 3
+    ) -> Dict[str, List[Dict]]:
+        """Top-k per source from a single embedding"""
+        query_vector = self.embed_query(query)
+        return {
+            source: self._search_rows(query_vector, *self._rows_for(source), top_k)
+            for source in sources
+        }
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        source_filter: str = None
+    ) -> List[List[Dict]]:
+        """One matrix multiply for many queries; results in input order"""
+        if not queries:
+            return []
+
+        start, end = self._rows_for(source_filter)
+        query_matrix = np.stack(self.embed_queries(queries))
+        similarities = self._normalize(query_matrix) @ self.vectors[start:end].T
+
+        return [
+            self._top_rows(row_similarities, start, top_k)
+            for row_similarities in similarities
+        ]
+
+    def _rows_for(self, source_filter: Optional[str]) -> Tuple[int, int]:
+        if not source_filter:
+            return 0, len(self.chunks)
+        # Unknown source -> empty slice, like a Chroma filter with no matches
+        return self.source_ranges.get(source_filter, (0, 0))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _search_rows(
+        self,
+        query_vector: np.ndarray,
+        start: int,
+        end: int,
+        top_k: int,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict]:
+        similarities = self.vectors[start:end] @ self._normalize(query_vector)
+        return self._top_rows(similarities, start, top_k, score_threshold)
+
+    def _top_rows(
+        self,
+        similarities: np.ndarray,
+        offset: int,
+        top_k: int,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict]:
+        k = min(top_k, len(similarities))
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+
+        formatted_results = []
+        for i in top:
+            # Same scoring as the Chroma path: cosine distance -> 1 / (1 + d)
+            distance = 1.0 - float(similarities[i])
+            similarity = 1 / (1 + distance)
+
+            if score_threshold is not None and similarity < score_threshold:
+                continue
+
+            chunk = self.chunks[offset + i]
+            formatted_results.append({
+                'id': chunk['id'],
+                'text': chunk['text'],
+                'source': chunk['source'],
+                'source_url': chunk.get('source_url', ''),
+                'score': similarity,
+                'metadata': chunk.get('metadata', {}),
+            })
+
+        return formatted_results
+
+
+if __name__ == "__main__":
+    # Test the retriever
+    retriever = NumpyRetriever()
+
+    print("\n🧪 Testing search...")
+
+    test_query = "What is product-market fit?"
+    results = retriever.search(test_query, top_k=3)
+
+    print(f"\nQuery: {test_query}")
+    print(f"Found {len(results)} results:\n")
+
+    for i, result in enumerate(results, 1):
+        print(f"{i}. Source: {result['source']} (score: {result['score']:.3f})")
+        print(f"   Text: {result['text'][:150]}...")
+        print(f"   URL: {result['source_url']}\n")
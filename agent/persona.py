@@ -2,9 +2,12 @@
 agent/persona.py - Conversational Spoken Style
 """
 
-from typing import List, Dict
+import os
+from typing import List, Dict, Optional
 import json
 
+from agent.token_counter import get_token_counter
+
 class LennyPersona:
     def __init__(self):
         self.name = "Lenny Rachitsky"
@@ -33,6 +36,14 @@ If you're below this, fix retention before spending on growth.""",
 
 And always do a work sample."""
         }
+        
+        # Prompt budgeting (tokens, counted with a local tokenizer)
+        self.prompt_token_budget = int(os.getenv('PROMPT_TOKEN_BUDGET', 600))
+        self.linkedin_share = float(os.getenv('PROMPT_LINKEDIN_SHARE', 0.5))
+        self.chunks_per_stream = int(os.getenv('PROMPT_CHUNKS_PER_STREAM', 2))
+        self.chunk_max_tokens = int(os.getenv('PROMPT_CHUNK_MAX_TOKENS', 60))
+        self.min_chunk_tokens = 15
+        self.tokens = get_token_counter()
     
     def get_system_prompt(self) -> str:
         return """You are Lenny responding to a reader's email.
@@ -46,9 +57,65 @@ Write like you're talking to a friend:
 - Just help them"""
     
     def get_enhanced_prompt(self, question: str, lenny_chunks: List[Dict], guest_chunks: List[Dict]) -> str:
+        return self.build_prompt(question, lenny_chunks, guest_chunks)["prompt"]
+    
+    def build_prompt(
+        self,
+        question: str,
+        lenny_chunks: List[Dict],
+        guest_chunks: List[Dict],
+        budget: Optional[int] = None
+    ) -> Dict:
+        """
+        Assemble the user prompt within a token budget (system prompt included).
+        
+        Priority: question and instructions always, then the framework blurb,
+        then LinkedIn and guest context sharing what is left (PROMPT_LINKEDIN_SHARE,
+        unused share rolls over). Chunks go in retrieval order, each capped at
+        PROMPT_CHUNK_MAX_TOKENS. Returns the prompt plus a token breakdown.
+        """
+        budget = budget or self.prompt_token_budget
         framework = self._detect_framework(question)
-        context = self._format_context(lenny_chunks, guest_chunks)
         
+        fixed = self.tokens.count(self.get_system_prompt()) + self.tokens.count(
+            self._render(question, "", "")
+        )
+        remaining = max(budget - fixed, 0)
+        
+        framework = self.tokens.truncate(framework, remaining)
+        framework_tokens = self.tokens.count(framework)
+        remaining -= framework_tokens
+        
+        # LinkedIn takes its share first (or everything, if the share can't
+        # hold a single chunk); whatever it doesn't use goes to guests
+        lenny_lines, lenny_tokens = self._fit_chunks(lenny_chunks, int(remaining * self.linkedin_share))
+        if not lenny_lines:
+            lenny_lines, lenny_tokens = self._fit_chunks(lenny_chunks[:1], remaining)
+        guest_lines, guest_tokens = self._fit_chunks(guest_chunks, remaining - lenny_tokens)
+
+        # Then hand what is still unused back to LinkedIn (more or less
+        # truncated chunks), and what LinkedIn leaves to guests again
+        lenny_lines, lenny_tokens = self._fit_chunks(lenny_chunks, remaining - guest_tokens)
+        guest_lines, guest_tokens = self._fit_chunks(guest_chunks, remaining - lenny_tokens)
+        
+        prompt = self._render(question, framework, self._format_context(lenny_lines, guest_lines))
+        total = self.tokens.count(self.get_system_prompt()) + self.tokens.count(prompt)
+        
+        return {
+            "prompt": prompt,
+            "tokens": {
+                "fixed": fixed,
+                "framework": framework_tokens,
+                "linkedin": lenny_tokens,
+                "guest": guest_tokens,
+                "total": total,
+            },
+            "budget": budget,
+            "chunks_used": {"linkedin": len(lenny_lines), "guest": len(guest_lines)},
+            "tokenizer": self.tokens.kind,
+        }
+    
+    def _render(self, question: str, framework: str, context: str) -> str:
         return f"""Question: {question}
 
 What you know:
@@ -57,6 +124,20 @@ What you know:
 {context}
 
 Write 2-3 paragraphs. Sound like you're talking, not writing an essay."""
+    
+    def _fit_chunks(self, chunks: List[Dict], budget: int):
+        """Chunk texts (capped per chunk) that fit in `budget` tokens, and tokens used"""
+        lines = []
+        used = self.tokens.count("From your writing:") + 2  # section header
+        for chunk in chunks[:self.chunks_per_stream]:
+            # "- " prefix and newline cost about two tokens
+            allowance = min(self.chunk_max_tokens, budget - used - 2)
+            if allowance < self.min_chunk_tokens:
+                break
+            text = self.tokens.truncate(chunk['text'], allowance)
+            lines.append(text)
+            used += self.tokens.count(text) + 2
+        return (lines, used) if lines else ([], 0)
 
     def _detect_framework(self, question: str) -> str:
         q = question.lower()
@@ -68,10 +149,10 @@ Write 2-3 paragraphs. Sound like you're talking, not writing an essay."""
             return self.core_frameworks["hiring"]
         return ""
 
-    def _format_context(self, lenny_chunks: List[Dict], guest_chunks: List[Dict]) -> str:
+    def _format_context(self, lenny_lines: List[str], guest_lines: List[str]) -> str:
         parts = []
-        if lenny_chunks:
-            parts.append("From your writing:\n" + "\n".join([f"- {c['text'][:180]}" for c in lenny_chunks[:2]]))
-        if guest_chunks:
-            parts.append("From guests:\n" + "\n".join([f"- {c['text'][:180]}" for c in guest_chunks[:2]]))
+        if lenny_lines:
+            parts.append("From your writing:\n" + "\n".join([f"- {text}" for text in lenny_lines]))
+        if guest_lines:
+            parts.append("From guests:\n" + "\n".join([f"- {text}" for text in guest_lines]))
         return "\n\n".join(parts) if parts else ""
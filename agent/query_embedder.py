@@ -0,0 +1,143 @@
+"""
+Cache-aware query encoder shared by the retrievers
+"""
+
+import time
+import threading
+from typing import List, Optional
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from agent.embedding_backend import (
+    embedding_cache_namespace,
+    get_embedding_backend,
+    load_checked_embedding_model,
+)
+from agent.embedding_cache import (
+    EmbeddingCache,
+    get_embedding_cache,
+    get_persistent_embedding_cache,
+)
+
+
+class QueryEmbedder:
+    """
+    Wraps the SentenceTransformer with the in-memory and on-disk embedding
+    caches. Lookups go memory -> disk -> model.
+
+    `load` controls when the model is loaded: "eager" (in the constructor),
+    "background" (in a daemon thread started by the constructor) or "lazy"
+    (on first use). Cache hits never wait for the model. The inference
+    backend comes from EMBEDDING_BACKEND (see agent/embedding_backend.py).
+    """
+
+    def __init__(self, model_name: str, load: str = "eager", backend: str = None):
+        self.model_name = model_name
+        self.backend = backend or get_embedding_backend()
+        self._model = None
+        self._load_lock = threading.Lock()
+        self.load_seconds = None
+
+        # Embedding caches (bounded in memory, optional on disk), keyed by
+        # model + backend so quantized vectors never mix with full precision
+        self.cache_namespace = embedding_cache_namespace(model_name, self.backend)
+        self.cache = get_embedding_cache()
+        self.disk_cache = get_persistent_embedding_cache(self.cache_namespace)
+
+        if load == "eager":
+            self._load_model()
+        elif load == "background":
+            threading.Thread(target=self._load_in_background, daemon=True).start()
+
+    @property
+    def model(self) -> SentenceTransformer:
+        """The model, loading it (or waiting for the background load) if needed"""
+        if self._model is None:
+            self._load_model()
+        return self._model
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def _load_model(self):
+        with self._load_lock:
+            if self._model is None:
+                start = time.perf_counter()
+                model, backend = load_checked_embedding_model(self.model_name, self.backend)
+                if backend != self.backend:
+                    # Parity check fell back to torch
+                    self.backend = backend
+                    self.cache_namespace = embedding_cache_namespace(self.model_name, backend)
+                    self.disk_cache = get_persistent_embedding_cache(self.cache_namespace)
+                self._model = model
+                self.load_seconds = time.perf_counter() - start
+
+    def _load_in_background(self):
+        try:
+            self._load_model()
+            print(f"   ✅ Embedding model loaded in background ({self.load_seconds:.2f}s)")
+        except Exception as e:
+            # The next foreground call retries and raises
+            print(f"   ❌ Background embedding model load failed: {e}")
+
+    def _lookup(self, cache_key: str, query: str):
+        cached = self.cache.get(cache_key)
+        if cached is None and self.disk_cache is not None:
+            stored = self.disk_cache.get(query)
+            if stored is not None:
+                cached = self.cache.put(cache_key, stored)
+        return cached
+
+    def _store(self, cache_key: str, query: str, embedding) -> np.ndarray:
+        if self.disk_cache is not None:
+            self.disk_cache.put(query, embedding)
+        return self.cache.put(cache_key, embedding)
+
+    def cached(self, query: str) -> Optional[np.ndarray]:
+        """The query's vector if a cache already holds it; never runs the model"""
+        return self._lookup(EmbeddingCache.make_key(self.cache_namespace, query), query)
+
+    def embed(self, query: str) -> np.ndarray:
+        """Embed one query"""
+        cache_key = EmbeddingCache.make_key(self.cache_namespace, query)
+
+        cached = self._lookup(cache_key, query)
+        if cached is not None:
+            return cached
+
+        embedding = self.model.encode(
+            query,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return self._store(cache_key, query, embedding)
+
+    def embed_many(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed many queries, encoding all cache misses in one model call"""
+        vectors = [None] * len(queries)
+        pending = {}  # cache key -> positions of queries that need encoding
+
+        for i, query in enumerate(queries):
+            cache_key = EmbeddingCache.make_key(self.cache_namespace, query)
+            cached = self._lookup(cache_key, query)
+            if cached is not None:
+                vectors[i] = cached
+            else:
+                pending.setdefault(cache_key, []).append(i)
+
+        if pending:
+            texts = [queries[positions[0]] for positions in pending.values()]
+            embeddings = self.model.encode(
+                texts,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+
+            for (cache_key, positions), text, embedding in zip(pending.items(), texts, embeddings):
+                stored = self._store(cache_key, text, embedding)
+                for i in positions:
+                    vectors[i] = stored
+
+        return vectors
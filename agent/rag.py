@@ -2,33 +2,238 @@
 agent/rag.py
 Sophisticated RAG Pipeline: Dual-Stream Retrieval + Streaming Response
 """
-from typing import Iterator, List, Dict, Optional
-from agent.chroma_retriever import ChromaRetriever
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, List, Dict, Optional
 from agent.persona import LennyPersona
-from agent.llm_client import NvidiaLlamaClient
+from agent.answer_cache import answer_cache_from_env, areplay_stream, replay_stream
+from agent.answer_store import answer_store_from_env
+from agent.coalescing import SingleFlight
+from agent.conversation import conversation_store_from_env
+from agent.embedding_cache import normalize_query
+from agent.llm_client import AsyncNvidiaLlamaClient, NvidiaLlamaClient
+
+NO_DATA_MESSAGE = "I don't have enough data on that yet. Try asking about PMF or Retention!"
 
 class LennyRAG:
     def __init__(self):
         print("🚀 Initializing Sophisticated Lenny Agent...")
-        self.retriever = ChromaRetriever()
+        self.retriever = self._load_retriever()
         self.persona = LennyPersona()
         self.llm = NvidiaLlamaClient()
+        
+        # Optional reranking stage between retrieval and prompt construction
+        self.reranker = None
+        if os.getenv('RERANK_ENABLED', '0') == '1':
+            from agent.reranker import Reranker
+            self.reranker = Reranker()
+        
+        # Precomputed answers for canonical questions (ingestion/build_answer_store.py)
+        index_version = self.retriever.index_version() if hasattr(self.retriever, 'index_version') else None
+        self.answer_store = answer_store_from_env(index_version)
+        self.answer_store_delay_s = float(os.getenv('ANSWER_STORE_STREAM_DELAY_MS', 0)) / 1000
+        
+        # Optional semantic cache of finished answers (ANSWER_CACHE_ENABLED=1)
+        self.answer_cache = answer_cache_from_env()
+        
+        # Optional small/large model routing (MODEL_ROUTING=1)
+        self.router = None
+        if os.getenv('MODEL_ROUTING', '0') == '1':
+            from agent.router import ModelRouter
+            self.router = ModelRouter()
+        
+        # Single-flight coalescing of identical in-flight questions (COALESCE_REQUESTS=1)
+        self.coalescer = SingleFlight() if os.getenv('COALESCE_REQUESTS', '0') == '1' else None
+        
+        # Per-session memory for chat(); summaries go to the small model when routing
+        self.conversations = conversation_store_from_env()
+        self.summary_model = os.getenv('CONVERSATION_SUMMARY_MODEL') or (
+            self.router.small_model if self.router else None
+        )
+        
+        # Created on first async call so sync-only callers don't pay for them
+        self._retrieval_executor = None
+        self._async_llms = {}
+    
+    def _load_retriever(self):
+        """RETRIEVER_BACKEND=chroma (default) or numpy (exact, memory-mapped)"""
+        backend = os.getenv('RETRIEVER_BACKEND', 'chroma').lower()
+        if backend == 'numpy':
+            from agent.numpy_retriever import NumpyRetriever
+            return NumpyRetriever()
+        
+        from agent.chroma_retriever import ChromaRetriever
+        return ChromaRetriever()
     
     def _get_dual_stream_context(self, question: str, top_k: int):
-        """Helper to perform the stratified retrieval"""
-        lenny_chunks = self.retriever.search_with_filters(
+        """Helper to perform the stratified retrieval (one embed, one pass)"""
+        # With a reranker, over-fetch and let it pick the best 3 per stream
+        candidates = self.reranker.candidates if self.reranker else 3
+        
+        streams = self.retriever.search_dual_stream(
             query=question,
-            source_filter="linkedin",
-            top_k=3
+            sources=("linkedin", "youtube"),
+            top_k=candidates
         )
         
-        guest_chunks = self.retriever.search_with_filters(
-            query=question,
-            source_filter="youtube",
-            top_k=3
+        if self.reranker:
+            return tuple(self.reranker.rerank_streams(
+                question,
+                [streams["linkedin"], streams["youtube"]],
+                top_n=3
+            ))
+        
+        return streams["linkedin"], streams["youtube"]
+    
+    def _retrieve(self, question: str, top_k: int, source_filter: Optional[str] = None):
+        """(lenny_chunks, guest_chunks) for a question"""
+        if source_filter:
+            # RETRIEVAL_MODE=hybrid applies to single-source queries too
+            if getattr(self.retriever, 'retrieval_mode', 'vector') == 'hybrid':
+                return [], self.retriever.search_hybrid(question, source_filter, top_k)
+            return [], self.retriever.search_with_filters(question, source_filter, top_k)
+        return self._get_dual_stream_context(question, top_k)
+    
+    def _format_sources(self, chunks: List[Dict]) -> List[Dict]:
+        """Deduplicated source list, best-scoring first"""
+        sources = []
+        seen_urls = set()
+        for chunk in sorted(chunks, key=lambda x: x['score'], reverse=True):
+            if chunk['source_url'] and chunk['source_url'] not in seen_urls:
+                sources.append({
+                    "type": chunk['source'],
+                    "url": chunk['source_url'],
+                    "score": chunk['score'],
+                    "authority": "Lenny's Core Belief" if chunk['source'] == 'linkedin' else "Guest Case Study"
+                })
+                seen_urls.add(chunk['source_url'])
+        return sources
+
+    def _build_prompt(self, question: str, lenny_chunks: List[Dict], guest_chunks: List[Dict]) -> Dict:
+        """Token-budgeted user prompt (see LennyPersona.build_prompt)"""
+        built = self.persona.build_prompt(question, lenny_chunks, guest_chunks)
+        tokens = built["tokens"]
+        print(f"   🧮 Prompt: {tokens['total']}/{built['budget']} tokens "
+              f"(framework {tokens['framework']}, linkedin {tokens['linkedin']}, guest {tokens['guest']})")
+        return built
+    
+    def _choose_model(self, question: str, lenny_chunks: List[Dict], guest_chunks: List[Dict]):
+        """(route, model) from the router, or (None, None) to use the client default"""
+        if self.router is None:
+            return None, None
+        route, model = self.router.route(
+            question, lenny_chunks, guest_chunks,
+            framework=self.persona._detect_framework(question)
         )
+        print(f"   🔀 Route: {route} -> {model}")
+        return route, model
+    
+    def _track_route(self, route: Optional[str], model: Optional[str], response, stream: bool, start: float):
+        """Per-route latency: full call time, or stream duration + TTFT once it completes"""
+        if route is None:
+            return
+        if not stream:
+            self.router.record(route, model, time.perf_counter() - start)
+        elif hasattr(response, 'on_complete'):
+            response.on_complete.append(
+                lambda parts: self.router.record(route, model, response.stats.duration_s, response.stats.ttft_s)
+            )
+    
+    def _precomputed(
+        self,
+        question: str,
+        top_k: int,
+        temperature: float,
+        max_tokens: int,
+        source_filter: Optional[str] = None
+    ) -> Optional[Dict]:
+        """Stored answer for a canonical question (unfiltered, same settings as the build), or None"""
+        if self.answer_store is None or source_filter is not None:
+            return None
+        entry = self.answer_store.get(question, temperature, top_k, max_tokens)
+        if entry is not None:
+            print(f"   📦 Precomputed answer")
+        return entry
+    
+    def _known_vector(self, question: str):
+        """The question's embedding if a cache already holds it (never encodes)"""
+        embedder = getattr(self.retriever, 'embedder', None)
+        return embedder.cached(question) if embedder is not None else None
+    
+    def _answer_lookup(
+        self,
+        question: str,
+        top_k: int,
+        temperature: float,
+        source_filter: Optional[str],
+        max_tokens: int
+    ) -> Optional[Dict]:
+        """Answer-cache handle for a request, or None with the cache off"""
+        if self.answer_cache is None:
+            return None
+        index_version = self.retriever.index_version() if hasattr(self.retriever, 'index_version') else ""
+        partition = self.answer_cache.partition(temperature, source_filter, index_version, top_k, max_tokens)
+        return {"question": question, "partition": partition, "vector": None}
+    
+    def _cached_answer(self, lookup: Optional[Dict]) -> Optional[Dict]:
+        """
+        Cached payload for a near-duplicate question, or None. Only looks up
+        with an embedding some cache already holds: before retrieval that is
+        a repeat question, after it whatever retrieval encoded. A question
+        the lexical fast path answered has none, so no encode is forced.
+        """
+        if lookup is None or lookup["vector"] is not None:
+            return None
+        lookup["vector"] = self._known_vector(lookup["question"])
+        if lookup["vector"] is None:
+            return None
+        return self.answer_cache.get(lookup["vector"], lookup["partition"])
+    
+    def _when_complete(self, response, stream: bool, callback):
+        """Call callback(answer) once the answer is complete; returns what to hand the caller"""
+        if not stream:
+            callback(response)
+            return response
+        
+        # Keep the client's instrumented stream (and its .stats) intact
+        if hasattr(response, 'on_complete'):
+            response.on_complete.append(lambda parts: callback("".join(parts)))
+            return response
+        
+        return RecordingStream(response, callback)
+    
+    def _remember_answer(self, lookup, response, stream: bool, sources: List[Dict], chunks: List[Dict]):
+        """Store a generated answer; streamed answers are stored once complete"""
+        if lookup is None:
+            return response
         
-        return lenny_chunks, guest_chunks
+        def put(vector, answer: str):
+            self.answer_cache.put(vector, lookup["partition"], {"answer": answer, "sources": sources, "chunks": chunks})
+        
+        def store(answer: str):
+            vector = lookup["vector"] if lookup["vector"] is not None else self._known_vector(lookup["question"])
+            if vector is not None:
+                put(vector, answer)
+                return
+            # Lexical fast path never encoded the question: encode it off the
+            # request path, so repeats and paraphrases can hit next time
+            threading.Thread(
+                target=lambda: put(self.retriever.embed_query(lookup["question"]), answer),
+                daemon=True, name="answer-cache"
+            ).start()
+        
+        return self._when_complete(response, stream, store)
+    
+    def _remember_turn(self, memory, question: str, answer: str):
+        """Record a finished exchange; fold evicted turns into the summary off the request path"""
+        memory.add_turn(question, answer)
+        if memory.needs_compaction():
+            threading.Thread(
+                target=memory.compact, args=(self.llm, self.summary_model), daemon=True, name="compact"
+            ).start()
 
     def query(
         self,
@@ -41,108 +246,380 @@ class LennyRAG:
     ) -> str | Iterator[str]:
         """
         Main Query Method - Supports Streaming for UI
+        (response only; use query_with_metadata to also get the sources)
+        """
+        result = self.query_with_metadata(question, top_k, temperature, stream, source_filter, max_tokens)
+        return result["response_stream"] if stream else result["response"]
+    
+    def query_with_metadata(
+        self,
+        question: str,
+        top_k: int = 5,
+        temperature: float = 0.7,
+        stream: bool = False,
+        source_filter: Optional[str] = None,
+        max_tokens: int = 1000,
+    ) -> Dict:
+        """
+        Response plus the sources and chunks it was generated from, all from
+        one retrieval. With stream=True, `response_stream` is the token
+        iterator and `sources`/`chunks` are ready before the first token.
         """
         print(f"\n🔍 Sophisticated Query: {question}")
         
-        if source_filter:
-            lenny_chunks = []
-            guest_chunks = self.retriever.search_with_filters(question, source_filter, top_k)
-        else:
-            lenny_chunks, guest_chunks = self._get_dual_stream_context(question, top_k)
+        precomputed = self._precomputed(question, top_k, temperature, max_tokens, source_filter)
+        if precomputed is not None:
+            answer = precomputed['answer']
+            response_key = "response_stream" if stream else "response"
+            return {
+                response_key: replay_stream(answer, self.answer_store_delay_s) if stream else answer,
+                "sources": precomputed['sources'],
+                "chunks": precomputed['chunks'],
+                "precomputed": True
+            }
         
-        all_chunks = lenny_chunks + guest_chunks
+        if self.coalescer is None:
+            return self._query_with_metadata(question, top_k, temperature, stream, source_filter, max_tokens)
         
-        if not all_chunks:
-            msg = "I don't have enough data on that yet. Try asking about PMF or Retention!"
-            if stream:
-                yield msg
-                return
-            return msg
+        # Identical concurrent requests share one retrieval + one streamed generation
+        def produce():
+            result = self._query_with_metadata(question, top_k, temperature, True, source_filter, max_tokens)
+            return result, result.pop("response_stream")
         
-        system_prompt = self.persona.get_system_prompt()
-        user_prompt = self.persona.get_enhanced_prompt(
-            question=question, 
-            lenny_chunks=lenny_chunks, 
-            guest_chunks=guest_chunks
-        )
+        key = (normalize_query(question), temperature, top_k, source_filter, max_tokens)
+        result, chunks = self.coalescer.join(key, produce)
+        if stream:
+            result["response_stream"] = chunks
+        else:
+            result["response"] = "".join(chunks)
+        return result
+    
+    def _query_with_metadata(
+        self,
+        question: str,
+        top_k: int,
+        temperature: float,
+        stream: bool,
+        source_filter: Optional[str],
+        max_tokens: int,
+    ) -> Dict:
+        plan = self._plan(question, top_k, temperature, source_filter, max_tokens)
+        answered = self._planned_answer(plan, stream, replay_stream)
+        if answered is not None:
+            return answered
         
+        # 3. Generate
+        start = time.perf_counter()
         response = self.llm.generate(
-            prompt=user_prompt,
-            system_prompt=system_prompt,
+            prompt=plan["prompt"],
+            system_prompt=plan["system_prompt"],
             temperature=temperature,
             max_tokens=max_tokens,
-            stream=stream
+            stream=stream,
+            model=plan["model"]
         )
+        return self._generated(plan, response, stream, start)
+    
+    def _plan(
+        self,
+        question: str,
+        top_k: int,
+        temperature: float,
+        source_filter: Optional[str],
+        max_tokens: int,
+    ) -> Dict:
+        """
+        Everything before generation (blocking; the async path runs it on
+        the retrieval pool). {"cached": payload} on an answer-cache hit,
+        {"chunks": []} when nothing was retrieved, else generation inputs.
+        """
+        # 0. Repeat of a question we already answered?
+        lookup = self._answer_lookup(question, top_k, temperature, source_filter, max_tokens)
+        cached = self._cached_answer(lookup)
         
-        # KEY FIX: If streaming, yield from the generator instead of returning it
-        if stream:
-            for chunk in response:
-                yield chunk
-        else:
-            return response
-
+        # 1. Retrieve (once - sources and prompt both come from these chunks)
+        if cached is None:
+            lenny_chunks, guest_chunks = self._retrieve(question, top_k, source_filter)
+            all_chunks = lenny_chunks + guest_chunks
+            # ...or a near-duplicate, now that retrieval has embedded it
+            cached = self._cached_answer(lookup)
+        
+        if cached is not None:
+            print(f"   ♻️ Answer cache hit (similarity {cached['similarity']:.3f})")
+            return {"cached": cached}
+        
+        if not all_chunks:
+            return {"chunks": []}
+        
+        # 2. Prompt, route, and the sources/chunks returned with the answer
+        built = self._build_prompt(question, lenny_chunks, guest_chunks)
+        route, model = self._choose_model(question, lenny_chunks, guest_chunks)
+        return {
+            "lookup": lookup,
+            "sources": self._format_sources(all_chunks),
+            "chunks": sorted(all_chunks, key=lambda x: x['score'], reverse=True),
+            "system_prompt": self.persona.get_system_prompt(),
+            "prompt": built["prompt"],
+            "prompt_tokens": built["tokens"],
+            "route": route,
+            "model": model,
+        }
     
-    def query_with_metadata(
+    def _planned_answer(self, plan: Dict, stream: bool, replay: Callable) -> Optional[Dict]:
+        """Result for a plan that needs no generation (`replay` re-streams the text), else None"""
+        response_key = "response_stream" if stream else "response"
+        if "cached" in plan:
+            cached = plan["cached"]
+            return {
+                response_key: replay(cached['answer']) if stream else cached['answer'],
+                "sources": cached['sources'],
+                "chunks": cached['chunks'],
+                "cached": True
+            }
+        if not plan["chunks"]:
+            return {response_key: replay(NO_DATA_MESSAGE) if stream else NO_DATA_MESSAGE, "sources": [], "chunks": []}
+        return None
+    
+    def _generated(self, plan: Dict, response, stream: bool, start: float) -> Dict:
+        """Wire up route tracking and answer caching; sources/chunks go with the response"""
+        self._track_route(plan["route"], plan["model"], response, stream, start)
+        response = self._remember_answer(plan["lookup"], response, stream, plan["sources"], plan["chunks"])
+        
+        # 4. Sources/chunks are returned with the response (or its stream)
+        return {
+            "response_stream" if stream else "response": response,
+            "sources": plan["sources"],
+            "chunks": plan["chunks"],
+            "prompt_tokens": plan["prompt_tokens"],
+            "route": plan["route"]
+        }
+
+    def chat(
         self,
+        session_id: str,
         question: str,
         top_k: int = 5,
         temperature: float = 0.7,
-        stream: bool = False  # Now supports streaming!
-    ) -> Dict | Iterator[Dict]:
+        stream: bool = True,
+        max_tokens: int = 1000,
+    ) -> Dict:
         """
-        Returns response + metadata. Now supports streaming.
+        Multi-turn query_with_metadata. A session's first turn is a plain
+        query_with_metadata; from the second on, retrieval uses this turn's
+        question and the session's summary and recent turns go to llm.chat
+        ahead of the grounded prompt, so prompt size stays flat as the
+        conversation grows.
         """
-        # 1. Retrieve (always happens first)
-        lenny_chunks, guest_chunks = self._get_dual_stream_context(question, top_k)
+        print(f"\n💬 Chat [{session_id}]: {question}")
+        response_key = "response_stream" if stream else "response"
+        memory = self.conversations.get(session_id)
+        
+        if memory.is_empty:
+            # No history to condition on: an ordinary query, so precomputed
+            # answers, the answer cache and coalescing all apply
+            result = self.query_with_metadata(question, top_k, temperature, stream, None, max_tokens)
+            if not result["chunks"]:
+                return result
+            result[response_key] = self._when_complete(
+                result[response_key], stream, lambda answer: self._remember_turn(memory, question, answer)
+            )
+            result["history"] = memory.stats()
+            return result
+        
+        lenny_chunks, guest_chunks = self._retrieve(question, top_k, None)
         all_chunks = lenny_chunks + guest_chunks
         
-        # 2. Format Sources
-        sources = []
-        seen_urls = set()
-        sorted_chunks = sorted(all_chunks, key=lambda x: x['score'], reverse=True)
+        if not all_chunks:
+            return {response_key: iter([NO_DATA_MESSAGE]) if stream else NO_DATA_MESSAGE, "sources": [], "chunks": []}
         
-        for chunk in sorted_chunks:
-            if chunk['source_url'] and chunk['source_url'] not in seen_urls:
-                sources.append({
-                    "type": chunk['source'],
-                    "url": chunk['source_url'],
-                    "score": chunk['score'],
-                    "authority": "Lenny's Core Belief" if chunk['source'] == 'linkedin' else "Guest Case Study"
-                })
-                seen_urls.add(chunk['source_url'])
+        built = self._build_prompt(question, lenny_chunks, guest_chunks)
+        route, model = self._choose_model(question, lenny_chunks, guest_chunks)
+        messages = memory.messages(self.persona.get_system_prompt(), built["prompt"])
         
-        # 3. Generate
-        system_prompt = self.persona.get_system_prompt()
-        user_prompt = self.persona.get_enhanced_prompt(
-            question=question, 
-            lenny_chunks=lenny_chunks, 
-            guest_chunks=guest_chunks
-        )
-
-        response = self.llm.generate(
-            prompt=user_prompt,
-            system_prompt=system_prompt,
+        start = time.perf_counter()
+        response = self.llm.chat(
+            messages,
             temperature=temperature,
-            stream=stream
+            max_tokens=max_tokens,
+            stream=stream,
+            model=model
+        )
+        self._track_route(route, model, response, stream, start)
+        response = self._when_complete(
+            response, stream, lambda answer: self._remember_turn(memory, question, answer)
         )
         
-        # 4. Return based on streaming mode
-        if stream:
-            # For streaming: return chunks/sources immediately, yield response
-            def stream_with_metadata():
-                for chunk in response:
-                    yield chunk
-            
-            # Return a dict with the generator
-            return {
-                "response_stream": stream_with_metadata(),
-                "sources": sources,
-                "chunks": sorted_chunks
+        return {
+            response_key: response,
+            "sources": self._format_sources(all_chunks),
+            "chunks": sorted(all_chunks, key=lambda x: x['score'], reverse=True),
+            "prompt_tokens": built["tokens"],
+            "history": memory.stats(),
+            "route": route
+        }
+
+    # ------------------------------------------------------------------
+    # Async pipeline: retrieval (CPU-bound) on a small thread pool, the
+    # generation stream on the event loop through AsyncNvidiaLlamaClient,
+    # so an in-flight stream costs a coroutine rather than a thread
+    # ------------------------------------------------------------------
+
+    @property
+    def retrieval_executor(self) -> ThreadPoolExecutor:
+        if self._retrieval_executor is None:
+            self._retrieval_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('RAG_RETRIEVAL_WORKERS', 8)),
+                thread_name_prefix="rag-retrieval"
+            )
+        return self._retrieval_executor
+
+    @property
+    def async_llm(self) -> AsyncNvidiaLlamaClient:
+        """Async NIM client for the running loop; shares self.llm's breaker, counters and caches"""
+        # Its connection pool belongs to one event loop
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_llms:
+            self._async_llms = {
+                other: client for other, client in self._async_llms.items() if not other.is_closed()
             }
-        else:
-            # Non-streaming: return everything at once
+            self._async_llms[loop] = AsyncNvidiaLlamaClient(shared_with=self.llm)
+        return self._async_llms[loop]
+
+    async def aquery(
+        self,
+        question: str,
+        top_k: int = 5,
+        stream: bool = True,
+        temperature: float = 0.7,
+        source_filter: Optional[str] = None,
+        max_tokens: int = 1000,
+    ) -> str | AsyncIterator[str]:
+        """
+        Async query. With stream=True returns an async iterator:
+            async for chunk in await rag.aquery(question): ...
+        """
+        result = await self.aquery_with_metadata(question, top_k, temperature, stream, source_filter, max_tokens)
+        return result["response_stream"] if stream else result["response"]
+
+    async def aquery_with_metadata(
+        self,
+        question: str,
+        top_k: int = 5,
+        temperature: float = 0.7,
+        stream: bool = False,
+        source_filter: Optional[str] = None,
+        max_tokens: int = 1000,
+    ) -> Dict:
+        """
+        Async query_with_metadata (same precomputed answers, answer cache and
+        coalescing); `response_stream` is an async iterator whose aclose()
+        stops the upstream generation
+        """
+        print(f"\n🔍 Sophisticated Query: {question}")
+        
+        precomputed = self._precomputed(question, top_k, temperature, max_tokens, source_filter)
+        if precomputed is not None:
+            answer = precomputed['answer']
+            response_key = "response_stream" if stream else "response"
             return {
-                "response": response,
-                "sources": sources,
-                "chunks": sorted_chunks
+                response_key: areplay_stream(answer, self.answer_store_delay_s) if stream else answer,
+                "sources": precomputed['sources'],
+                "chunks": precomputed['chunks'],
+                "precomputed": True
             }
+        
+        if self.coalescer is None:
+            return await self._aquery_with_metadata(question, top_k, temperature, stream, source_filter, max_tokens)
+        
+        async def aproduce():
+            result = await self._aquery_with_metadata(question, top_k, temperature, True, source_filter, max_tokens)
+            return result, result.pop("response_stream")
+        
+        key = (normalize_query(question), temperature, top_k, source_filter, max_tokens)
+        result, chunks = await self.coalescer.ajoin(key, aproduce)
+        if stream:
+            result["response_stream"] = chunks
+        else:
+            try:
+                result["response"] = "".join([chunk async for chunk in chunks])
+            finally:
+                await chunks.aclose()
+        return result
+
+    async def _aquery_with_metadata(
+        self,
+        question: str,
+        top_k: int,
+        temperature: float,
+        stream: bool,
+        source_filter: Optional[str],
+        max_tokens: int,
+    ) -> Dict:
+        plan = await asyncio.get_running_loop().run_in_executor(
+            self.retrieval_executor,
+            lambda: self._plan(question, top_k, temperature, source_filter, max_tokens)
+        )
+        answered = self._planned_answer(plan, stream, areplay_stream)
+        if answered is not None:
+            return answered
+        
+        start = time.perf_counter()
+        response = await self.async_llm.generate(
+            prompt=plan["prompt"],
+            system_prompt=plan["system_prompt"],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=stream,
+            model=plan["model"]
+        )
+        return self._generated(plan, response, stream, start)
+
+    async def aclose(self):
+        """close() plus the async client of the running loop"""
+        client = self._async_llms.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+        self.close()
+
+    def close(self):
+        if self._retrieval_executor is not None:
+            self._retrieval_executor.shutdown(wait=False, cancel_futures=True)
+            self._retrieval_executor = None
+
+
+class RecordingStream:
+    """
+    Chunk iterator that calls `callback(answer)` once `source` is
+    exhausted. Keeps the source's `.stats`; close() stops the source and
+    skips the callback.
+    """
+
+    def __init__(self, source: Iterator[str], callback: Callable[[str], None]):
+        self._source = source
+        self._chunks = iter(source)
+        self._callback = callback
+        self._parts: List[str] = []
+
+    @property
+    def stats(self):
+        return getattr(self._source, 'stats', None)
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            callback, self._callback = self._callback, None
+            if callback is not None:
+                callback("".join(self._parts))
+            raise
+        self._parts.append(chunk)
+        return chunk
+
+    def close(self):
+        """Closed early (client went away): stop the upstream too"""
+        self._callback = None
+        if hasattr(self._source, 'close'):
+            self._source.close()
@@ -0,0 +1,196 @@
+"""
+Latency-budgeted reranking of retrieved chunks
+
+Candidates are scored off the request thread. If scoring does not finish
+within the budget, the request keeps vector order; the late scores still
+land in the cache, so the next identical question gets reranked for free.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Dict, List, Optional
+
+from agent.embedding_cache import normalize_query
+from agent.lexical_index import tokenize
+
+
+class Reranker:
+    """
+    RERANKER_BACKEND:
+      cross-encoder - sentence-transformers CrossEncoder (RERANKER_MODEL)
+      lexical       - cheap scorer: vector score blended with query-term overlap
+    """
+
+    def __init__(self):
+        self.backend = os.getenv('RERANKER_BACKEND', 'cross-encoder').lower()
+        self.model_name = os.getenv('RERANKER_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+        self.budget_ms = float(os.getenv('RERANK_BUDGET_MS', 150))
+        self.candidates = int(os.getenv('RERANK_CANDIDATES', 8))
+        self.max_cached = int(os.getenv('RERANK_CACHE_MAX_ENTRIES', 50000))
+        self.workers = int(os.getenv('RERANKER_WORKERS', 2))
+
+        self._executor = self._make_executor()
+        self._scores: "OrderedDict[tuple, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Scoring jobs submitted and not finished; capped at `workers` so
+        # requests never queue behind work that will miss its budget anyway
+        self._in_flight = 0
+
+        self.stats = {
+            "requests": 0,
+            "reranked": 0,
+            "timeouts": 0,
+            "saturated": 0,
+            "errors": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+        # Load the cross-encoder off the request path; until it is ready,
+        # requests simply time out to vector order
+        self._model = None
+        self._model_ready = threading.Event()
+        if self.backend == 'cross-encoder':
+            self._executor.submit(self._load_model)
+        else:
+            self._model_ready.set()
+
+        print(f"✅ Reranker ready ({self.backend}, budget {self.budget_ms:.0f}ms, {self.candidates} candidates/stream)")
+
+    def _make_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rerank")
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the cross-encoder load has finished (or failed)"""
+        return self._model_ready.wait(timeout)
+
+    def after_fork(self):
+        """
+        Call in a forked child: the parent's executor threads don't exist
+        there. The loaded model and score cache are kept (copy-on-write).
+        """
+        self._executor = self._make_executor()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+
+    def _load_model(self):
+        try:
+            from sentence_transformers import CrossEncoder
+            start = time.perf_counter()
+            self._model = CrossEncoder(self.model_name, device='cpu')
+            print(f"   ✅ Reranker model loaded ({time.perf_counter() - start:.2f}s)")
+        except Exception as e:
+            print(f"   ❌ Reranker model failed to load, keeping vector order: {e}")
+        finally:
+            self._model_ready.set()
+
+    @staticmethod
+    def _chunk_key(chunk: Dict) -> str:
+        return chunk.get('id') or hashlib.sha1(chunk['text'].encode()).hexdigest()
+
+    def _score_and_cache(self, query: str, query_key: str, chunks: List[Dict]) -> List[float]:
+        self._model_ready.wait()
+
+        if self.backend == 'cross-encoder':
+            if self._model is None:
+                raise RuntimeError("reranker model unavailable")
+            scores = [float(s) for s in self._model.predict([(query, c['text']) for c in chunks])]
+        else:
+            query_terms = set(tokenize(query))
+            scores = []
+            for chunk in chunks:
+                overlap = len(query_terms & set(tokenize(chunk['text']))) / max(len(query_terms), 1)
+                scores.append(0.7 * chunk.get('score', 0.0) + 0.3 * overlap)
+
+        with self._lock:
+            for chunk, score in zip(chunks, scores):
+                self._scores[(query_key, self._chunk_key(chunk))] = score
+            while len(self._scores) > self.max_cached:
+                self._scores.popitem(last=False)
+        return scores
+
+    def score(self, query: str, chunks: List[Dict]) -> Optional[List[float]]:
+        """Scores for `chunks`, or None if they can't be computed within budget"""
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        query_key = normalize_query(query)
+
+        scores = [None] * len(chunks)
+        missing = []
+        with self._lock:
+            for i, chunk in enumerate(chunks):
+                key = (query_key, self._chunk_key(chunk))
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[i] = self._scores[key]
+                else:
+                    missing.append(i)
+        self._count(requests=1, cache_hits=len(chunks) - len(missing), cache_misses=len(missing))
+
+        if missing:
+            with self._stats_lock:
+                saturated = self._in_flight >= self.workers
+                if not saturated:
+                    self._in_flight += 1
+            if saturated:
+                self._count(saturated=1)
+                return None
+
+            future = self._executor.submit(
+                self._score_and_cache, query, query_key, [chunks[i] for i in missing]
+            )
+            future.add_done_callback(self._job_done)
+            try:
+                computed = future.result(timeout=max(deadline - time.perf_counter(), 0))
+            except TimeoutError:
+                # Drop it if it hasn't started; a running job still caches its scores
+                future.cancel()
+                self._count(timeouts=1)
+                return None
+            except Exception as e:
+                self._count(errors=1)
+                print(f"   ⚠️ Reranker failed, keeping vector order: {e}")
+                return None
+            for i, score in zip(missing, computed):
+                scores[i] = score
+
+        self._count(reranked=1)
+        return scores
+
+    def _job_done(self, future):
+        with self._stats_lock:
+            self._in_flight -= 1
+
+    def rerank_streams(self, query: str, streams: List[List[Dict]], top_n: int) -> List[List[Dict]]:
+        """
+        Rerank several candidate lists with one scoring call and keep the
+        top_n of each. Any failure or timeout keeps vector order.
+        """
+        flat = [chunk for stream in streams for chunk in stream]
+        scores = self.score(query, flat) if flat else []
+        if scores is None:
+            return [stream[:top_n] for stream in streams]
+
+        reranked, offset = [], 0
+        for stream in streams:
+            stream_scores = scores[offset:offset + len(stream)]
+            offset += len(stream)
+
+            ordered = sorted(zip(stream_scores, range(len(stream))), key=lambda pair: pair[0], reverse=True)
+            top = []
+            for score, i in ordered[:top_n]:
+                chunk = dict(stream[i])
+                chunk['rerank_score'] = score
+                top.append(chunk)
+            reranked.append(top)
+        return reranked
@@ -0,0 +1,111 @@
+"""
+Bounded LRU cache of formatted retrieval results, keyed on the index version
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from agent.embedding_cache import normalize_query
+
+
+class RetrievalResultCache:
+    """
+    Caches `search*` results per (normalized query, source filter, top_k,
+    extra params, index version). A rebuilt index gets a new version, so
+    stale entries are never served and simply age out of the LRU.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(query: str, source_filter, top_k: int, index_version: str, **params) -> tuple:
+        return (
+            normalize_query(query),
+            source_filter,
+            top_k,
+            tuple(sorted(params.items())),
+            index_version,
+        )
+
+    @staticmethod
+    def _size_of(results: List[Dict]) -> int:
+        """Rough footprint: chunk text and URLs dominate"""
+        return sum(
+            sys.getsizeof(r['text']) + sys.getsizeof(r.get('source_url', '')) + 512
+            for r in results
+        )
+
+    def get(self, key: tuple) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            results, _ = entry
+
+        # Callers may annotate result dicts; never hand out the cached ones
+        return [dict(r) for r in results]
+
+    def put(self, key: tuple, results: List[Dict]):
+        results = [dict(r) for r in results]
+        size = self._size_of(results)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (results, size)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def result_cache_from_env() -> Optional[RetrievalResultCache]:
+    """RESULT_CACHE_MAX_ENTRIES=0 disables result caching"""
+    max_entries = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 2048))
+    if max_entries <= 0:
+        return None
+    return RetrievalResultCache(
+        max_entries=max_entries,
+        max_bytes=int(float(os.getenv('RESULT_CACHE_MAX_MB', 32)) * 1024 * 1024),
+    )
@@ -6,12 +6,12 @@ import os
 from typing import List, Dict
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
-from functools import lru_cache
-import hashlib
+import numpy as np
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 import time
 
+from agent.query_embedder import QueryEmbedder
+
 load_dotenv()
 
 
@@ -35,14 +35,9 @@ class QdrantRetriever:
         
         # Initialize embedding model
         start = time.time()
-        self.embedding_model = SentenceTransformer(
-            self.embedding_model_name,
-            device='cpu'
-        )
+        self.embedder = QueryEmbedder(self.embedding_model_name)
+        self.embedding_model = self.embedder.model
         print(f"   ✅ Embedding model loaded ({time.time()-start:.2f}s)")
-        
-        # Embedding cache
-        self._embedding_cache = {}
     
     def search(
         self,
@@ -105,29 +100,9 @@ class QdrantRetriever:
         
         return formatted_results
     
-    def embed_query(self, query: str) -> List[float]:
+    def embed_query(self, query: str) -> np.ndarray:
         """Generate embedding for query with caching"""
-        import hashlib
-        
-        # Create cache key
-        cache_key = hashlib.md5(query.encode()).hexdigest()
-        
-        # Check cache
-        if cache_key in self._embedding_cache:
-            print(f"   💾 Using cached embedding")
-            return self._embedding_cache[cache_key]
-        
-        # Generate embedding
-        embedding = self.embedding_model.encode(
-            query,
-            convert_to_numpy=True,
-            show_progress_bar=False
-        )
-        
-        # Cache it
-        self._embedding_cache[cache_key] = embedding.tolist()
-        
-        return self._embedding_cache[cache_key]
+        return self.embedder.embed(query)
         
     def search(
         self,
@@ -0,0 +1,105 @@
+"""
+Latency-aware routing between a small and a large NIM model
+
+Short questions that hit a canned framework, or whose retrieval is already
+confident, don't need 70B; open-ended ones do. Rules are env-configurable
+and every decision is counted per route with its latency.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Phrasings that ask for judgement rather than a lookup
+OPEN_ENDED_MARKERS = (
+    "why", "should i", "should we", "compare", "versus", " vs ", "trade-off",
+    "tradeoff", "strategy", "what would you", "help me", "pros and cons",
+)
+
+
+class ModelRouter:
+    def __init__(self):
+        self.small_model = os.getenv('LLM_SMALL_MODEL', 'meta/llama-3.1-8b-instruct')
+        self.large_model = os.getenv('LLM_LARGE_MODEL', 'meta/llama-3.1-70b-instruct')
+        self.max_small_words = int(os.getenv('ROUTER_MAX_SMALL_WORDS', 12))
+        self.min_small_score = float(os.getenv('ROUTER_MIN_SMALL_SCORE', 0.75))
+        self.framework_to_small = os.getenv('ROUTER_FRAMEWORK_TO_SMALL', '1') == '1'
+
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+
+        print(f"✅ Model routing: {self.small_model} / {self.large_model}")
+
+    def route(
+        self,
+        question: str,
+        lenny_chunks: List[Dict],
+        guest_chunks: List[Dict],
+        framework: str = ""
+    ) -> Tuple[str, str]:
+        """(route name, model) for a question and its retrieved context"""
+        q = f" {question.lower()} "
+        short = len(question.split()) <= self.max_small_words
+
+        if any(marker in q for marker in OPEN_ENDED_MARKERS):
+            route = "open_ended"
+        elif not short:
+            route = "long_question"
+        elif framework and self.framework_to_small:
+            route = "framework"
+        elif self._similarity(lenny_chunks + guest_chunks) >= self.min_small_score:
+            route = "confident_retrieval"
+        else:
+            route = "default"
+
+        model = self.small_model if route in ("framework", "confident_retrieval") else self.large_model
+        return route, model
+
+    @staticmethod
+    def _similarity(chunks: List[Dict]) -> float:
+        """
+        Best vector similarity in the context. Lexical fast-path chunks carry
+        term coverage in 'score' (1.0 for any full match) and rerank scores are
+        unbounded logits, so neither is comparable to ROUTER_MIN_SMALL_SCORE.
+        """
+        return max(
+            (c['score'] for c in chunks if c.get('retrieval') != 'lexical'),
+            default=0.0
+        )
+
+    def record(self, route: str, model: str, seconds: float, ttft: Optional[float] = None):
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                "model": model,
+                "requests": 0,
+                "latency": deque(maxlen=1000),
+                "ttft": deque(maxlen=1000),
+            })
+            stats["requests"] += 1
+            stats["latency"].append(seconds)
+            if ttft is not None:
+                stats["ttft"].append(ttft)
+
+    def summary(self) -> Dict:
+        """Per-route volume and latency percentiles"""
+        def percentiles(samples):
+            if not samples:
+                return None
+            p50, p95 = np.percentile(list(samples), [50, 95])
+            return {"p50": float(p50), "p95": float(p95)}
+
+        with self._lock:
+            total = sum(stats["requests"] for stats in self._routes.values())
+            return {
+                route: {
+                    "model": stats["model"],
+                    "requests": stats["requests"],
+                    "share": stats["requests"] / total if total else 0.0,
+                    "latency_s": percentiles(stats["latency"]),
+                    "ttft_s": percentiles(stats["ttft"]),
+                }
+                for route, stats in self._routes.items()
+            }
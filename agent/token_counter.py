@@ -0,0 +1,67 @@
+"""
+Local token counting for prompt budgeting
+
+PROMPT_TOKENIZER:
+    cl100k_base (default) - tiktoken encoding; close to Llama 3's 128k BPE
+    <org>/<repo>          - a Hugging Face `tokenizers` tokenizer, e.g. the exact Llama one
+Falls back to ~4 characters per token when neither is available.
+"""
+
+import os
+import math
+from typing import Optional
+
+
+class TokenCounter:
+    def __init__(self, name: Optional[str] = None):
+        self.name = name or os.getenv('PROMPT_TOKENIZER', 'cl100k_base')
+        self._encode = None
+        self._decode = None
+        self.kind = "heuristic"
+
+        if "/" in self.name:
+            try:
+                from tokenizers import Tokenizer
+                tokenizer = Tokenizer.from_pretrained(self.name)
+                self._encode = lambda text: tokenizer.encode(text, add_special_tokens=False).ids
+                self._decode = tokenizer.decode
+                self.kind = "tokenizers"
+            except Exception as e:
+                print(f"   ⚠️ Tokenizer {self.name} unavailable, estimating tokens: {e}")
+        else:
+            try:
+                import tiktoken
+                encoding = tiktoken.get_encoding(self.name)
+                self._encode = encoding.encode_ordinary
+                self._decode = encoding.decode
+                self.kind = "tiktoken"
+            except Exception as e:
+                print(f"   ⚠️ tiktoken encoding {self.name} unavailable, estimating tokens: {e}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encode is None:
+            return math.ceil(len(text) / 4)
+        return len(self._encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of `text` that fits in `max_tokens`"""
+        if max_tokens <= 0:
+            return ""
+        if self._encode is None:
+            return text[:max_tokens * 4]
+        ids = self._encode(text)
+        if len(ids) <= max_tokens:
+            return text
+        return self._decode(ids[:max_tokens])
+
+
+_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    global _counter
+    if _counter is None:
+        _counter = TokenCounter()
+    return _counter
@@ -0,0 +1,225 @@
+"""
+app/api.py
+Production ASGI service for LennyRAG (FastAPI + Server-Sent Events)
+
+    uvicorn app.api:app --host 0.0.0.0 --port 8000 --workers 4
+
+Each worker loads the retriever and embedding model once at startup and
+serves LennyRAG's async pipeline (answer cache, coalescing, NIM retries,
+breaker and caches). Retrieval runs on a small thread pool
+(RAG_RETRIEVAL_WORKERS); generation streams are coroutines on the event
+loop, so one worker holds many concurrent streams. API_MAX_CONCURRENCY caps
+in-flight requests per worker; excess requests wait up to API_QUEUE_TIMEOUT
+seconds, then get a 503 with Retry-After so the load balancer can try
+another worker.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.llm_metrics import get_stream_metrics
+
+
+class QueryRequest(BaseModel):
+    question: str = Field(..., min_length=1, max_length=2000)
+    top_k: int = Field(5, ge=1, le=20)
+    temperature: float = Field(0.7, ge=0.0, le=1.5)
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """Releases the request's concurrency slot however the response ends, even if never iterated"""
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def create_app(rag=None) -> FastAPI:
+    """App serving `rag`, or a LennyRAG built once per worker at startup"""
+    max_concurrency = int(os.getenv('API_MAX_CONCURRENCY', 64))
+    queue_timeout = float(os.getenv('API_QUEUE_TIMEOUT', 2.0))
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        start = time.perf_counter()
+        if app.state.rag is None:
+            from agent.rag import LennyRAG
+            app.state.rag = LennyRAG()
+        # Block until a deferred embedding-model load has finished, so the
+        # first request doesn't pay for it
+        await asyncio.get_running_loop().run_in_executor(
+            None, app.state.rag.retriever.embed_query, "warmup"
+        )
+        app.state.ready = True
+        print(f"✅ LennyRAG API ready in {time.perf_counter() - start:.2f}s "
+              f"(max {max_concurrency} concurrent requests)")
+        yield
+        await app.state.rag.aclose()
+
+    app = FastAPI(title="LennyBot API", lifespan=lifespan)
+    app.state.rag = rag
+    app.state.ready = False
+    app.state.slots = asyncio.Semaphore(max_concurrency)
+    app.state.in_flight = 0
+    app.state.rejected = 0
+
+    async def acquire_slot():
+        try:
+            await asyncio.wait_for(app.state.slots.acquire(), timeout=queue_timeout)
+        except asyncio.TimeoutError:
+            app.state.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        app.state.in_flight += 1
+
+    def release_slot():
+        app.state.in_flight -= 1
+        app.state.slots.release()
+
+    def slot_releaser():
+        """Idempotent release, for slots whose lifetime ends in more than one place"""
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                release_slot()
+        return release
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    async def readyz():
+        if not app.state.ready:
+            raise HTTPException(status_code=503, detail="Loading")
+        return {"status": "ready"}
+
+    @app.get("/metrics")
+    async def metrics():
+        rag = app.state.rag
+        data = {
+            "in_flight": app.state.in_flight,
+            "max_concurrency": max_concurrency,
+            "rejected": app.state.rejected,
+            "streams": get_stream_metrics().summary(),
+        }
+        if rag is not None:
+            if rag.router is not None:
+                data["routes"] = rag.router.summary()
+            if rag.answer_store is not None:
+                data["answer_store"] = rag.answer_store.stats()
+            if rag.answer_cache is not None:
+                data["answer_cache"] = rag.answer_cache.stats()
+            if rag.coalescer is not None:
+                data["coalescing"] = rag.coalescer.stats()
+            data["conversations"] = rag.conversations.stats()
+        return data
+
+    @app.post("/v1/query")
+    async def query(body: QueryRequest):
+        """Non-streaming: full answer plus sources as JSON"""
+        await acquire_slot()
+        try:
+            start = time.perf_counter()
+            result = await app.state.rag.aquery_with_metadata(
+                body.question, top_k=body.top_k, temperature=body.temperature, stream=False
+            )
+            return {
+                "answer": result["response"],
+                "sources": result["sources"],
+                "prompt_tokens": result.get("prompt_tokens"),
+                "latency_s": time.perf_counter() - start,
+            }
+        finally:
+            release_slot()
+
+    @app.post("/v1/query/stream")
+    async def query_stream(body: QueryRequest, request: Request):
+        """SSE: one `sources` event, then `token` events, then a final `stats` event"""
+        await acquire_slot()
+        release = slot_releaser()
+
+        async def events() -> AsyncIterator[str]:
+            start = time.perf_counter()
+            stream = None
+            try:
+                result = await app.state.rag.aquery_with_metadata(
+                    body.question, top_k=body.top_k, temperature=body.temperature, stream=True
+                )
+                yield _sse("sources", {
+                    "sources": result["sources"],
+                    "retrieval_s": time.perf_counter() - start,
+                })
+
+                stream = result["response_stream"]
+                async for token in stream:
+                    if await request.is_disconnected():
+                        break
+                    yield _sse("token", {"text": token})
+                else:
+                    stats = stream.stats.as_dict() if getattr(stream, 'stats', None) is not None else {}
+                    stats["total_s"] = time.perf_counter() - start
+                    stats["prompt_tokens_budgeted"] = result.get("prompt_tokens")
+                    yield _sse("stats", stats)
+            except Exception as e:
+                print(f"❌ Stream failed: {e}")
+                yield _sse("error", {"message": str(e)})
+            finally:
+                # Client gone or generator cancelled: stop the upstream generation
+                try:
+                    if stream is not None:
+                        await stream.aclose()
+                finally:
+                    release()
+
+        return SlotStreamingResponse(
+            events(),
+            release=release,
+            media_type="text/event-stream",
+            # Keep proxies (nginx) from buffering the stream
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "app.api:app",
+        host=os.getenv('API_HOST', '0.0.0.0'),
+        port=int(os.getenv('API_PORT', 8000)),
+        workers=int(os.getenv('API_WORKERS', 1)),
+    )
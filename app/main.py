@@ -52,22 +52,16 @@ if prompt := st.chat_input("Ask Lenny..."):
 
     with st.chat_message("assistant"):
         try:
-            st.write("🔍 Starting query...")
-            
-            # First, try NON-STREAMING (to see if it works at all)
+            # One retrieval feeds both the sources and the token stream
             result = rag.query_with_metadata(
                 question=prompt,
                 top_k=top_k,
                 temperature=temperature,
-                stream=False
+                stream=True
             )
             
-            st.write("✅ Got result")
-            
-            response_text = result.get('response', 'No response')
             sources = result.get('sources', [])
-            
-            st.markdown(response_text)
+            response_text = st.write_stream(result['response_stream'])
             
             if sources:
                 st.write(f"📚 Found {len(sources)} sources")
@@ -0,0 +1,166 @@
+"""
+app/prefork_server.py
+Pre-fork serving: load LennyRAG once, share it copy-on-write across workers
+
+    RETRIEVER_BACKEND=numpy python app/prefork_server.py --workers 4 --port 8000
+
+The parent builds LennyRAG (retriever, persona, embedding model, reranker),
+warms it, freezes the GC so workers never write to the shared objects' GC
+headers, binds the socket and forks N uvicorn workers that accept on it.
+The numpy backend keeps its embedding matrix in a read-only mmap, shared
+through the page cache. Chroma's client does not survive fork, so this mode
+requires RETRIEVER_BACKEND=numpy (see ingestion/export_numpy_index.py).
+"""
+
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import asyncio
+import argparse
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def limit_torch_threads(threads: int):
+    """
+    One intra-op thread per worker: N workers already use N cores, and an
+    OpenMP pool created in the parent deadlocks in forked children
+    """
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def load_shared_rag():
+    """Build and warm everything the workers will share"""
+    from agent.rag import LennyRAG
+
+    start = time.perf_counter()
+    rag = LennyRAG()
+    # Touch the model, the mmap'd vectors and the prompt path once, so the
+    # pages are resident before fork instead of faulted in by every worker
+    rag.retriever.search_dual_stream("warmup", top_k=1)
+    if rag.reranker is not None:
+        rag.reranker.wait_ready()
+    print(f"✅ Shared LennyRAG loaded in {time.perf_counter() - start:.2f}s")
+    return rag
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve_worker(rag, sock: socket.socket):
+    """Runs in a forked child; never returns"""
+    import uvicorn
+    from app.api import create_app
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    gc.enable()
+    if rag.reranker is not None:
+        rag.reranker.after_fork()
+
+    status = 0
+    try:
+        config = uvicorn.Config(
+            create_app(rag),
+            log_level=os.getenv('PREFORK_LOG_LEVEL', 'warning'),
+            access_log=False
+        )
+        asyncio.run(uvicorn.Server(config).serve(sockets=[sock]))
+    except Exception as e:
+        print(f"❌ Worker {os.getpid()} failed: {e}")
+        status = 1
+    finally:
+        sys.stdout.flush()
+        # Skip the parent's atexit handlers and finalizers
+        os._exit(status)
+
+
+def fork_worker(rag, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        serve_worker(rag, sock)
+    return pid
+
+
+def supervise(rag, sock: socket.socket, workers: int):
+    """Fork `workers` children, replace any that die, stop them all on SIGTERM/SIGINT"""
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    children = set()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children.add(fork_worker(rag, sock))
+    print(f"🚀 {workers} workers forked: {sorted(children)}")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited (status {status}), forking a replacement")
+            children.add(fork_worker(rag, sock))
+
+    sock.close()
+    print("👋 All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork LennyRAG API server")
+    parser.add_argument("--host", default=os.getenv('API_HOST', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=int(os.getenv('API_PORT', 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv('PREFORK_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument("--torch-threads", type=int, default=int(os.getenv('PREFORK_TORCH_THREADS', 1)))
+    args = parser.parse_args()
+
+    backend = os.getenv('RETRIEVER_BACKEND', 'chroma').lower()
+    if backend != 'numpy':
+        print(f"❌ Pre-fork mode needs RETRIEVER_BACKEND=numpy (got '{backend}'): "
+              f"the Chroma client hangs in forked workers. "
+              f"Export the index with ingestion/export_numpy_index.py")
+        sys.exit(1)
+
+    # Objects allocated from here on are shared with the workers; keep the
+    # collector off until they are frozen out of its generations
+    gc.disable()
+    limit_torch_threads(args.torch_threads)
+    rag = load_shared_rag()
+    sock = bind_socket(args.host, args.port)
+
+    gc.collect()
+    gc.freeze()
+    print(f"🧊 {gc.get_freeze_count()} objects frozen; serving on http://{args.host}:{args.port}")
+
+    supervise(rag, sock, args.workers)
+
+
+if __name__ == "__main__":
+    main()
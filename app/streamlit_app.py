@@ -1,5 +1,7 @@
 import streamlit as st
+import os
 import sys
+import uuid
 from pathlib import Path
 
 # ✅ Fix: Add project root to Python path
@@ -15,11 +17,16 @@ st.set_page_config(
     layout="centered"
 )
 
+# Rendered history is capped; older context lives in the RAG session summary
+MAX_MESSAGES = int(os.getenv('STREAMLIT_MAX_MESSAGES', 40))
+
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = [
         {"role": "assistant", "content": "Hey! 👋 I'm **LennyBot**. What's on your mind?"}
     ]
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # Load RAG engine with error handling
 @st.cache_resource(show_spinner=False)
@@ -47,6 +54,7 @@ with st.sidebar:
     top_k = st.slider("Sources", 3, 7, 5)
     if st.button("🗑️ Clear Chat"):
         st.session_state.messages = [st.session_state.messages[0]]
+        rag.conversations.reset(st.session_state.session_id)
         st.rerun()
 
 # Main UI
@@ -79,36 +87,25 @@ if prompt := st.chat_input("Ask Lenny..."):
         full_response = ""
         
         try:
-            # Stream response
-            for chunk in rag.query(
+            # One retrieval: sources are ready before the first token.
+            # Earlier turns come from the bounded per-session memory.
+            result = rag.chat(
+                st.session_state.session_id,
                 question=prompt,
                 top_k=top_k,
                 temperature=temperature,
                 stream=True
-            ):
+            )
+            sources = result['sources']
+            
+            # Stream response
+            for chunk in result['response_stream']:
                 full_response += chunk
                 message_placeholder.markdown(full_response + "▌")
             
             # Remove cursor
             message_placeholder.markdown(full_response)
             
-            # Get sources
-            lenny_chunks, guest_chunks = rag._get_dual_stream_context(prompt, top_k)
-            all_chunks = lenny_chunks + guest_chunks
-            
-            sources = []
-            seen_urls = set()
-            for chunk in sorted(all_chunks, key=lambda x: x['score'], reverse=True):
-                url = chunk.get('source_url')
-                if url and url not in seen_urls:
-                    sources.append({
-                        "type": chunk['source'],
-                        "url": url,
-                        "score": chunk['score'],
-                        "authority": "Lenny's Core Belief" if chunk['source'] == 'linkedin' else "Guest Case Study"
-                    })
-                    seen_urls.add(url)
-            
             # Display sources
             if sources:
                 with st.expander(f"📚 {len(sources)} Sources"):
@@ -123,6 +120,11 @@ if prompt := st.chat_input("Ask Lenny..."):
                 "content": full_response,
                 "sources": sources
             })
+            # Keep the greeting plus the most recent messages
+            if len(st.session_state.messages) > MAX_MESSAGES + 1:
+                st.session_state.messages = (
+                    st.session_state.messages[:1] + st.session_state.messages[-MAX_MESSAGES:]
+                )
             
         except Exception as e:
             st.error(f"❌ Error generating response: {e}")
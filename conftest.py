@@ -0,0 +1,101 @@
+# Shared fixtures: LennyRAG over a stub retriever, generating against the
+# local NIM stand-in (evaluation/mock_nim_server.py) - no model, index or API key
+import hashlib
+
+import numpy as np
+import pytest
+
+from evaluation.mock_nim_server import MockNIMConfig, start_in_thread
+
+
+class StubEmbedder:
+    """QueryEmbedder stand-in: deterministic vectors, counts real encodes"""
+
+    def __init__(self):
+        self.vectors = {}
+        self.encodes = 0
+
+    def cached(self, query):
+        return self.vectors.get(query.lower())
+
+    def embed(self, query):
+        if query.lower() not in self.vectors:
+            self.encodes += 1
+            seed = int(hashlib.md5(query.lower().encode()).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(16).astype(np.float32)
+            self.vectors[query.lower()] = vector / np.linalg.norm(vector)
+        return self.vectors[query.lower()]
+
+
+class StubRetriever:
+    """Two chunks per stream; `lexical=True` answers like the BM25 fast path (no embedding)"""
+
+    def __init__(self):
+        self.embedder = StubEmbedder()
+        self.lexical = False
+        self.searches = 0
+
+    def index_version(self):
+        return "4:stub"
+
+    def embed_query(self, query):
+        return self.embedder.embed(query)
+
+    def _chunks(self, source, query):
+        return [
+            {
+                'id': f"{source}-{i}",
+                'text': f"{source} chunk {i} about {query}",
+                'source': source,
+                'source_url': f"https://example.com/{source}/{i}",
+                'score': 0.8 - i * 0.1,
+                'metadata': {},
+                **({'retrieval': 'lexical'} if self.lexical else {}),
+            }
+            for i in range(2)
+        ]
+
+    def search_dual_stream(self, query, sources=("linkedin", "youtube"), top_k=3):
+        self.searches += 1
+        if not self.lexical:
+            self.embed_query(query)
+        return {source: self._chunks(source, query) for source in sources}
+
+    def search_with_filters(self, query, source_filter=None, top_k=5):
+        self.searches += 1
+        self.embed_query(query)
+        return self._chunks(source_filter, query)
+
+
+@pytest.fixture
+def mock_nim(monkeypatch):
+    """Fast mock NIM; its config is mutable (error_rate, ttft_ms, ...) and counts requests"""
+    config = MockNIMConfig(ttft_ms=0, tokens_per_sec=2000)
+    server, base_url = start_in_thread(config)
+    monkeypatch.setenv('NVIDIA_API_KEY', 'mock')
+    monkeypatch.setenv('NVIDIA_BASE_URL', base_url)
+    for name in ('LLM_CASSETTE_MODE', 'LLM_COMPLETION_CACHE_PATH', 'RERANK_ENABLED', 'MODEL_ROUTING'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('ANSWER_STORE_ENABLED', '0')
+    yield config
+    server.shutdown()
+
+
+@pytest.fixture
+def make_rag(monkeypatch, mock_nim):
+    """make_rag(ANSWER_CACHE_ENABLED='1', ...) -> LennyRAG over a StubRetriever"""
+    from agent.rag import LennyRAG
+
+    monkeypatch.setattr(LennyRAG, '_load_retriever', lambda self: StubRetriever())
+    built = []
+
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        rag = LennyRAG()
+        built.append(rag)
+        return rag
+
+    yield make
+    for rag in built:
+        rag.close()
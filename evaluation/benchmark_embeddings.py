@@ -0,0 +1,81 @@
+"""
+evaluation/benchmark_embeddings.py
+CPU embedding backends: parity vs PyTorch, single-query latency, batch throughput
+"""
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.embedding_backend import (
+    EMBEDDING_BACKENDS,
+    PARITY_SENTENCES,
+    check_parity,
+    load_embedding_model,
+)
+
+
+def time_single_queries(model, sentences, rounds: int) -> np.ndarray:
+    latencies = []
+    for _ in range(rounds):
+        for sentence in sentences:
+            start = time.perf_counter()
+            model.encode(sentence, convert_to_numpy=True, show_progress_bar=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def time_batch(model, sentences, batch_size: int) -> float:
+    """Sentences per second for one large encode call"""
+    start = time.perf_counter()
+    model.encode(sentences, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    return len(sentences) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends on CPU")
+    parser.add_argument("--model", default=os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'))
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threshold", type=float, default=float(os.getenv('EMBEDDING_PARITY_THRESHOLD', 0.99)))
+    args = parser.parse_args()
+
+    print(f"📥 Loading reference (torch): {args.model}")
+    reference = load_embedding_model(args.model, "torch")
+
+    # A batch corpus of chunk-sized texts
+    corpus = [" ".join(PARITY_SENTENCES[i % len(PARITY_SENTENCES):] * 4) for i in range(512)]
+
+    rows = []
+    for backend in args.backends:
+        try:
+            start = time.perf_counter()
+            model = reference if backend == "torch" else load_embedding_model(args.model, backend)
+            load_s = time.perf_counter() - start
+        except Exception as e:
+            print(f"⏭️  Skipping {backend}: {e}")
+            continue
+
+        # Warm up
+        model.encode(PARITY_SENTENCES, convert_to_numpy=True, show_progress_bar=False)
+
+        parity = check_parity(model, reference, threshold=args.threshold)
+        latencies = time_single_queries(model, PARITY_SENTENCES, args.rounds)
+        throughput = time_batch(model, corpus, args.batch_size)
+        rows.append((backend, load_s, parity, latencies, throughput))
+
+    print(f"\n{'backend':10s} {'load s':>7s} {'min cos':>8s} {'parity':>7s} "
+          f"{'p50 ms':>7s} {'p99 ms':>7s} {'batch/s':>8s}")
+    for backend, load_s, parity, latencies, throughput in rows:
+        print(
+            f"{backend:10s} {load_s:7.2f} {parity['min_cosine']:8.4f} "
+            f"{'✅' if parity['passed'] else '❌':>6s} "
+            f"{np.percentile(latencies, 50):7.2f} {np.percentile(latencies, 99):7.2f} "
+            f"{throughput:8.1f}"
+        )
@@ -0,0 +1,216 @@
+"""
+evaluation/benchmark_prefork.py
+Memory per worker and throughput scaling: pre-fork server vs uvicorn --workers
+
+For each worker count N, starts app/prefork_server.py (one load, forked
+workers) and `uvicorn app.api:app --workers N` (every worker loads its own
+copy), reads RSS and PSS of every worker from /proc, and drives POST
+/v1/query with distinct questions. Generation goes to an in-process mock NIM
+with no delays, so throughput measures embedding, retrieval, prompt building
+and HTTP - the parts that scale with cores. Linux only (/proc/<pid>/smaps_rollup).
+
+    python evaluation/benchmark_prefork.py --workers 1 2 4 --requests 400
+"""
+
+import sys
+import os
+import time
+import json
+import argparse
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from evaluation.mock_nim_server import MockNIMConfig, start_in_thread
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+TOPICS = [
+    "product-market fit", "retention benchmarks", "hiring my first PM",
+    "North Star Metric", "conversion rates", "churn", "pricing", "onboarding",
+]
+
+
+def memory_mb(pid: int) -> dict:
+    """Rss and Pss (resident memory with shared pages split between sharers)"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                values[name.lower()] = int(rest.split()[0]) / 1024
+    return values
+
+
+def descendants(pid: int) -> list:
+    """All live descendants of `pid` (uvicorn --workers adds a spawn helper level)"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # Field 4 is the ppid; comm (field 2) may contain spaces
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            parents.setdefault(ppid, []).append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def worker_pids(pid: int) -> list:
+    """Serving processes under `pid`, skipping multiprocessing's resource tracker"""
+    workers = []
+    for child in descendants(pid):
+        try:
+            with open(f"/proc/{child}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if b"resource_tracker" not in cmdline:
+            workers.append(child)
+    return workers
+
+
+def request(port: int, path: str, body: dict = None, timeout: float = 60.0):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        if body is None:
+            conn.request("GET", path)
+        else:
+            conn.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def wait_ready(port: int, proc: subprocess.Popen, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            if request(port, "/readyz", timeout=2.0) == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def drive(port: int, requests: int, concurrency: int, offset: int) -> dict:
+    """Fire `requests` distinct questions at `concurrency`; returns req/s and errors"""
+    def one(i):
+        question = f"What should I know about {TOPICS[i % len(TOPICS)]}? (case {offset + i})"
+        try:
+            return request(port, "/v1/query", {"question": question, "temperature": 0.7})
+        except OSError:
+            return 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    ok = sum(status == 200 for status in statuses)
+    return {"rps": ok / elapsed, "errors": requests - ok}
+
+
+def run_mode(mode: str, workers: int, port: int, env: dict, args) -> dict:
+    if mode == "prefork":
+        command = [sys.executable, os.path.join(ROOT, "app", "prefork_server.py"),
+                   "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.api:app", "--workers", str(workers),
+                   "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_ready(port, proc, args.startup_timeout):
+            print(f"   ❌ {mode} x{workers} did not become ready")
+            return None
+        # Every worker must be up (and warm) before memory is sampled
+        deadline = time.time() + args.startup_timeout
+        while time.time() < deadline:
+            drive(port, workers * 4, workers, offset=0)
+            if len(worker_pids(proc.pid)) >= workers:
+                break
+            time.sleep(1.0)
+
+        drive(port, args.warmup, args.concurrency, offset=10_000)
+        result = drive(port, args.requests, args.concurrency, offset=20_000)
+
+        worker_memory = [memory_mb(pid) for pid in worker_pids(proc.pid)]
+        parent = memory_mb(proc.pid)
+        total_pss = parent["pss"] + sum(m["pss"] for m in worker_memory)
+        result.update({
+            "workers": len(worker_memory),
+            "rss_per_worker": sum(m["rss"] for m in worker_memory) / max(len(worker_memory), 1),
+            "pss_per_worker": sum(m["pss"] for m in worker_memory) / max(len(worker_memory), 1),
+            "total_pss": total_pss,
+        })
+        return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork vs uvicorn --workers: memory and throughput")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", default=["prefork", "uvicorn"], choices=["prefork", "uvicorn"])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    # Instant generation: the benchmark is about the CPU side of a request
+    mock, base_url = start_in_thread(MockNIMConfig(ttft_ms=0, tokens_per_sec=1e6))
+    env = dict(
+        os.environ,
+        NVIDIA_BASE_URL=base_url,
+        NVIDIA_API_KEY=os.getenv('NVIDIA_API_KEY', 'mock'),
+        RETRIEVER_BACKEND='numpy',
+        API_MAX_CONCURRENCY=str(args.concurrency),
+        # Nothing may let a request skip the pipeline
+        ANSWER_CACHE_ENABLED='0',
+        COALESCE_REQUESTS='0',
+        LLM_COMPLETION_CACHE_PATH='',
+    )
+
+    print("=" * 84)
+    print(f"{'Mode':<10} {'N':>3} {'req/s':>9} {'x N=1':>7} {'RSS/worker':>12} {'PSS/worker':>12} {'total PSS':>11} {'errors':>7}")
+    print("=" * 84)
+    for mode in args.modes:
+        baseline = None
+        for workers in args.workers:
+            result = run_mode(mode, workers, args.port, env, args)
+            if result is None:
+                continue
+            baseline = baseline or result["rps"]
+            print(f"{mode:<10} {workers:>3} {result['rps']:>9.1f} {result['rps'] / baseline:>6.2f}x "
+                  f"{result['rss_per_worker']:>10.0f}MB {result['pss_per_worker']:>10.0f}MB "
+                  f"{result['total_pss']:>9.0f}MB {result['errors']:>7}")
+    print("=" * 84)
+    print("PSS splits shared pages between the processes mapping them; total PSS is what")
+    print("the service really costs. Pre-fork workers share the model, chunk metadata and")
+    print("the mmap'd vectors, so their PSS shrinks as N grows while RSS stays flat.")
+
+    mock.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+evaluation/benchmark_retrieval.py
+Dual-stream retrieval benchmark: two filtered searches vs single-pass search
+"""
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.chroma_retriever import ChromaRetriever
+
+QUESTIONS = [
+    "What is product-market fit?",
+    "What are good retention benchmarks for B2B SMB?",
+    "How should I hire my first PM?",
+    "What is a North Star Metric?",
+    "How do I increase conversion rates?",
+    "How do I know if I have Product Market Fit?",
+    "Should I hire a PM?",
+    "How do I reduce churn?",
+]
+
+
+class QueryCounter:
+    """Wraps a Chroma collection and counts `query` round-trips"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.calls = 0
+
+    def query(self, *args, **kwargs):
+        self.calls += 1
+        return self._collection.query(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+def two_pass(retriever: ChromaRetriever, question: str):
+    """The original stratified retrieval: one filtered search per source"""
+    lenny_chunks = retriever.search_with_filters(question, source_filter="linkedin", top_k=3)
+    guest_chunks = retriever.search_with_filters(question, source_filter="youtube", top_k=3)
+    return lenny_chunks, guest_chunks
+
+
+def single_pass(retriever: ChromaRetriever, question: str):
+    streams = retriever.search_dual_stream(question, sources=("linkedin", "youtube"), top_k=3)
+    return streams["linkedin"], streams["youtube"]
+
+
+def run_benchmark(retriever: ChromaRetriever, fn, rounds: int):
+    counter = QueryCounter(retriever.collection)
+    retriever.collection = counter
+
+    # Measure the retrieval path itself, not the result cache
+    result_cache, retriever.result_cache = retriever.result_cache, None
+
+    latencies = []
+    try:
+        for _ in range(rounds):
+            for question in QUESTIONS:
+                # Drop cached vectors so every call pays for embedding too
+                retriever.embedder.cache.clear()
+                start = time.perf_counter()
+                fn(retriever, question)
+                latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        retriever.collection = counter._collection
+        retriever.result_cache = result_cache
+
+    latencies = np.array(latencies)
+    return {
+        "p50": np.percentile(latencies, 50),
+        "p95": np.percentile(latencies, 95),
+        "mean": latencies.mean(),
+        "queries_per_question": counter.calls / len(latencies),
+    }
+
+
+def check_parity(retriever: ChromaRetriever):
+    """Both paths should return the same chunks per stream"""
+    mismatches = 0
+    for question in QUESTIONS:
+        old = two_pass(retriever, question)
+        new = single_pass(retriever, question)
+        for old_stream, new_stream in zip(old, new):
+            if [c['text'] for c in old_stream] != [c['text'] for c in new_stream]:
+                mismatches += 1
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dual-stream retrieval")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    retriever = ChromaRetriever()
+    if not retriever.collection:
+        sys.exit(1)
+
+    # Warm up the model and the index
+    for question in QUESTIONS:
+        two_pass(retriever, question)
+        single_pass(retriever, question)
+
+    print(f"\n🔁 Parity check: {check_parity(retriever)} mismatched streams")
+
+    print(f"\n⏱️  {args.rounds} rounds x {len(QUESTIONS)} questions\n")
+    for name, fn in [("two-pass", two_pass), ("single-pass", single_pass)]:
+        stats = run_benchmark(retriever, fn, args.rounds)
+        print(
+            f"{name:12s} p50={stats['p50']:.2f}ms  p95={stats['p95']:.2f}ms  "
+            f"mean={stats['mean']:.2f}ms  queries/question={stats['queries_per_question']:.2f}"
+        )
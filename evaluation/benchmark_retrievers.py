@@ -0,0 +1,132 @@
+"""
+evaluation/benchmark_retrievers.py
+ChromaRetriever vs NumpyRetriever: p50/p99 latency, memory and recall@k
+
+Each backend runs in its own process so resident memory is not shared.
+Query vectors are embedded up front, so the timings measure the index path
+(search + metadata + formatting), not the SentenceTransformer.
+"""
+
+import sys
+import os
+import time
+import argparse
+import multiprocessing as mp
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Kept local: importing benchmark_retrieval would pull chromadb into the numpy process
+QUESTIONS = [
+    "What is product-market fit?",
+    "What are good retention benchmarks for B2B SMB?",
+    "How should I hire my first PM?",
+    "What is a North Star Metric?",
+    "How do I increase conversion rates?",
+    "How do I know if I have Product Market Fit?",
+    "Should I hire a PM?",
+    "How do I reduce churn?",
+]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def load_retriever(backend: str):
+    if backend == "numpy":
+        from agent.numpy_retriever import NumpyRetriever
+        return NumpyRetriever()
+    from agent.chroma_retriever import ChromaRetriever
+    return ChromaRetriever()
+
+
+def run_backend(backend: str, rounds: int, top_k: int, queue):
+    rss_start = rss_mb()
+    start = time.perf_counter()
+    retriever = load_retriever(backend)
+    load_time = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    # Pre-embed so both backends see identical vectors and no model time
+    vectors = retriever.embed_queries(QUESTIONS)
+
+    latencies = {"all": [], "linkedin": [], "youtube": []}
+    results = {}
+    for round_index in range(rounds + 1):
+        for question, vector in zip(QUESTIONS, vectors):
+            for source in latencies:
+                source_filter = None if source == "all" else source
+                t0 = time.perf_counter()
+                if backend == "numpy":
+                    rows = retriever._rows_for(source_filter)
+                    hits = retriever._search_rows(vector, *rows, top_k)
+                else:
+                    hits = retriever._query_source(vector, source_filter, top_k)
+                elapsed = (time.perf_counter() - t0) * 1000
+
+                # First round is warmup
+                if round_index > 0:
+                    latencies[source].append(elapsed)
+                results[(question, source)] = [h['text'] for h in hits]
+
+    queue.put({
+        "backend": backend,
+        "load_s": load_time,
+        "rss_index_mb": rss_loaded - rss_start,
+        "rss_peak_mb": rss_mb(),
+        "latencies": {k: np.array(v) for k, v in latencies.items()},
+        "results": results,
+    })
+
+
+def recall_at_k(reference: dict, candidate: dict) -> float:
+    """Share of exact (numpy) top-k hits that the candidate also returned"""
+    overlap, total = 0, 0
+    for key, expected in reference.items():
+        got = set(candidate.get(key, []))
+        overlap += sum(1 for text in expected if text in got)
+        total += len(expected)
+    return overlap / total if total else 0.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Chroma vs NumPy retrieval")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    reports = {}
+    for backend in ("chroma", "numpy"):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_backend, args=(backend, args.rounds, args.top_k, queue))
+        proc.start()
+        reports[backend] = queue.get()
+        proc.join()
+
+    print(f"\n⏱️  {args.rounds} rounds x {len(QUESTIONS)} questions, top_k={args.top_k}\n")
+    print(f"{'backend':8s} {'filter':9s} {'p50 ms':>8s} {'p99 ms':>8s}")
+    for backend, report in reports.items():
+        for source, values in report["latencies"].items():
+            print(
+                f"{backend:8s} {source:9s} "
+                f"{np.percentile(values, 50):8.3f} {np.percentile(values, 99):8.3f}"
+            )
+
+    print(f"\n🧠 Memory / startup")
+    for backend, report in reports.items():
+        print(
+            f"{backend:8s} load={report['load_s']:.2f}s  "
+            f"index+model RSS=+{report['rss_index_mb']:.0f}MB  "
+            f"total RSS={report['rss_peak_mb']:.0f}MB"
+        )
+
+    recall = recall_at_k(reports["numpy"]["results"], reports["chroma"]["results"])
+    print(f"\n🎯 Chroma recall@{args.top_k} vs exact search: {recall:.3f}")
@@ -50,10 +50,18 @@ TEST_CASES = [
     }
 ]
 
+# Not in TEST_CASES, so warming up never fills the caches for timed questions
+WARMUP_QUESTIONS = [
+    "Warmup: how do early-stage startups usually grow?",
+    "Warmup: what do good onboarding flows have in common?",
+]
+
 class ComprehensiveEvaluator:
     def __init__(self):
         print("⚙️ Initializing Evaluator...")
         self.rag = LennyRAG()
+        # The precomputed answers are built from these very questions; evaluate the live pipeline
+        self.rag.answer_store = None
         self.judge = NvidiaLlamaClient()
         self.judge.model = "meta/llama-3.1-70b-instruct" # Use the big brain for judging
 
@@ -99,8 +107,30 @@ class ComprehensiveEvaluator:
         except:
             return {"faithfulness": 0, "style": 0, "accuracy": 0, "reasoning": "Error"}
 
+    def warmup(self):
+        """
+        Load the model and touch the index with questions outside the timed
+        set (one batched encode + query): latency then excludes one-off warmup
+        but still includes the embedding and retrieval of every test question
+        """
+        self.rag.retriever.search_batch(WARMUP_QUESTIONS, top_k=3)
+
+    def retrieval_confidence(self):
+        """
+        Mean vector similarity of the top 3 chunks per test question, from one
+        batched search. Untimed, and run after the timed loop so it can't
+        pre-cache anything; pure vector scores, unlike the answered chunks
+        (which may be lexical or reranked).
+        """
+        results = self.rag.retriever.search_batch([test['question'] for test in TEST_CASES], top_k=3)
+        return [
+            sum(c['score'] for c in chunks) / len(chunks) if chunks else 0.0
+            for chunks in results
+        ]
+
     def run(self):
         results = []
+        self.warmup()
         print(f"\n🚀 Starting Comprehensive Evaluation on {len(TEST_CASES)} cases...\n")
         
         for test in tqdm(TEST_CASES):
@@ -112,14 +142,6 @@ class ComprehensiveEvaluator:
             
             response = rag_result['response']
             chunks = rag_result['chunks']
-            
-            # --- METRIC 2: RETRIEVAL CONFIDENCE ---
-            # Average similarity score of the top 3 chunks
-            if chunks:
-                top_scores = [c['score'] for c in chunks[:3]]
-                retrieval_confidence = sum(top_scores) / len(top_scores)
-            else:
-                retrieval_confidence = 0.0
 
             # --- METRIC 3: GENERATION QUALITY (LLM JUDGE) ---
             judge_scores = self.evaluate_generation(
@@ -130,13 +152,17 @@ class ComprehensiveEvaluator:
                 "Category": test['category'],
                 "Question": test['question'],
                 "Latency (s)": round(latency, 2),
-                "Retrieval Conf": round(retrieval_confidence, 3),
+                "Retrieval Conf": None,  # filled in by the batched pass below
                 "Faithfulness": judge_scores['faithfulness'],
                 "Style Score": judge_scores['style'],
                 "Accuracy": judge_scores['accuracy'],
                 "Judge Reasoning": judge_scores['reasoning']
             })
 
+        # --- METRIC 2: RETRIEVAL CONFIDENCE ---
+        for row, confidence in zip(results, self.retrieval_confidence()):
+            row["Retrieval Conf"] = round(confidence, 3)
+
         # --- REPORTING ---
         df = pd.DataFrame(results)
         
@@ -30,6 +30,8 @@ EVAL_SET = [
 class LennyEvaluator:
     def __init__(self):
         self.rag = LennyRAG()
+        # The precomputed answers are built from these very questions; evaluate the live pipeline
+        self.rag.answer_store = None
         self.judge = NvidiaLlamaClient()  # The Judge LLM
         with open('agent/lenny_dna.json', 'r') as f:
             self.dna = json.load(f)
@@ -0,0 +1,254 @@
+"""
+evaluation/mock_nim_server.py
+Local OpenAI-compatible stand-in for NVIDIA NIM (stdlib only)
+
+Speaks POST /v1/chat/completions (streaming SSE included) and GET /v1/models
+with configurable time-to-first-token, tokens/sec, jitter and error rate,
+so the whole pipeline can be benchmarked offline:
+
+    python evaluation/mock_nim_server.py --port 8900 --ttft-ms 300 --tokens-per-sec 40
+    NVIDIA_BASE_URL=http://127.0.0.1:8900/v1 NVIDIA_API_KEY=mock streamlit run app/streamlit_app.py
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_RESPONSE = (
+    "Look, here's the thing about product-market fit: you'll know it when retention "
+    "curves flatten. I've talked to hundreds of founders, and the ones who found PMF "
+    "all describe the same moment - users start pulling the product out of their hands. "
+    "Before that, don't scale. Fix retention first, then pour fuel on growth. "
+    "If 40% of your users would be very disappointed without you, you're close. "
+    "Talk to those users, figure out what they love, and double down on it."
+)
+
+
+class MockNIMConfig:
+    def __init__(
+        self,
+        ttft_ms: float = 300.0,
+        tokens_per_sec: float = 40.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        mode: str = "canned",
+        response_text: str = CANNED_RESPONSE,
+        seed: int = 0
+    ):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.mode = mode
+        self.response_text = response_text
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def jittered(self, seconds: float) -> float:
+        """`seconds` scaled by a uniform factor in [1 - jitter, 1 + jitter]"""
+        if not self.jitter:
+            return seconds
+        return max(seconds * (1 + (self.draw() * 2 - 1) * self.jitter), 0.0)
+
+
+def tokenize(text: str):
+    """Word-with-trailing-space pieces, roughly one per LLM token"""
+    return re.findall(r"\S+\s*", text)
+
+
+class MockNIMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: MockNIMConfig = MockNIMConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", "/v1/health/ready"):
+            return self._send_json(200, {"status": "ok", "requests": self.config.requests, "errors": self.config.errors})
+        if self.path.rstrip("/") == "/v1/models":
+            return self._send_json(200, {"object": "list", "data": [
+                {"id": "meta/llama-3.1-70b-instruct", "object": "model", "owned_by": "mock"},
+                {"id": "meta/llama-3.1-8b-instruct", "object": "model", "owned_by": "mock"},
+            ]})
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return self._send_json(400, {"error": {"message": "Invalid JSON", "type": "invalid_request_error"}})
+
+        config = self.config
+        with config._lock:
+            config.requests += 1
+
+        if config.error_rate and config.draw() < config.error_rate:
+            with config._lock:
+                config.errors += 1
+            return self._send_json(config.error_status, {
+                "error": {"message": "Injected failure", "type": "server_error", "code": config.error_status}
+            })
+
+        messages = body.get("messages", [])
+        model = body.get("model", "meta/llama-3.1-70b-instruct")
+        tokens = tokenize(self._response_text(messages))[:int(body.get("max_tokens") or 1000)]
+        usage = {
+            "prompt_tokens": sum(len(tokenize(m.get("content", ""))) for m in messages),
+            "completion_tokens": len(tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            self._stream(model, tokens, usage if include_usage else None)
+        else:
+            time.sleep(config.jittered(config.ttft_ms / 1000))
+            time.sleep(config.jittered(max(len(tokens) - 1, 0) / config.tokens_per_sec))
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+    def _response_text(self, messages) -> str:
+        if self.config.mode == "echo":
+            user = [m.get("content", "") for m in messages if m.get("role") == "user"]
+            return user[-1] if user else ""
+        return self.config.response_text
+
+    def _stream(self, model: str, tokens, usage):
+        config = self.config
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        def chunk(delta, finish_reason=None, chunk_usage=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if chunk_usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if chunk_usage:
+                payload["usage"] = chunk_usage
+            return f"data: {json.dumps(payload)}\n\n".encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            time.sleep(config.jittered(config.ttft_ms / 1000))
+            self._write_chunk(chunk({"role": "assistant", "content": ""}))
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(config.jittered(1 / config.tokens_per_sec))
+                self._write_chunk(chunk({"content": token}))
+            self._write_chunk(chunk({}, finish_reason="stop"))
+            if usage:
+                self._write_chunk(chunk({}, chunk_usage=usage))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-stream (cancelled request, losing hedge)
+            self.close_connection = True
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockNIMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes load tests measure SYN retries
+    request_queue_size = 1024
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8900, config: MockNIMConfig = None) -> ThreadingHTTPServer:
+    """Bound (not yet serving) server; port=0 picks a free port"""
+    handler = type("ConfiguredMockNIMHandler", (MockNIMHandler,), {"config": config or MockNIMConfig()})
+    return MockNIMServer((host, port), handler)
+
+
+def start_in_thread(config: MockNIMConfig = None, host: str = "127.0.0.1", port: int = 0):
+    """Serve from a daemon thread; returns (server, base_url) for in-process benchmarks"""
+    server = create_server(host, port, config)
+    threading.Thread(target=server.serve_forever, daemon=True, name="mock-nim").start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible NIM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv('MOCK_NIM_PORT', 8900)))
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Delay before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=40.0)
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative +/- jitter on every delay (0-1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--mode", choices=["canned", "echo"], default="canned")
+    parser.add_argument("--response-file", help="Text file to use as the canned response")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    response_text = CANNED_RESPONSE
+    if args.response_file:
+        with open(args.response_file, 'r', encoding='utf-8') as f:
+            response_text = f.read()
+
+    config = MockNIMConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        mode=args.mode,
+        response_text=response_text,
+        seed=args.seed,
+    )
+    server = create_server(args.host, args.port, config)
+    print(f"🧪 Mock NIM listening on http://{args.host}:{server.server_address[1]}/v1")
+    print(f"   TTFT {args.ttft_ms:.0f}ms | {args.tokens_per_sec:.0f} tok/s | "
+          f"error rate {args.error_rate:.0%} | mode {args.mode}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
@@ -0,0 +1,108 @@
+"""
+ingestion/build_answer_store.py
+Pregenerate answers for canonical questions into precomputed_answers.json.gz
+
+Default questions: TEST_CASES (evaluation/eval.py), EVAL_SET
+(evaluation/evaluation.py) and the LennyPersona core-framework topics.
+LennyRAG serves exact/normalized matches from the artifact at startup
+(see agent/answer_store.py) to requests with the same temperature, top_k
+and max_tokens as the build (defaults match LennyRAG's). Rebuild after
+re-ingesting: the artifact is tied to the index version it was built against.
+
+    uv run python ingestion/build_answer_store.py --questions extra_questions.txt
+"""
+
+import sys
+import os
+import time
+import argparse
+from typing import List
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.answer_store import AnswerStore, DEFAULT_ANSWER_STORE_PATH, normalize_question
+
+FRAMEWORK_QUESTION_TEMPLATES = [
+    "What is {topic}?",
+    "How do I think about {topic}?",
+]
+
+
+def canonical_questions(extra_file: str = None, include_defaults: bool = True) -> List[str]:
+    """Default question sets plus one question per line of `extra_file`, deduplicated"""
+    questions = []
+    if include_defaults:
+        from evaluation.eval import TEST_CASES
+        from evaluation.evaluation import EVAL_SET
+        from agent.persona import LennyPersona
+
+        questions += [test['question'] for test in TEST_CASES]
+        questions += [item['question'] for item in EVAL_SET]
+        for topic in LennyPersona().core_frameworks:
+            questions += [template.format(topic=topic) for template in FRAMEWORK_QUESTION_TEMPLATES]
+
+    if extra_file:
+        with open(extra_file, 'r', encoding='utf-8') as f:
+            questions += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    unique, seen = [], set()
+    for question in questions:
+        key = normalize_question(question)
+        if key not in seen:
+            seen.add(key)
+            unique.append(question)
+    return unique
+
+
+def build(questions: List[str], output: str, top_k: int, temperature: float, max_tokens: int):
+    from agent.rag import LennyRAG
+
+    rag = LennyRAG()
+    # Generate fresh: never answer from the artifact being rebuilt or a cache
+    rag.answer_store = None
+    rag.answer_cache = None
+
+    index_version = rag.retriever.index_version() if hasattr(rag.retriever, 'index_version') else None
+    store = AnswerStore([], meta={
+        "index_version": index_version,
+        "embedding_model": rag.retriever.embedding_model_name,
+        "llm_model": rag.llm.model,
+        "temperature": temperature,
+        "top_k": top_k,
+        "max_tokens": max_tokens,
+    })
+
+    start = time.perf_counter()
+    for i, question in enumerate(questions, 1):
+        print(f"[{i}/{len(questions)}] {question}")
+        try:
+            result = rag.query_with_metadata(
+                question, top_k=top_k, temperature=temperature, stream=False, max_tokens=max_tokens
+            )
+        except Exception as e:
+            print(f"   ❌ Skipped: {e}")
+            continue
+        store.add(question, result['response'], result['sources'], result['chunks'])
+
+    store.save(output)
+    size_kb = os.path.getsize(output) / 1024
+    print(f"\n✅ {len(store)}/{len(questions)} answers written to {output} "
+          f"({size_kb:.1f} KB, {time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pregenerate answers for canonical questions")
+    parser.add_argument("--questions", help="Extra questions, one per line ('#' comments allowed)")
+    parser.add_argument("--no-defaults", action="store_true", help="Only use --questions")
+    parser.add_argument("--output", default=os.getenv('ANSWER_STORE_PATH', DEFAULT_ANSWER_STORE_PATH))
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--max-tokens", type=int, default=1000)
+    args = parser.parse_args()
+
+    questions = canonical_questions(args.questions, include_defaults=not args.no_defaults)
+    if not questions:
+        print("❌ No questions to build")
+        sys.exit(1)
+    build(questions, args.output, args.top_k, args.temperature, args.max_tokens)
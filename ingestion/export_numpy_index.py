@@ -0,0 +1,143 @@
+"""
+Export chunks + embeddings into a flat NumPy index for NumpyRetriever
+
+Layout of the output directory:
+    vectors.npy    float32 [n_chunks, dim], L2-normalized, rows grouped by source
+    chunks.json    per-row id / text / source / source_url / metadata
+    manifest.json  embedding model, dim, count, per-source row ranges and a
+                   content hash (NumpyRetriever.index_version)
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import List, Dict
+from dotenv import load_dotenv
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.numpy_retriever import index_content_hash
+
+load_dotenv()
+
+
+class NumpyIndexExporter:
+    def __init__(self, output_dir: str = "./numpy_index"):
+        self.output_dir = output_dir
+        self.collection_name = os.getenv('CHROMA_COLLECTION_NAME', 'lenny_clone')
+        self.embedding_model_name = os.getenv(
+            'EMBEDDING_MODEL',
+            'sentence-transformers/all-MiniLM-L6-v2'
+        )
+
+    def load_from_chroma(self, persist_directory: str = "./chroma_db", batch_size: int = 1000) -> List[Dict]:
+        """Read every chunk (with its stored embedding) out of ChromaDB"""
+        import chromadb
+
+        client = chromadb.PersistentClient(path=persist_directory)
+        collection = client.get_collection(name=self.collection_name)
+        total = collection.count()
+        print(f"📦 Reading {total} chunks from ChromaDB ({persist_directory})")
+
+        chunks = []
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=['documents', 'metadatas', 'embeddings']
+            )
+            for chunk_id, text, metadata, embedding in zip(
+                batch['ids'], batch['documents'], batch['metadatas'], batch['embeddings']
+            ):
+                chunks.append({
+                    'id': chunk_id,
+                    'text': text,
+                    'source': metadata.get('source', 'unknown'),
+                    'source_url': metadata.get('source_url', ''),
+                    'metadata': metadata,
+                    'embedding': embedding,
+                })
+        return chunks
+
+    def load_from_processed_chunks(self, path: str = "data/processed_chunks.json") -> List[Dict]:
+        """Read data/processed_chunks.json (ids match load_chroma.py)"""
+        with open(path, 'r', encoding='utf-8') as f:
+            raw_chunks = json.load(f)
+        print(f"📦 Read {len(raw_chunks)} chunks from {path}")
+
+        chunks = []
+        for i, chunk in enumerate(raw_chunks):
+            metadata = {
+                'source': chunk['source'],
+                'source_url': chunk.get('source_url', ''),
+                'chunk_index': chunk.get('metadata', {}).get('chunk_index', 0),
+            }
+            chunks.append({
+                'id': f"chunk_{i}",
+                'text': chunk['text'],
+                'source': chunk['source'],
+                'source_url': chunk.get('source_url', ''),
+                'metadata': metadata,
+                'embedding': chunk['embedding'],
+            })
+        return chunks
+
+    def write(self, chunks: List[Dict]):
+        if not chunks:
+            print("❌ No chunks to export")
+            return
+
+        # Group rows by source so each stream is one contiguous slice
+        chunks = sorted(chunks, key=lambda c: c['source'])
+
+        vectors = np.asarray([c['embedding'] for c in chunks], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.maximum(norms, 1e-12)
+
+        source_ranges = {}
+        for row, chunk in enumerate(chunks):
+            start, _ = source_ranges.get(chunk['source'], (row, row))
+            source_ranges[chunk['source']] = (start, row + 1)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        np.save(os.path.join(self.output_dir, "vectors.npy"), vectors)
+
+        with open(os.path.join(self.output_dir, "chunks.json"), 'w', encoding='utf-8') as f:
+            json.dump([
+                {k: c[k] for k in ('id', 'text', 'source', 'source_url', 'metadata')}
+                for c in chunks
+            ], f)
+
+        manifest = {
+            'embedding_model': self.embedding_model_name,
+            'dim': int(vectors.shape[1]),
+            'count': int(vectors.shape[0]),
+            'normalized': True,
+            'sources': {source: list(rows) for source, rows in source_ranges.items()},
+            'content_hash': index_content_hash(vectors, os.path.join(self.output_dir, "chunks.json")),
+        }
+        with open(os.path.join(self.output_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        print(f"✅ Exported {manifest['count']} x {manifest['dim']} vectors to {self.output_dir}")
+        for source, (start, end) in source_ranges.items():
+            print(f"   {source}: rows {start}-{end} ({end - start} chunks)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a NumPy index for NumpyRetriever")
+    parser.add_argument("--from", dest="source", choices=["chroma", "chunks"], default="chroma")
+    parser.add_argument("--chroma-dir", default="./chroma_db")
+    parser.add_argument("--chunks", default="data/processed_chunks.json")
+    parser.add_argument("--output", default=os.getenv('NUMPY_INDEX_DIR', "./numpy_index"))
+    args = parser.parse_args()
+
+    exporter = NumpyIndexExporter(output_dir=args.output)
+    if args.source == "chroma":
+        chunks = exporter.load_from_chroma(args.chroma_dir)
+    else:
+        chunks = exporter.load_from_processed_chunks(args.chunks)
+    exporter.write(chunks)
@@ -3,12 +3,20 @@ Load processed chunks into ChromaDB (local vector DB)
 """
 
 import os
+import sys
 import json
+import time
+import hashlib
 import chromadb
 from typing import List, Dict
 from dotenv import load_dotenv
 from tqdm import tqdm
 
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.lexical_index import BM25Index
+
 load_dotenv()
 
 
@@ -23,6 +31,9 @@ class ChromaLoader:
         
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(path=self.persist_directory)
+        
+        # Version stamp read by ChromaRetriever.index_version (result cache)
+        self.manifest_path = os.path.join(self.persist_directory, "index_manifest.json")
     
     def create_collection(self, recreate: bool = False):
         """Create or get collection"""
@@ -34,6 +45,10 @@ class ChromaLoader:
                 print(f"   ✅ Deleted")
             except:
                 pass
+            
+            # Invalidate cached results while the rebuild is in progress
+            if os.path.exists(self.manifest_path):
+                os.remove(self.manifest_path)
         
         # Create new collection
         self.collection = self.client.get_or_create_collection(
@@ -93,6 +108,34 @@ class ChromaLoader:
             )
         
         print(f"✅ Upload complete!")
+        
+        self.build_lexical_index(ids, documents, [m['source'] for m in metadatas])
+        self.write_manifest(ids, documents)
+    
+    def build_lexical_index(self, ids: List[str], documents: List[str], sources: List[str]):
+        """BM25 index for hybrid retrieval (RETRIEVAL_MODE=hybrid)"""
+        index = BM25Index.build(ids, documents, sources)
+        index_path = os.path.join(self.persist_directory, "bm25_index.json")
+        index.save(index_path)
+        print(f"   🔤 Wrote BM25 index ({len(index.postings)} terms) to {index_path}")
+    
+    def write_manifest(self, ids: List[str], documents: List[str]):
+        """Record what was uploaded so running retrievers can detect the rebuild"""
+        content_hash = hashlib.sha1()
+        for chunk_id, document in zip(ids, documents):
+            content_hash.update(chunk_id.encode())
+            content_hash.update(document.encode())
+        
+        manifest = {
+            'collection': self.collection_name,
+            'count': len(ids),
+            'content_hash': content_hash.hexdigest(),
+            'built_at': time.time(),
+        }
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        
+        print(f"   📝 Wrote index manifest ({manifest['content_hash'][:12]})")
     
     def verify(self):
         """Verify the upload"""
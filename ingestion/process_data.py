@@ -1,11 +1,16 @@
 import os
+import sys
 import json
 from typing import List, Dict
 from dotenv import load_dotenv
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.embedding_backend import get_embedding_backend, load_checked_embedding_model
+
 load_dotenv()
 
 class DataProcessor:
@@ -19,7 +24,9 @@ class DataProcessor:
             chunk_overlap=self.chunk_overlap,
             length_function=len
         )
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        self.embedding_model, self.embedding_backend = load_checked_embedding_model(
+            self.embedding_model_name, get_embedding_backend()
+        )
 
     def load_data(self) -> List[Dict]:
         documents = []
@@ -3,14 +3,19 @@ Process, clean, chunk, and embed the extracted data
 """
 
 import os
+import sys
 import json
 from typing import List, Dict
 from dotenv import load_dotenv
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 import numpy as np
 
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.embedding_backend import get_embedding_backend, load_checked_embedding_model
+
 load_dotenv()
 
 
@@ -34,8 +39,10 @@ class DataProcessor:
         )
         
         # Initialize embedding model
-        print(f"📥 Loading embedding model...")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        print(f"📥 Loading embedding model ({get_embedding_backend()} backend)...")
+        self.embedding_model, self.embedding_backend = load_checked_embedding_model(
+            self.embedding_model_name, get_embedding_backend()
+        )
         print(f"✅ Embedding model loaded (dimension: {self.embedding_model.get_sentence_embedding_dimension()})")
     
     def clean_text(self, text: str) -> str:
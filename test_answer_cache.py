@@ -0,0 +1,72 @@
+# Semantic answer cache (stub retriever + local NIM stand-in, no API key needed):
+#   uv run python -m pytest test_answer_cache.py
+import threading
+import time
+
+import numpy as np
+
+from agent.answer_cache import SemanticAnswerCache
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_threshold_and_partitions():
+    cache = SemanticAnswerCache(threshold=0.9)
+    partition = cache.partition(0.7, None, "v1", top_k=5, max_tokens=1000)
+    cache.put(unit(1, 0, 0), partition, {"answer": "PMF"})
+
+    assert cache.get(unit(1, 0.2, 0), partition)["answer"] == "PMF"     # cos 0.98
+    assert cache.get(unit(1, 1, 0), partition) is None                  # cos 0.71
+    for other in (
+        cache.partition(0.2, None, "v1", top_k=5, max_tokens=1000),
+        cache.partition(0.7, "linkedin", "v1", top_k=5, max_tokens=1000),
+        cache.partition(0.7, None, "v2", top_k=5, max_tokens=1000),
+        cache.partition(0.7, None, "v1", top_k=3, max_tokens=1000),
+        cache.partition(0.7, None, "v1", top_k=5, max_tokens=100),
+    ):
+        assert cache.get(unit(1, 0, 0), other) is None
+
+
+def test_lru_and_ttl_bounds():
+    cache = SemanticAnswerCache(threshold=0.9, max_entries=2, ttl_seconds=0.05)
+    partition = cache.partition(0.7)
+    for i, vector in enumerate((unit(1, 0, 0), unit(0, 1, 0), unit(0, 0, 1))):
+        cache.put(vector, partition, {"answer": str(i)})
+    assert cache.get(unit(1, 0, 0), partition) is None                  # evicted (LRU)
+    assert cache.get(unit(0, 0, 1), partition)["answer"] == "2"
+    time.sleep(0.06)
+    assert cache.get(unit(0, 0, 1), partition) is None                  # expired
+    assert cache.stats()["evictions"] == 3
+
+
+def test_truncated_answer_not_served_for_longer_request(make_rag, mock_nim):
+    rag = make_rag(ANSWER_CACHE_ENABLED='1')
+    rag.query_with_metadata("What is PMF?", max_tokens=100)
+    assert not rag.query_with_metadata("What is PMF?", max_tokens=1000).get("cached")
+    assert rag.query_with_metadata("What is PMF?", max_tokens=1000).get("cached")
+    assert mock_nim.requests == 2
+
+
+def test_lexical_fast_path_never_encodes_on_the_request(make_rag, mock_nim):
+    rag = make_rag(ANSWER_CACHE_ENABLED='1')
+    rag.retriever.lexical = True
+    embedder = rag.retriever.embedder
+    encode_threads = []
+    real_embed = embedder.embed
+    embedder.embed = lambda query: encode_threads.append(threading.current_thread().name) or real_embed(query)
+
+    rag.query_with_metadata("What is NRR?")
+    # The vector for the cache is computed after the answer, off the request path
+    deadline = time.time() + 2
+    while not rag.answer_cache.stats()["entries"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert encode_threads == ["answer-cache"]
+
+    # A repeat is answered from the cache before retrieval
+    searches = rag.retriever.searches
+    assert rag.query_with_metadata("What is NRR?")["cached"]
+    assert rag.retriever.searches == searches
+    assert mock_nim.requests == 1
@@ -0,0 +1,51 @@
+# Precomputed answer store (no model or API key needed):
+#   uv run python -m pytest test_answer_store.py
+import json
+
+import numpy as np
+import pytest
+
+from agent.answer_store import AnswerStore, answer_store_from_env
+
+SETTINGS = {"temperature": 0.7, "top_k": 5, "max_tokens": 1000}
+
+
+def make_store(**meta):
+    store = AnswerStore([], meta=dict(SETTINGS, index_version="10:abc", **meta))
+    store.add("What is product-market fit?", "Retention flattens.", [], [])
+    return store
+
+
+def test_served_only_with_build_settings():
+    store = make_store()
+    assert store.get("what is product market fit", 0.7, 5, 1000)["answer"] == "Retention flattens."
+    assert store.get("What is product-market fit?", 0.2, 5, 1000) is None
+    assert store.get("What is product-market fit?", 0.7, 3, 1000) is None
+    assert store.get("What is product-market fit?", 0.7, 5, 100) is None
+    assert store.stats()["setting_mismatches"] == 3
+
+
+def test_artifact_dropped_for_other_index(tmp_path, monkeypatch):
+    path = str(tmp_path / "answers.json.gz")
+    make_store().save(path)
+    monkeypatch.setenv('ANSWER_STORE_PATH', path)
+    assert len(answer_store_from_env("10:abc")) == 1
+    assert answer_store_from_env("11:def") is None
+
+
+def test_numpy_index_version_tracks_contents(tmp_path, monkeypatch):
+    pytest.importorskip("sentence_transformers")
+    from agent.numpy_retriever import NumpyRetriever
+
+    monkeypatch.setenv('EMBEDDING_MODEL_LOAD', 'lazy')
+    vectors = np.eye(4, dtype=np.float32)
+    chunks = [{"id": f"c{i}", "text": "t", "source": "youtube"} for i in range(4)]
+    np.save(tmp_path / "vectors.npy", vectors)
+    (tmp_path / "chunks.json").write_text(json.dumps(chunks))
+    (tmp_path / "manifest.json").write_text(json.dumps({"sources": {"youtube": [0, 4]}}))
+    before = NumpyRetriever(str(tmp_path)).index_version()
+
+    # Same shape and manifest, different embeddings (an old export without a content hash)
+    np.save(tmp_path / "vectors.npy", vectors[::-1].copy())
+    after = NumpyRetriever(str(tmp_path)).index_version()
+    assert before != after and before.startswith("4:")
@@ -0,0 +1,39 @@
+# SSE endpoint (stub retriever + local NIM stand-in, no API key needed):
+#   uv run python -m pytest test_api.py
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api import create_app
+
+
+def read_events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_stream_sends_sources_then_tokens_then_stats(make_rag, mock_nim):
+    with TestClient(create_app(make_rag())) as client:
+        response = client.post("/v1/query/stream", json={"question": "What is PMF?"})
+        metrics = client.get("/metrics").json()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = read_events(response)
+    names = [name for name, _ in events]
+    assert names[0] == "sources" and names[-1] == "stats"
+    assert set(names[1:-1]) == {"token"}
+    assert len(events[0][1]["sources"]) == 4
+    assert "".join(data["text"] for _, data in events[1:-1]) == mock_nim.response_text
+    assert events[-1][1]["completed"] and events[-1][1]["ttft_s"] is not None
+    assert metrics["in_flight"] == 0
+
+
+def test_query_returns_answer_and_sources(make_rag, mock_nim):
+    with TestClient(create_app(make_rag())) as client:
+        body = client.post("/v1/query", json={"question": "What is PMF?"}).json()
+    assert body["answer"] == mock_nim.response_text
+    assert len(body["sources"]) == 4
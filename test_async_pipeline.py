@@ -0,0 +1,89 @@
+# Async pipeline on the event loop (stub retriever + local NIM stand-in, no API key needed):
+#   uv run python -m pytest test_async_pipeline.py
+import asyncio
+import threading
+
+import openai
+import pytest
+
+from agent.llm_metrics import get_stream_metrics
+from agent.resilience import CircuitOpenError
+
+
+def test_streams_outnumber_worker_threads(make_rag, mock_nim):
+    mock_nim.tokens_per_sec = 200
+    rag = make_rag(RAG_RETRIEVAL_WORKERS='2')
+
+    async def run():
+        results = await asyncio.gather(*(
+            rag.aquery_with_metadata(f"Question {i}?", stream=True) for i in range(20)
+        ))
+        streams = [result["response_stream"] for result in results]
+        # Every stream is open at once...
+        firsts = await asyncio.gather(*(stream.__anext__() for stream in streams))
+        workers = [t for t in threading.enumerate() if t.name.startswith("rag-")]
+        rests = await asyncio.gather(*(_collect(stream) for stream in streams))
+        await rag.aclose()
+        return workers, [first + rest for first, rest in zip(firsts, rests)]
+
+    workers, answers = asyncio.run(run())
+    # ...on no more threads than the retrieval pool
+    assert len(workers) <= 2
+    assert len(answers) == 20 and all(answer == mock_nim.response_text for answer in answers)
+    assert mock_nim.requests == 20
+
+
+def test_retries_and_breaker_on_the_loop(make_rag, mock_nim):
+    mock_nim.error_rate = 1.0
+    rag = make_rag(LLM_MAX_RETRIES='1', LLM_BACKOFF_BASE='0', LLM_BREAKER_THRESHOLD='2')
+
+    async def run():
+        with pytest.raises(openai.APIStatusError):
+            await rag.aquery_with_metadata("What is PMF?")
+        with pytest.raises(CircuitOpenError):
+            await rag.aquery_with_metadata("What is PMF?")
+        await rag.aclose()
+
+    asyncio.run(run())
+    stats = rag.llm.stats()      # shared with the async client
+    assert mock_nim.requests == 2
+    assert stats["retries"] == 1 and stats["circuit_rejections"] == 1
+    assert stats["circuit_state"] == "open"
+
+
+def test_aclose_stops_the_stream(make_rag, mock_nim):
+    mock_nim.tokens_per_sec = 20
+    rag = make_rag()
+    incomplete = get_stream_metrics().summary()["incomplete"]
+
+    async def run():
+        stream = (await rag.aquery_with_metadata("What is PMF?", stream=True))["response_stream"]
+        assert await stream.__anext__()
+        await stream.aclose()
+        await rag.aclose()
+        return stream
+
+    stream = asyncio.run(run())
+    assert not stream.stats.completed
+    assert get_stream_metrics().summary()["incomplete"] == incomplete + 1
+
+
+def test_coalesced_async_streams_share_one_generation(make_rag, mock_nim):
+    mock_nim.tokens_per_sec = 200
+    rag = make_rag(COALESCE_REQUESTS='1')
+
+    async def run():
+        results = await asyncio.gather(*(
+            rag.aquery_with_metadata("What is PMF?", stream=True) for _ in range(5)
+        ))
+        answers = await asyncio.gather(*(_collect(result["response_stream"]) for result in results))
+        await rag.aclose()
+        return answers
+
+    assert asyncio.run(run()) == [mock_nim.response_text] * 5
+    assert mock_nim.requests == 1
+    assert rag.coalescer.stats()["coalesced"] == 4
+
+
+async def _collect(stream):
+    return "".join([chunk async for chunk in stream])
@@ -0,0 +1,61 @@
+# LLM record/replay cassettes (local NIM stand-in, no API key needed):
+#   uv run python -m pytest test_cassette.py
+import asyncio
+import time
+
+import pytest
+
+from agent.cassette import Cassette, CassetteMissError
+from agent.llm_client import AsyncNvidiaLlamaClient, NvidiaLlamaClient
+
+MESSAGES = [{"role": "user", "content": "What is PMF?"}]
+
+
+def test_repeats_replay_in_order_then_cycle(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    recorder = Cassette(path, "record")
+    recorder.record("m", MESSAGES, 0.7, 100, ["first"], [0.0])
+    recorder.record("m", MESSAGES, 0.7, 100, ["second"], [0.0])
+
+    player = Cassette(path, "replay")
+    entries = [player.lookup("m", MESSAGES, 0.7, 100) for _ in range(3)]
+    assert [player.replay_text(entry) for entry in entries] == ["first", "second", "first"]
+    with pytest.raises(CassetteMissError):
+        player.lookup("m", MESSAGES, 0.2, 100)      # other settings were never recorded
+
+
+def test_timed_replay_keeps_recorded_gaps(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    Cassette(path, "record").record("m", MESSAGES, 0.7, 100, ["a ", "b"], [0.05, 0.1])
+    player = Cassette(path, "replay-timed")
+    start = time.perf_counter()
+    assert "".join(player.replay_chunks(player.lookup("m", MESSAGES, 0.7, 100))) == "a b"
+    assert time.perf_counter() - start >= 0.1
+
+
+def test_record_then_replay_offline(tmp_path, monkeypatch, mock_nim):
+    path = str(tmp_path / "llm.jsonl")
+    monkeypatch.setenv('LLM_CASSETTE_PATH', path)
+    monkeypatch.setenv('LLM_CASSETTE_MODE', 'record')
+    recorder = NvidiaLlamaClient()
+    streamed = "".join(recorder.generate("What is PMF?", stream=True))
+    text = recorder.generate("Define NRR", temperature=0.0)
+    assert mock_nim.requests == 2 and recorder.cassette.recorded == 2
+
+    # Replay needs neither the endpoint nor a key, sync or async
+    monkeypatch.setenv('LLM_CASSETTE_MODE', 'replay')
+    monkeypatch.setenv('NVIDIA_API_KEY', 'PLACEHOLDER')
+    monkeypatch.setenv('NVIDIA_BASE_URL', 'http://127.0.0.1:9/v1')
+    player = NvidiaLlamaClient()
+    stream = player.generate("What is PMF?", stream=True)
+    assert "".join(stream) == streamed and stream.stats.cached
+
+    async def areplay():
+        client = AsyncNvidiaLlamaClient(shared_with=player)
+        chunks = await client.generate("What is PMF?", stream=True)
+        result = "".join([chunk async for chunk in chunks]), await client.generate("Define NRR", temperature=0.0)
+        await client.close()
+        return result
+
+    assert asyncio.run(areplay()) == (streamed, text)
+    assert mock_nim.requests == 2
@@ -0,0 +1,131 @@
+# Single-flight coalescing (stub retriever + local NIM stand-in, no API key needed):
+#   uv run python -m pytest test_coalescing.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.coalescing import SingleFlight
+from agent.llm_metrics import get_stream_metrics
+
+
+class SlowStream:
+    """Upstream stand-in: one chunk every `gap` seconds until closed"""
+
+    def __init__(self, chunks=20, gap=0.01):
+        self.remaining = chunks
+        self.gap = gap
+        self.closed = False
+        self.stats = "upstream stats"
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed or not self.remaining:
+            raise StopIteration
+        time.sleep(self.gap)
+        self.remaining -= 1
+        return "tok "
+
+    def close(self):
+        self.closed = True
+
+
+def test_fan_out_shares_one_upstream():
+    flights = SingleFlight()
+    produced = []
+
+    def produce():
+        produced.append(1)
+        return {"sources": ["s"]}, SlowStream(chunks=5)
+
+    def ask():
+        meta, chunks = flights.join("q", produce)
+        return meta, "".join(chunks)
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: ask(), range(4)))
+
+    assert len(produced) == 1
+    assert all(result == ({"sources": ["s"]}, "tok " * 5) for result in results)
+    assert flights.stats()["coalesced"] == 3 and flights.stats()["in_flight"] == 0
+
+
+def test_upstream_closed_once_every_consumer_leaves():
+    flights = SingleFlight()
+    upstream = SlowStream(chunks=1000)
+    _, first = flights.join("q", lambda: ({}, upstream))
+    _, second = flights.join("q", lambda: ({}, SlowStream()))
+    assert next(first) == next(second) == "tok "
+    assert first.stats == "upstream stats"
+
+    first.close()
+    time.sleep(0.05)
+    assert not upstream.closed           # one consumer still listening
+    second.close()
+    deadline = time.time() + 1
+    while not upstream.closed and time.time() < deadline:
+        time.sleep(0.01)
+    assert upstream.closed
+    assert flights.stats()["abandoned"] == 1 and flights.stats()["in_flight"] == 0
+
+    # The next identical request starts a fresh flight
+    fresh = SlowStream(chunks=2)
+    _, third = flights.join("q", lambda: ({}, fresh))
+    assert "".join(third) == "tok tok "
+
+
+def test_unread_consumer_detaches_when_dropped():
+    flights = SingleFlight()
+    upstream = SlowStream(chunks=1000)
+    flights.join("q", lambda: ({}, upstream))   # iterator dropped unread
+    deadline = time.time() + 1
+    while not upstream.closed and time.time() < deadline:
+        time.sleep(0.01)
+    assert upstream.closed
+
+
+def test_abandoned_coalesced_stream_stops_generation(make_rag, mock_nim):
+    mock_nim.tokens_per_sec = 50
+    rag = make_rag(COALESCE_REQUESTS='1')
+    incomplete = get_stream_metrics().summary()["incomplete"]
+
+    result = rag.query_with_metadata("What is PMF?", stream=True)
+    stream = result["response_stream"]
+    assert next(stream)
+    assert stream.stats.model                # leader's InstrumentedStream stats
+    stream.close()
+
+    deadline = time.time() + 2
+    while any(t.name == "coalesce" for t in threading.enumerate()) and time.time() < deadline:
+        time.sleep(0.01)
+    assert get_stream_metrics().summary()["incomplete"] == incomplete + 1
+    assert rag.coalescer.stats()["abandoned"] == 1
+
+
+def test_async_flight_cancelled_when_every_consumer_leaves():
+    flights = SingleFlight()
+    closed = []
+
+    async def upstream():
+        try:
+            while True:
+                await asyncio.sleep(0.01)
+                yield "tok "
+        finally:
+            closed.append(True)
+
+    async def run():
+        produce = lambda: asyncio.sleep(0, ({}, upstream()))
+        (_, first), (_, second) = await asyncio.gather(flights.ajoin("q", produce), flights.ajoin("q", produce))
+        assert await first.__anext__() == await second.__anext__() == "tok "
+        await first.aclose()
+        await asyncio.sleep(0.05)
+        assert not closed
+        await second.aclose()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert closed == [True]
+    assert flights.stats()["abandoned"] == 1 and flights.stats()["in_flight"] == 0
@@ -0,0 +1,69 @@
+# Conversation memory and chat() (stub retriever + local NIM stand-in, no API key needed):
+#   uv run python -m pytest test_conversation.py
+from agent.conversation import ConversationMemory
+
+
+class SummaryLLM:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def chat(self, messages, **kwargs):
+        self.calls.append(messages[-1]["content"])
+        if self.fail:
+            raise RuntimeError("endpoint down")
+        return f"summary {len(self.calls)}"
+
+
+def test_compaction_folds_evicted_turns_into_summary():
+    memory = ConversationMemory(max_turns=2, compact_every=2)
+    for i in range(3):
+        memory.add_turn(f"q{i}", f"a{i}")
+    assert not memory.needs_compaction()    # one evicted turn is sent verbatim
+    memory.add_turn("q3", "a3")
+    assert memory.needs_compaction()
+
+    llm = SummaryLLM()
+    memory.compact(llm)
+    assert "q0" in llm.calls[0] and "q1" in llm.calls[0] and "q2" not in llm.calls[0]
+    messages = memory.messages("system", "q4")
+    assert messages[0]["content"].endswith("summary 1")
+    assert [m["content"] for m in messages[1:]] == ["q2", "a2", "q3", "a3", "q4"]
+    assert memory.stats()["compactions"] == 1 and memory.stats()["pending"] == 0
+
+
+def test_failed_compaction_keeps_turns_then_drops_the_oldest():
+    memory = ConversationMemory(max_turns=2, compact_every=2)
+    llm = SummaryLLM(fail=True)
+    for i in range(10):
+        memory.add_turn(f"q{i}", f"a{i}")
+        if memory.needs_compaction():
+            memory.compact(llm)
+    # Pending is capped at max_turns + compact_every; older turns are dropped
+    assert memory.stats()["pending"] == 4 and memory.stats()["dropped_turns"] == 4
+    assert memory.summary == ""
+    assert len(memory.messages("system", "q")) == 1 + 2 * 6 + 1
+
+
+def test_first_turn_uses_answer_cache(make_rag, mock_nim):
+    rag = make_rag(ANSWER_CACHE_ENABLED='1')
+    rag.query_with_metadata("What is PMF?")
+
+    first = rag.chat("s1", "What is PMF?", stream=False)
+    assert first["cached"] and mock_nim.requests == 1
+    assert first["history"]["turns"] == 1
+
+    # From the second turn on, the history goes to the model
+    second = rag.chat("s1", "And how do I measure it?", stream=False)
+    assert mock_nim.requests == 2
+    assert second["history"]["turns"] == 2
+
+
+def test_first_turn_streams_through_coalescer(make_rag, mock_nim):
+    rag = make_rag(COALESCE_REQUESTS='1')
+    result = rag.chat("s1", "What is PMF?")
+    stream = result["response_stream"]
+    assert "".join(stream) == mock_nim.response_text
+    assert stream.stats.completed                 # the leader's stream stats survive
+    assert rag.coalescer.stats()["requests"] == 1
+    assert rag.conversations.get("s1").stats()["turns"] == 1
@@ -0,0 +1,84 @@
+# Query embedding caches (no model or API key needed):
+#   uv run python -m pytest test_embedding_cache.py
+import threading
+import time
+
+import numpy as np
+
+from agent.embedding_cache import EmbeddingCache, PersistentEmbeddingCache
+
+
+def test_key_ignores_case_and_whitespace():
+    assert EmbeddingCache.make_key("m", "What is  PMF? ") == EmbeddingCache.make_key("m", "what is pmf?")
+    assert EmbeddingCache.make_key("m", "PMF") != EmbeddingCache.make_key("other", "PMF")
+
+
+def test_lru_entry_cap():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", np.ones(4))
+    cache.put("b", np.ones(4))
+    cache.get("a")                    # b is now least recently used
+    cache.put("c", np.ones(4))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_and_oversized_vectors():
+    cache = EmbeddingCache(max_bytes=3 * 16)          # three float32[4]
+    for key in "abcd":
+        cache.put(key, np.ones(4, dtype=np.float64))  # stored as float32
+    assert len(cache) == 3 and cache.stats()["bytes"] == 48
+    assert cache.get("a") is None
+
+    stored = cache.put("huge", np.ones(100))
+    assert stored.dtype == np.float32 and not stored.flags.writeable
+    assert cache.get("huge") is None and len(cache) == 3
+
+
+def test_ttl_expiry():
+    cache = EmbeddingCache(ttl_seconds=0.05)
+    cache.put("a", np.ones(4))
+    assert cache.get("a") is not None
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1 and len(cache) == 0
+
+
+def test_concurrent_access_keeps_accounting_consistent():
+    cache = EmbeddingCache(max_entries=50)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(2000):
+                key = str((offset + i) % 80)
+                if cache.get(key) is None:
+                    cache.put(key, np.full(4, i, dtype=np.float32))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 7,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert not errors
+    assert stats["entries"] == 50 and stats["bytes"] == 50 * 16
+    assert stats["hits"] + stats["misses"] == 8 * 2000
+
+
+def test_disk_cache_shared_by_two_models(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    torch = PersistentEmbeddingCache(path, "minilm:torch")
+    torch.put("What is PMF?", np.ones(4))
+
+    # A second backend opening the same file keeps the first one's rows
+    onnx = PersistentEmbeddingCache(path, "minilm:onnx-int8")
+    onnx.put("What is PMF?", np.zeros(4))
+    assert np.array_equal(PersistentEmbeddingCache(path, "minilm:torch").get("what is pmf?"), np.ones(4))
+    assert np.array_equal(onnx.get("What is PMF?"), np.zeros(4))
+    assert onnx.get("unseen") is None
+    assert (onnx.stats()["hits"], onnx.stats()["misses"]) == (1, 1)
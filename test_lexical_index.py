@@ -0,0 +1,65 @@
+# BM25 index and reciprocal-rank fusion (pure Python, no model or index needed):
+#   uv run python -m pytest test_lexical_index.py
+import pytest
+
+from agent.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    "li-0": ("linkedin", "PMF is when retention curves flatten and users pull the product"),
+    "li-1": ("linkedin", "Pricing pages: anchor high, then discount annual plans"),
+    "yt-0": ("youtube", "Sean Ellis test: ask users how disappointed they would be. PMF PMF"),
+    "yt-1": ("youtube", "Net revenue retention (NRR) above 120% is best in class"),
+}
+
+
+@pytest.fixture
+def index():
+    ids = list(DOCS)
+    return BM25Index.build(ids, [DOCS[i][1] for i in ids], [DOCS[i][0] for i in ids])
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("What are the users' PMF curves?") == ["user", "pmf", "curve"]
+
+
+def test_rare_terms_rank_and_coverage(index):
+    hits = index.search("Sean Ellis test")
+    assert hits[0]["id"] == "yt-0" and hits[0]["coverage"] == pytest.approx(1.0)
+
+    hits = index.search("PMF retention")
+    assert {hit["id"] for hit in hits[:2]} == {"li-0", "yt-0"}
+    assert hits[0]["id"] == "li-0"            # matches both terms
+    assert hits[0]["coverage"] == pytest.approx(1.0) and hits[1]["coverage"] < 1.0
+
+
+def test_unseen_terms_lower_coverage(index):
+    (hit,) = index.search("NRR churn benchmark")
+    assert hit["id"] == "yt-1" and hit["coverage"] < 0.5
+    assert index.search("kubernetes") == []
+
+
+def test_source_filter(index):
+    assert [hit["source"] for hit in index.search("PMF", source_filter="youtube")] == ["youtube"]
+
+
+def test_save_load_round_trip(index, tmp_path):
+    path = tmp_path / "bm25_index.json"
+    index.save(str(path))
+    assert BM25Index.load(str(path)).search("pricing annual") == index.search("pricing annual")
+
+
+def test_rrf_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]])
+    assert sorted(fused, key=fused.get, reverse=True)[:2] == ["b", "a"]
+    assert fused["b"] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_hybrid_mode_covers_source_filtered_queries(make_rag, mock_nim):
+    rag = make_rag()
+    calls = []
+    rag.retriever.retrieval_mode = 'hybrid'
+    rag.retriever.search_hybrid = lambda query, source_filter, top_k: calls.append(source_filter) or [
+        {'id': 'yt-0', 'text': 'PMF', 'source': source_filter, 'source_url': '', 'score': 1.0, 'metadata': {}}
+    ]
+    result = rag.query_with_metadata("What is PMF?", source_filter="youtube")
+    assert calls == ["youtube"] and result["chunks"][0]["id"] == "yt-0"
@@ -1,3 +1,5 @@
+# Offline / reproducible: record once with LLM_CASSETTE_MODE=record, then run with
+# LLM_CASSETTE_MODE=replay (instant) or replay-timed (recorded latency) - no API key needed
 from agent.llm_client import NvidiaLlamaClient
 
 client = NvidiaLlamaClient()
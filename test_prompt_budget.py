@@ -0,0 +1,35 @@
+# Token-budgeted prompt assembly (no model or API key needed):
+#   uv run python -m pytest test_prompt_budget.py
+import pytest
+
+from agent.persona import LennyPersona
+
+LONG = ("Retention is the single most important metric for early stage products because it tells "
+        "you whether people keep getting value from what you built. ") * 4
+
+
+@pytest.fixture
+def persona():
+    return LennyPersona()
+
+
+@pytest.mark.parametrize("budget", [150, 300, 600])
+@pytest.mark.parametrize("lenny, guest", [(3, 0), (0, 3), (3, 3), (1, 1)])
+def test_prompt_stays_within_budget(persona, budget, lenny, guest):
+    built = persona.build_prompt("How do I grow retention?", [{"text": LONG}] * lenny, [{"text": LONG}] * guest, budget)
+    assert built["tokens"]["total"] <= budget
+    assert "How do I grow retention?" in built["prompt"]
+
+
+def test_unused_guest_budget_rolls_over_to_linkedin(persona):
+    chunks = [{"text": LONG}] * 3
+    linkedin_only = persona.build_prompt("How do I grow?", chunks, [], budget=300)
+    guest_only = persona.build_prompt("How do I grow?", [], chunks, budget=300)
+    # With one stream empty, the other gets the whole context budget
+    assert linkedin_only["tokens"]["linkedin"] == guest_only["tokens"]["guest"]
+    assert linkedin_only["chunks_used"]["linkedin"] == persona.chunks_per_stream
+
+
+def test_tight_budget_keeps_a_linkedin_chunk(persona):
+    built = persona.build_prompt("How do I grow?", [{"text": LONG}], [{"text": LONG}] * 3, budget=150)
+    assert built["chunks_used"]["linkedin"] == 1
@@ -0,0 +1,55 @@
+# Circuit breaker recovery against the local NIM stand-in (no API key needed):
+#   uv run python -m pytest test_resilience.py
+import os
+import time
+
+import openai
+import pytest
+
+from agent.resilience import CircuitBreaker, CircuitOpenError
+from evaluation.mock_nim_server import MockNIMConfig, start_in_thread
+
+
+def test_breaker_trial_resolves_without_outcome():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()          # half-open trial
+    assert not breaker.allow()      # only one at a time
+    breaker.release_trial()
+    assert breaker.allow()
+
+
+def test_half_open_trial_with_4xx_closes_breaker(monkeypatch):
+    config = MockNIMConfig(ttft_ms=0, tokens_per_sec=1e6, error_rate=1.0, error_status=503)
+    server, base_url = start_in_thread(config)
+    monkeypatch.setenv('NVIDIA_API_KEY', 'mock')
+    monkeypatch.setenv('NVIDIA_BASE_URL', base_url)
+    monkeypatch.setenv('LLM_MAX_RETRIES', '0')
+    monkeypatch.setenv('LLM_BREAKER_THRESHOLD', '2')
+    monkeypatch.setenv('LLM_BREAKER_RESET_S', '0.2')
+    monkeypatch.delenv('LLM_CASSETTE_MODE', raising=False)
+    monkeypatch.delenv('LLM_COMPLETION_CACHE_PATH', raising=False)
+
+    from agent.llm_client import NvidiaLlamaClient
+    client = NvidiaLlamaClient()
+    try:
+        # 503s open the breaker
+        for _ in range(2):
+            with pytest.raises(openai.InternalServerError):
+                client.generate("hi", temperature=0.7)
+        assert client.breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            client.generate("hi", temperature=0.7)
+
+        # Half-open trial answered with a 400
+        time.sleep(0.25)
+        config.error_status = 400
+        with pytest.raises(openai.BadRequestError):
+            client.generate("hi", temperature=0.7)
+        assert client.breaker.state == "closed"
+
+        # Endpoint recovered: calls flow again
+        config.error_rate = 0.0
+        assert client.generate("hi", temperature=0.7)
+    finally:
+        server.shutdown()
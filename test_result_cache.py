@@ -0,0 +1,83 @@
+# Versioned retrieval-result cache (no model or API key needed):
+#   uv run python -m pytest test_result_cache.py
+import json
+
+import numpy as np
+import pytest
+
+from agent.result_cache import RetrievalResultCache
+
+
+def chunk(i, text="chunk"):
+    return {'id': str(i), 'text': text, 'source': 'youtube', 'source_url': '', 'score': 0.5}
+
+
+def test_key_normalizes_query_and_separates_versions():
+    key = RetrievalResultCache.make_key
+    assert key("What is  PMF?", None, 5, "v1") == key("what is pmf?", None, 5, "v1")
+    assert key("PMF", None, 5, "v1") != key("PMF", None, 5, "v2")
+    assert key("PMF", None, 5, "v1") != key("PMF", "youtube", 5, "v1")
+    assert key("PMF", None, 5, "v1", score_threshold=0.3) != key("PMF", None, 5, "v1")
+
+
+def test_hands_out_copies():
+    cache = RetrievalResultCache()
+    key = cache.make_key("PMF", None, 5, "v1")
+    cache.put(key, [chunk(0)])
+    cache.get(key)[0]['score'] = 99
+    assert cache.get(key)[0]['score'] == 0.5
+
+
+def test_lru_and_byte_bounds():
+    cache = RetrievalResultCache(max_entries=2)
+    keys = [cache.make_key(f"q{i}", None, 5, "v1") for i in range(3)]
+    for key in keys:
+        cache.put(key, [chunk(0)])
+    assert cache.get(keys[0]) is None and cache.get(keys[2]) is not None
+    assert cache.stats()["evictions"] == 1
+
+    small = RetrievalResultCache(max_bytes=2000)
+    small.put(keys[0], [chunk(0, "x" * 5000)])        # larger than the whole budget
+    assert small.get(keys[0]) is None and small.stats()["entries"] == 0
+
+
+def test_rebuilt_index_is_never_served_stale(tmp_path, monkeypatch):
+    pytest.importorskip("sentence_transformers")
+    import chromadb
+    from agent import chroma_retriever
+    from conftest import StubEmbedder
+
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    collection = client.create_collection("lenny_clone")
+    collection.add(
+        ids=["a", "b"],
+        embeddings=np.eye(2, 16).tolist(),
+        documents=["PMF chunk", "NRR chunk"],
+        metadatas=[{"source": "youtube"}, {"source": "youtube"}],
+    )
+
+    retriever = chroma_retriever.ChromaRetriever.__new__(chroma_retriever.ChromaRetriever)
+    retriever.persist_directory = str(tmp_path)
+    retriever.client = client
+    retriever.collection_name = "lenny_clone"
+    retriever.collection = collection
+    retriever.embedder = StubEmbedder()
+    retriever.result_cache = RetrievalResultCache()
+    retriever._manifest_stamp = None
+    retriever._index_version = None
+    retriever.retrieval_mode = 'vector'
+
+    first = retriever.search_with_filters("What is PMF?", "youtube", top_k=2)
+    version = retriever.index_version()
+    assert retriever.search_with_filters("what is  PMF?", "youtube", top_k=2) == first
+    assert retriever.result_cache.stats()["hits"] == 1
+
+    # Rebuild: new collection contents plus a new manifest
+    client.delete_collection("lenny_clone")
+    rebuilt = client.create_collection("lenny_clone")
+    rebuilt.add(ids=["c"], embeddings=np.eye(1, 16).tolist(), documents=["new"], metadatas=[{"source": "youtube"}])
+    with open(tmp_path / chroma_retriever.INDEX_MANIFEST, "w") as f:
+        json.dump({"chunks": 1}, f)
+
+    assert retriever.index_version() != version
+    assert [r['id'] for r in retriever.search_with_filters("What is PMF?", "youtube", top_k=2)] == ["c"]
@@ -0,0 +1,62 @@
+# Small/large model routing (stub retriever + local NIM stand-in, no API key needed):
+#   uv run python -m pytest test_router.py
+import pytest
+
+from agent.router import ModelRouter
+
+
+def chunks(score, retrieval=None):
+    return [{'score': score, **({'retrieval': retrieval} if retrieval else {})}]
+
+
+@pytest.fixture
+def router(monkeypatch):
+    for name in ('ROUTER_MAX_SMALL_WORDS', 'ROUTER_MIN_SMALL_SCORE', 'ROUTER_FRAMEWORK_TO_SMALL'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('LLM_SMALL_MODEL', 'small')
+    monkeypatch.setenv('LLM_LARGE_MODEL', 'large')
+    return ModelRouter()
+
+
+@pytest.mark.parametrize("question, context, framework, expected", [
+    ("Why does retention matter?", chunks(0.9), "", ("open_ended", "large")),
+    ("Should I raise prices?", chunks(0.9), "pricing", ("open_ended", "large")),
+    ("What is PMF? " + "really " * 12, chunks(0.9), "", ("long_question", "large")),
+    ("What is the Sean Ellis test?", chunks(0.2), "pmf", ("framework", "small")),
+    ("What is NRR?", chunks(0.8), "", ("confident_retrieval", "small")),
+    ("What is NRR?", chunks(0.5), "", ("default", "large")),
+])
+def test_rules(router, question, context, framework, expected):
+    assert router.route(question, context, [], framework=framework) == expected
+
+
+def test_lexical_coverage_is_not_vector_confidence(router):
+    # A full BM25 match scores 1.0 coverage; it says nothing about similarity
+    assert router.route("What is NRR?", chunks(1.0, 'lexical'), []) == ("default", "large")
+    assert router.route("What is NRR?", chunks(1.0, 'lexical'), chunks(0.8)) == ("confident_retrieval", "small")
+
+
+def test_framework_rule_can_be_disabled(router, monkeypatch):
+    monkeypatch.setenv('ROUTER_FRAMEWORK_TO_SMALL', '0')
+    assert ModelRouter().route("Sean Ellis test?", chunks(0.2), [], framework="pmf")[0] == "default"
+
+
+def test_summary_per_route(router):
+    for seconds in (1.0, 2.0, 3.0):
+        router.record("default", "large", seconds, ttft=0.1)
+    router.record("framework", "small", 0.5)
+    summary = router.summary()
+    assert summary["default"]["requests"] == 3 and summary["default"]["share"] == 0.75
+    assert summary["default"]["latency_s"]["p50"] == 2.0
+    assert summary["framework"]["ttft_s"] is None
+
+
+def test_routed_stream_is_recorded(make_rag, mock_nim):
+    rag = make_rag(MODEL_ROUTING='1')
+    result = rag.query_with_metadata("What is NRR?", stream=True)
+    assert result["route"] == "confident_retrieval"
+    "".join(result["response_stream"])
+    assert rag.router.summary()["confident_retrieval"]["requests"] == 1
+
+    rag.retriever.lexical = True
+    assert rag.query_with_metadata("What is NRR?")["route"] == "default"